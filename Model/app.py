@@ -1,28 +1,259 @@
-
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 from typing import Dict, List, Optional
+from datetime import date
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from contextlib import asynccontextmanager
+import asyncio
+import contextvars
+import copy
+import functools
 import json
-import requests
-from sentence_transformers import SentenceTransformer
-from pinecone import Pinecone
+import secrets
+import time
+import uuid
 import os
 import logging
 from dotenv import load_dotenv
+from cache import LRUCache, normalize_query
+from embedding_backend import EMBEDDING_MODEL_NAME, load_query_encoder, warmup
+from gemini_client import GeminiClient, GeminiError
+from intent_parser import IntentParser
+from lexical_index import BM25Index, fuse
+from metrics import (REGISTRY, HTTP_REQUEST_SECONDS, INDEX_EMPTY_FILTER_TOTAL, INTENT_SOURCE_TOTAL,
+                     LEXICAL_TIMEOUT_TOTAL, STAGE_SECONDS, CallbackCounter, CallbackGauge, RequestIdFilter,
+                     server_timing_header, stage, start_request)
+from response_cache import SemanticResponseCache, make_context_key
+from sentiment_cube import ALL, DIMENSIONS, SentimentCube
+from sentiment_trends import GRANULARITIES, SentimentTrends
 
 # Load environment variables
 load_dotenv()
 
 # Setup logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - [%(request_id)s] %(message)s')
+for handler in logging.getLogger().handlers:
+    handler.addFilter(RequestIdFilter())
 logger = logging.getLogger(__name__)
 
+# Configuration
+PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
+TATA_INDEX_NAME = "tata-motors-sentiment"
+COMPETITOR_INDEX_NAME = "competitors-sentiment"
+GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+GEMINI_MODEL = "gemini-2.0-flash-exp"
+GEMINI_BASE_URL = os.getenv("GEMINI_BASE_URL", "https://generativelanguage.googleapis.com/v1beta")
+GEMINI_MAX_CONNECTIONS = int(os.getenv("GEMINI_MAX_CONNECTIONS", "20"))
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "8"))
+GEMINI_TIMEOUT_SECONDS = float(os.getenv("GEMINI_TIMEOUT_SECONDS", "30"))
+GEMINI_MAX_RETRIES = int(os.getenv("GEMINI_MAX_RETRIES", "3"))
+
+# Vector store backend: "pinecone" (hosted) or "local" (in-process NumPy index)
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "pinecone").lower()
+TATA_EMBEDDED_PATH = os.getenv("TATA_EMBEDDED_PATH", "tata_data_embedded.jsonl")
+COMPETITOR_EMBEDDED_PATH = os.getenv("COMPETITOR_EMBEDDED_PATH", "competitor_data_embedding.jsonl")
+LOCAL_INDEX_TYPE = os.getenv("LOCAL_INDEX_TYPE", "auto")  # auto, exact or ivf
+LOCAL_INDEX_NPROBE = int(os.getenv("LOCAL_INDEX_NPROBE", "8"))
+# Collapse near-duplicate posts when building the local and BM25 indexes from the embedded files
+COLLAPSE_DUPLICATES = os.getenv("COLLAPSE_DUPLICATES", "true").lower() in ("1", "true", "yes")
+
+# Hybrid retrieval: BM25 over the embedded files (<file>.bm25, built by uploader.py /
+# lexical_index.py) fused with the vector matches. Lexical results that miss the
+# budget are dropped and the query returns vector-only matches.
+HYBRID_SEARCH = os.getenv("HYBRID_SEARCH", "true").lower() in ("1", "true", "yes")
+LEXICAL_BUDGET_MS = float(os.getenv("LEXICAL_BUDGET_MS", "50"))
+LEXICAL_WORKERS = int(os.getenv("LEXICAL_WORKERS", "4"))
+
+# Query encoder backend: torch (float32), int8 (dynamic quantization) or onnx
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch").lower()
+
+# Query embedding cache size (0 disables caching)
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "2048"))
+INTENT_CACHE_SIZE = int(os.getenv("INTENT_CACHE_SIZE", "2048"))
+
+# Multi-brand competitor search: Pinecone over-fetch factor for the shared $in query
+COMPETITOR_OVERFETCH = int(os.getenv("COMPETITOR_OVERFETCH", "3"))
+PINECONE_MAX_TOP_K = 1000
+
+# Semantic response cache for /api/analyze (size 0 disables it)
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "512"))
+RESPONSE_CACHE_THRESHOLD = float(os.getenv("RESPONSE_CACHE_THRESHOLD", "0.92"))
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "3600"))
+# How often the indexes are re-checked to detect re-uploads
+INDEX_FINGERPRINT_TTL_SECONDS = float(os.getenv("INDEX_FINGERPRINT_TTL_SECONDS", "60"))
+# Upload manifests written by uploader.py; they change on every sync that upserts or deletes
+TATA_MANIFEST_PATH = os.getenv("TATA_MANIFEST_PATH", TATA_EMBEDDED_PATH + ".manifest.json")
+COMPETITOR_MANIFEST_PATH = os.getenv("COMPETITOR_MANIFEST_PATH", COMPETITOR_EMBEDDED_PATH + ".manifest.json")
+
+# Token required by admin endpoints (X-Admin-Token header); unset disables them
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+# Add a Server-Timing header with per-stage latencies to every response
+SERVER_TIMING = os.getenv("SERVER_TIMING", "false").lower() in ("1", "true", "yes")
+
+# Blocking work (encoder, index queries) runs on a bounded thread pool
+RETRIEVAL_WORKERS = int(os.getenv("RETRIEVAL_WORKERS", "8"))
+ANALYZE_DEADLINE_SECONDS = float(os.getenv("ANALYZE_DEADLINE_SECONDS", "60"))
+
+# Precomputed population-level sentiment aggregates (built by sentiment_cube.py / the crawler)
+SENTIMENT_CUBE_PATH = os.getenv("SENTIMENT_CUBE_PATH", "sentiment_cube.json")
+SENTIMENT_TRENDS_PATH = os.getenv("SENTIMENT_TRENDS_PATH", "sentiment_trends.json")
+
+ANALYSIS_FAILED_MESSAGE = "Failed to generate analysis. Please try again."
+NO_RESULTS_MESSAGE = "No relevant feedback found for Tata vehicles. Please try rephrasing your query."
+NO_FILTER_MATCHES_MESSAGE = ("No feedback for Tata {vehicle} matches {filters}. "
+                             "Try a query without that location or sentiment.")
+
+# Competitor mapping
+COMPETITOR_MAPPING = {
+    "safari": ["Mahindra XUV700", "Hyundai Alcazar", "MG Hector Plus"],
+    "harrier": ["Jeep Compass", "MG Hector", "Hyundai Tucson"],
+}
+
+def validate_config():
+    if VECTOR_BACKEND not in ("pinecone", "local"):
+        raise ValueError(f"Unknown VECTOR_BACKEND: {VECTOR_BACKEND}")
+    if VECTOR_BACKEND == "pinecone" and not PINECONE_API_KEY:
+        raise ValueError("PINECONE_API_KEY not found in .env file")
+    if not GEMINI_API_KEY:
+        raise ValueError("GEMINI_API_KEY not found in .env file")
+
+def create_indexes():
+    """Create the Tata and competitor indexes for the configured backend"""
+    if VECTOR_BACKEND == "local":
+        from vector_store import LocalIndex
+        options = {"index_type": LOCAL_INDEX_TYPE, "nprobe": LOCAL_INDEX_NPROBE,
+                   "collapse_duplicates": COLLAPSE_DUPLICATES}
+        return (LocalIndex.from_jsonl(TATA_EMBEDDED_PATH, **options),
+                LocalIndex.from_jsonl(COMPETITOR_EMBEDDED_PATH, **options))
+    
+    from pinecone import Pinecone
+    pc = Pinecone(api_key=PINECONE_API_KEY)
+    return pc.Index(TATA_INDEX_NAME), pc.Index(COMPETITOR_INDEX_NAME)
+
+def load_lexical_index(embedded_path: str) -> Optional[BM25Index]:
+    """Prebuilt <embedded_path>.bm25 index, else one built from the embedded file"""
+    prefix = embedded_path + ".bm25"
+    if BM25Index.exists(prefix):
+        return BM25Index.load(prefix)
+    if os.path.exists(embedded_path):
+        return BM25Index.from_jsonl(embedded_path, collapse_duplicates=COLLAPSE_DUPLICATES)
+    logger.warning(f"No lexical index for {embedded_path}; queries on it are vector-only")
+    return None
+
+# In-process caches (cheap, created at import)
+embedding_cache = LRUCache(maxsize=EMBEDDING_CACHE_SIZE)
+intent_cache = LRUCache(maxsize=INTENT_CACHE_SIZE)
+intent_parser = IntentParser(COMPETITOR_MAPPING)
+response_cache = SemanticResponseCache(
+    threshold=RESPONSE_CACHE_THRESHOLD,
+    maxsize=RESPONSE_CACHE_SIZE,
+    ttl=RESPONSE_CACHE_TTL_SECONDS
+)
+fingerprint_cache = LRUCache(maxsize=1, ttl=INDEX_FINGERPRINT_TTL_SECONDS)
+
+# Heavy services, created by the lifespan handler
+tata_index = None
+competitor_index = None
+tata_lexical = None
+competitor_lexical = None
+embedding_model = None
+gemini_client = None
+retrieval_executor = None
+lexical_executor = None
+sentiment_cube = None
+sentiment_trends = None
+service_state = {"ready": False, "error": None, "startup_seconds": None, "warmup_seconds": None}
+
+def load_services():
+    """Create the indexes and load + warm up the query encoder (blocking)"""
+    global tata_index, competitor_index, tata_lexical, competitor_lexical
+    global embedding_model, sentiment_cube, sentiment_trends
+    started = time.perf_counter()
+    
+    tata_index, competitor_index = create_indexes()
+    if HYBRID_SEARCH:
+        tata_lexical = load_lexical_index(TATA_EMBEDDED_PATH)
+        competitor_lexical = load_lexical_index(COMPETITOR_EMBEDDED_PATH)
+    if os.path.exists(SENTIMENT_CUBE_PATH):
+        sentiment_cube = SentimentCube.load(SENTIMENT_CUBE_PATH)
+        logger.info(f"Loaded sentiment cube: {sentiment_cube.documents} documents")
+    else:
+        logger.warning(f"No sentiment cube at {SENTIMENT_CUBE_PATH}; population stats are disabled")
+    if os.path.exists(SENTIMENT_TRENDS_PATH):
+        sentiment_trends = SentimentTrends.load(SENTIMENT_TRENDS_PATH)
+        logger.info(f"Loaded sentiment trends: {len(sentiment_trends.brands)} brands")
+    else:
+        logger.warning(f"No sentiment trends at {SENTIMENT_TRENDS_PATH}; /api/sentiment/trends is disabled")
+    embedding_model = load_query_encoder(EMBEDDING_BACKEND, EMBEDDING_MODEL_NAME)
+    
+    warmup_started = time.perf_counter()
+    warmup(embedding_model)
+    service_state["warmup_seconds"] = round(time.perf_counter() - warmup_started, 3)
+    service_state["startup_seconds"] = round(time.perf_counter() - started, 3)
+
+async def initialize_services():
+    """Load services in the background; /ready reports when they are usable"""
+    try:
+        await asyncio.get_running_loop().run_in_executor(retrieval_executor, load_services)
+        service_state["ready"] = True
+        logger.info(f"Successfully initialized all services in {service_state['startup_seconds']}s "
+                    f"(warmup {service_state['warmup_seconds']}s, encoder: {EMBEDDING_BACKEND})")
+    except Exception as e:
+        service_state["error"] = str(e)
+        logger.error(f"Initialization error: {e}", exc_info=True)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start services without blocking the worker; release them on shutdown"""
+    global gemini_client, retrieval_executor, lexical_executor
+    validate_config()
+    
+    retrieval_executor = ThreadPoolExecutor(max_workers=RETRIEVAL_WORKERS,
+                                            thread_name_prefix="retrieval")
+    # Separate pool: lexical searches are awaited from retrieval threads
+    lexical_executor = ThreadPoolExecutor(max_workers=LEXICAL_WORKERS,
+                                          thread_name_prefix="lexical")
+    gemini_client = GeminiClient(
+        api_key=GEMINI_API_KEY,
+        model=GEMINI_MODEL,
+        base_url=GEMINI_BASE_URL,
+        max_connections=GEMINI_MAX_CONNECTIONS,
+        max_concurrency=GEMINI_MAX_CONCURRENCY,
+        timeout=GEMINI_TIMEOUT_SECONDS,
+        max_retries=GEMINI_MAX_RETRIES
+    )
+    startup = asyncio.create_task(initialize_services())
+    
+    yield
+    
+    service_state["ready"] = False
+    startup.cancel()
+    await gemini_client.aclose()
+    retrieval_executor.shutdown(wait=False)
+    lexical_executor.shutdown(wait=False)
+
+def require_admin(token: Optional[str]):
+    """Reject admin requests without the configured ADMIN_TOKEN"""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled; set ADMIN_TOKEN to enable them")
+    if not token or not secrets.compare_digest(token, ADMIN_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid or missing X-Admin-Token")
+
+def require_ready():
+    """Reject requests until the indexes and encoder are loaded"""
+    if not service_state["ready"]:
+        detail = service_state["error"] or "Service is starting up, please retry shortly"
+        raise HTTPException(status_code=503, detail=detail)
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Tata Motors Competitive Intelligence API",
     description="AI-powered competitive analysis for Tata Harrier & Safari",
-    version="2.0.0"
+    version="2.0.0",
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -39,37 +270,25 @@ app.add_middleware(
     allow_headers=["*"],            # Allow all headers
 )
 
-# Configuration
-PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
-TATA_INDEX_NAME = "tata-motors-sentiment"
-COMPETITOR_INDEX_NAME = "competitors-sentiment"
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-GEMINI_MODEL = "gemini-2.0-flash-exp"
-GEMINI_ENDPOINT = f"https://generativelanguage.googleapis.com/v1beta/models/{GEMINI_MODEL}:generateContent?key={GEMINI_API_KEY}"
-HEADERS = {"Content-Type": "application/json"}
-
-# Competitor mapping
-COMPETITOR_MAPPING = {
-    "safari": ["Mahindra XUV700", "Hyundai Alcazar", "MG Hector Plus"],
-    "harrier": ["Jeep Compass", "MG Hector", "Hyundai Tucson"],
-}
 
-# Validate API keys
-if not PINECONE_API_KEY:
-    raise ValueError("PINECONE_API_KEY not found in .env file")
-if not GEMINI_API_KEY:
-    raise ValueError("GEMINI_API_KEY not found in .env file")
+# Cache and intent-parser ratios are read from their own counters at scrape time
+def cache_lookup_counts() -> Dict:
+    counts = {}
+    for name, cache in (("embedding", embedding_cache), ("intent", intent_cache),
+                        ("response", response_cache)):
+        counts[(name, "hit")] = cache.hits
+        counts[(name, "miss")] = cache.misses
+    return counts
 
-# Initialize services
-try:
-    pc = Pinecone(api_key=PINECONE_API_KEY)
-    tata_index = pc.Index(TATA_INDEX_NAME)
-    competitor_index = pc.Index(COMPETITOR_INDEX_NAME)
-    embedding_model = SentenceTransformer("all-MiniLM-L6-v2")
-    logger.info("Successfully initialized all services")
-except Exception as e:
-    logger.error(f"Initialization error: {e}")
-    raise
+REGISTRY.register(CallbackCounter(
+    "cache_lookups_total", "Lookups in the in-process caches", ("cache", "result"), cache_lookup_counts))
+REGISTRY.register(CallbackGauge(
+    "cache_hit_ratio", "Hit ratio of the in-process caches", ("cache",),
+    lambda: {(name,): cache.stats()["hit_rate"] for name, cache in
+             (("embedding", embedding_cache), ("intent", intent_cache), ("response", response_cache))}))
+REGISTRY.register(CallbackGauge(
+    "intent_llm_skip_ratio", "Share of intent parses answered by the local rules", (),
+    lambda: {(): intent_parser.stats()["llm_skip_rate"]}))
 
 # ========== Pydantic Models ==========
 
@@ -83,6 +302,7 @@ class FeedbackItem(BaseModel):
     sentiment: str
     score: float
     brand: Optional[str] = None
+    duplicates: int = 0  # near-identical posts collapsed into this one at ingest
 
 class SentimentStats(BaseModel):
     positive: int
@@ -93,11 +313,17 @@ class SentimentStats(BaseModel):
     negative_pct: float
     neutral_pct: float
 
+class PopulationStats(SentimentStats):
+    """Exact stats over every indexed post in scope, from the sentiment cube"""
+    mean_score: Optional[float] = None
+    scope: Dict
+
 class CompetitorAnalysis(BaseModel):
     name: str
     feedback_count: int
     sentiment_stats: SentimentStats
     sample_feedback: List[FeedbackItem]
+    population_stats: Optional[PopulationStats] = None
 
 class AnalysisResponse(BaseModel):
     success: bool
@@ -107,8 +333,9 @@ class AnalysisResponse(BaseModel):
     
     # Tata data
     tata_feedback_count: int
-    tata_sentiment_stats: SentimentStats
+    tata_sentiment_stats: SentimentStats  # over the retrieved sample
     tata_sample_feedback: List[FeedbackItem]
+    tata_population_stats: Optional[PopulationStats] = None  # over the whole corpus
     
     # Competitor data
     competitor_analysis: List[CompetitorAnalysis]
@@ -126,47 +353,90 @@ class HealthResponse(BaseModel):
     competitor_index: Dict
     available_vehicles: List[str]
     competitor_mapping: Dict
+    embedding_cache: Dict
+    intent_parser: Dict
+    response_cache: Dict
 
 # ========== Helper Functions ==========
 
-def call_gemini(prompt: str, max_tokens: int = 200, temperature: float = 0.7) -> Optional[str]:
+async def call_gemini(prompt: str, max_tokens: int = 200, temperature: float = 0.7) -> Optional[str]:
     """Call Gemini API with error handling"""
-    payload = {
-        "contents": [{"parts": [{"text": prompt}]}],
-        "generationConfig": {
-            "maxOutputTokens": max_tokens,
-            "temperature": temperature
-        }
-    }
-    
     try:
-        response = requests.post(GEMINI_ENDPOINT, headers=HEADERS, json=payload, timeout=30)
-        response.raise_for_status()
-        response_json = response.json()
-        
-        if "candidates" not in response_json:
-            logger.error(f"No candidates in response: {response_json}")
-            return None
-            
-        return response_json["candidates"][0]["content"]["parts"][0]["text"].strip()
-        
+        return await gemini_client.generate(prompt, max_tokens=max_tokens, temperature=temperature)
     except Exception as e:
         logger.error(f"Gemini API error: {e}")
         return None
 
+def sse_event(event: str, data) -> str:
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+def time_left(deadline: float) -> float:
+    """Seconds until the request deadline (event loop time)"""
+    return max(deadline - asyncio.get_running_loop().time(), 0)
+
+async def run_blocking(deadline: float, func, *args, **kwargs):
+    """Run a blocking call on the retrieval pool without stalling the event loop.
+    
+    Raises asyncio.TimeoutError once the request deadline (loop time) has passed.
+    """
+    loop = asyncio.get_running_loop()
+    # Carry the request context (id, stage timings) into the worker thread
+    context = contextvars.copy_context()
+    future = loop.run_in_executor(retrieval_executor, functools.partial(context.run, func, *args, **kwargs))
+    return await asyncio.wait_for(future, timeout=time_left(deadline))
+
 def clean_json_response(text: str) -> str:
     """Clean markdown from JSON response"""
     text = text.strip()
-    if text.startswith("json"):
+    if text.startswith("```json"):
         text = text[7:]
-    elif text.startswith(""):
+    elif text.startswith("```"):
         text = text[3:]
     if text.endswith("```"):
         text = text[:-3]
     return text.strip()
 
-def identify_vehicle_and_competitors(user_query: str) -> Dict:
-    """Identify which Tata vehicle and competitors to analyze"""
+def default_query_info(user_query: str) -> Dict:
+    """Fallback intent when neither the rules nor Gemini produce one"""
+    return {
+        "tata_vehicle": "safari",
+        "competitors": COMPETITOR_MAPPING["safari"],
+        "embedding_query": user_query,
+        "filter": {}
+    }
+
+async def identify_vehicle_and_competitors(user_query: str) -> Dict:
+    """Identify which Tata vehicle and competitors to analyze
+    
+    Tries the local rule-based parser first and only asks Gemini about
+    ambiguous queries. Successful parses are cached per normalized query.
+    """
+    with stage("intent"):
+        key = normalize_query(user_query)
+        cached = intent_cache.get(key)
+        if cached is not None:
+            INTENT_SOURCE_TOTAL.inc(source="cache")
+            return copy.deepcopy(cached)
+        
+        result = intent_parser.parse(user_query)
+        if result is None:
+            logger.info("Query is ambiguous for the rule parser, asking Gemini")
+            result = await identify_with_gemini(user_query)
+            if result is None:
+                # Don't cache transient Gemini failures
+                INTENT_SOURCE_TOTAL.inc(source="default")
+                return default_query_info(user_query)
+            INTENT_SOURCE_TOTAL.inc(source="llm")
+        else:
+            INTENT_SOURCE_TOTAL.inc(source="rules")
+            logger.info(f"Identified by rules: {result['tata_vehicle']}, Competitors: {result['competitors']}")
+        
+        intent_cache.set(key, result)
+        return copy.deepcopy(result)
+
+async def identify_with_gemini(user_query: str) -> Optional[Dict]:
+    """Ask Gemini which Tata vehicle and competitors to analyze"""
     prompt = f"""
 You are analyzing a query about Tata Motors vehicles. Only respond about Tata Harrier or Tata Safari.
 
@@ -193,15 +463,10 @@ Return ONLY valid JSON.
 Example: {{"tata_vehicle": "safari", "competitors": ["Mahindra XUV700", "Hyundai Alcazar", "MG Hector Plus"], "embedding_query": "safari vehicle feedback", "filter": {{}}}}
 """
     
-    output_text = call_gemini(prompt, max_tokens=200, temperature=0.3)
+    output_text = await call_gemini(prompt, max_tokens=200, temperature=0.3)
     
     if not output_text:
-        return {
-            "tata_vehicle": "safari",
-            "competitors": COMPETITOR_MAPPING["safari"],
-            "embedding_query": user_query,
-            "filter": {}
-        }
+        return None
     
     try:
         cleaned_text = clean_json_response(output_text)
@@ -213,6 +478,8 @@ Example: {{"tata_vehicle": "safari", "competitors": ["Mahindra XUV700", "Hyundai
         
         if not result.get("competitors"):
             result["competitors"] = COMPETITOR_MAPPING[vehicle]
+        result.setdefault("embedding_query", user_query)
+        result.setdefault("filter", {})
         
         result["tata_vehicle"] = vehicle
         logger.info(f"Identified: {vehicle}, Competitors: {result['competitors']}")
@@ -220,44 +487,99 @@ Example: {{"tata_vehicle": "safari", "competitors": ["Mahindra XUV700", "Hyundai
         
     except json.JSONDecodeError as e:
         logger.error(f"Failed to parse JSON: {e}")
-        return {
-            "tata_vehicle": "safari",
-            "competitors": COMPETITOR_MAPPING["safari"],
-            "embedding_query": user_query,
-            "filter": {}
-        }
+        return None
+
+def embed_query(query_text: str) -> List[float]:
+    """Encode a query, reusing cached embeddings for repeated questions"""
+    with stage("embedding"):
+        key = normalize_query(query_text)
+        embedding = embedding_cache.get(key)
+        if embedding is None:
+            embedding = embedding_model.encode(query_text).tolist()
+            embedding_cache.set(key, embedding)
+        return embedding
+
+def submit_lexical(lexical: Optional[BM25Index], method: str, *args,
+                   stage_name: str, **kwargs) -> Optional[Future]:
+    """Start a BM25 search next to the vector query (None when hybrid search is off)"""
+    if lexical is None or lexical_executor is None:
+        return None
+    
+    def search():
+        with stage(f"{stage_name}_lexical"):
+            return getattr(lexical, method)(*args, **kwargs)
+    
+    return lexical_executor.submit(contextvars.copy_context().run, search)
+
+def lexical_result(pending: Optional[Future], started: float, stage_name: str):
+    """BM25 matches if they arrived within LEXICAL_BUDGET_MS of `started`, else None"""
+    if pending is None:
+        return None
+    try:
+        remaining = LEXICAL_BUDGET_MS / 1000 - (time.perf_counter() - started)
+        return pending.result(timeout=max(remaining, 0))
+    except FutureTimeoutError:
+        pending.cancel()
+        LEXICAL_TIMEOUT_TOTAL.inc(index=stage_name)
+        logger.info(f"Lexical search over budget ({LEXICAL_BUDGET_MS:g} ms), using vector matches only")
+    except Exception as e:
+        logger.error(f"Lexical search error: {e}")
+    return None
+
+def hybrid_query(index, lexical: Optional[BM25Index], query_text: str, query_embedding: List[float],
+                 filters: Dict, top_k: int, stage_name: str) -> List[Dict]:
+    """Vector query fused (RRF) with a BM25 search run in parallel"""
+    started = time.perf_counter()
+    pending = submit_lexical(lexical, "search", query_text, top_k=top_k,
+                             filter=filters if filters else None, stage_name=stage_name)
+    
+    results = index.query(
+        vector=query_embedding,
+        top_k=top_k,
+        include_metadata=True,
+        filter=filters if filters else None
+    )
+    matches = results.get("matches", [])
+    
+    lexical_matches = lexical_result(pending, started, stage_name)
+    return matches if lexical_matches is None else fuse(matches, lexical_matches, top_k)
+
+def filter_matches_nothing(index, filters: Dict) -> bool:
+    """True when the local index's metadata bitmaps show no record matches the filters
+    
+    Pinecone has no cheap count, so its empty filters cost one (empty) query.
+    """
+    return bool(filters) and hasattr(index, "count") and index.count(filters) == 0
 
 def query_index(index, query_text: str, filters: Dict, top_k: int = 10, 
-                brand_filter: Optional[str] = None) -> List[Dict]:
-    """Query Pinecone index with embeddings and filters"""
+                brand_filter: Optional[str] = None,
+                query_embedding: Optional[List[float]] = None,
+                stage_name: str = "index_query",
+                lexical: Optional[BM25Index] = None) -> List[Dict]:
+    """Query the vector index (Pinecone or local) with embeddings and filters
+    
+    With a lexical index the vector matches are fused with BM25 matches for
+    the same query and filters. A filter that matches no records returns no
+    matches; the query is not repeated without it.
+    """
     try:
-        if 'location' in filters and filters['location']:
-            if ", India" not in filters['location']:
-                city_name = filters['location'].title()
-                filters['location'] = f"{city_name}, India"
+        normalize_location_filter(filters)
         
         if brand_filter:
             filters['brand'] = brand_filter
         
-        query_embedding = embedding_model.encode(query_text).tolist()
-        
-        results = index.query(
-            vector=query_embedding,
-            top_k=top_k,
-            include_metadata=True,
-            filter=filters if filters else None
-        )
+        if query_embedding is None:
+            query_embedding = embed_query(query_text)
         
-        matches = results.get("matches", [])
+        with stage(stage_name):
+            if filter_matches_nothing(index, filters):
+                matches = []
+            else:
+                matches = hybrid_query(index, lexical, query_text, query_embedding, filters, top_k, stage_name)
         
         if len(matches) == 0 and filters:
-            logger.info("No results with filters, trying without")
-            results = index.query(
-                vector=query_embedding,
-                top_k=top_k,
-                include_metadata=True
-            )
-            matches = results.get("matches", [])
+            logger.info(f"No records match the filters {filters}")
+            INDEX_EMPTY_FILTER_TOTAL.inc(index=stage_name)
         
         return matches
         
@@ -265,6 +587,110 @@ def query_index(index, query_text: str, filters: Dict, top_k: int = 10,
         logger.error(f"Index query error: {e}")
         return []
 
+def normalize_location_filter(filters: Dict):
+    """Locations are stored as "City, India" """
+    if 'location' in filters and filters['location']:
+        if ", India" not in filters['location']:
+            city_name = filters['location'].title()
+            filters['location'] = f"{city_name}, India"
+
+def search_by_brand(index, query_embedding: List[float], filters: Dict,
+                    brands: List[str], top_k: int) -> Dict[str, List[Dict]]:
+    """One index search returning the top_k matches for each brand
+    
+    The local index searches its brand partitions directly; Pinecone gets a
+    single $in filter with an over-fetched top_k that is split per brand.
+    """
+    brand_filter = {**filters, "brand": {"$in": list(brands)}}
+    
+    if hasattr(index, "query_grouped"):
+        return index.query_grouped(vector=query_embedding, groups=brands, top_k=top_k,
+                                   group_field="brand", include_metadata=True, filter=brand_filter)
+    
+    results = index.query(
+        vector=query_embedding,
+        top_k=min(top_k * len(brands) * COMPETITOR_OVERFETCH, PINECONE_MAX_TOP_K),
+        include_metadata=True,
+        filter=brand_filter
+    )
+    
+    grouped = {brand: [] for brand in brands}
+    for match in results.get("matches", []):
+        brand = match.get("metadata", {}).get("brand")
+        if brand in grouped and len(grouped[brand]) < top_k:
+            grouped[brand].append(match)
+    return grouped
+
+def hybrid_by_brand(index, lexical: Optional[BM25Index], query_text: str, query_embedding: List[float],
+                    filters: Dict, brands: List[str], top_k: int) -> Dict[str, List[Dict]]:
+    """search_by_brand fused (RRF) per brand with a grouped BM25 search run in parallel"""
+    started = time.perf_counter()
+    pending = submit_lexical(lexical, "search_grouped", query_text, brands, top_k=top_k, group_field="brand",
+                             filter=filters if filters else None, stage_name="competitor_query")
+    
+    grouped = search_by_brand(index, query_embedding, filters, brands, top_k)
+    
+    lexical_grouped = lexical_result(pending, started, "competitor_query")
+    if lexical_grouped is None:
+        return grouped
+    return {brand: fuse(grouped.get(brand, []), lexical_grouped.get(brand, []), top_k) for brand in brands}
+
+def query_competitors(index, query_text: str, filters: Dict, brands: List[str], top_k: int = 10,
+                      query_embedding: Optional[List[float]] = None,
+                      lexical: Optional[BM25Index] = None) -> Dict[str, List[Dict]]:
+    """Query every competitor brand in one round trip"""
+    if not brands:
+        return {}
+    try:
+        normalize_location_filter(filters)
+        
+        if query_embedding is None:
+            query_embedding = embed_query(query_text)
+        
+        with stage("competitor_query"):
+            grouped = {brand: [] for brand in brands}
+            searchable = [brand for brand in brands
+                          if not filter_matches_nothing(index, {**filters, "brand": brand})]
+            if searchable:
+                grouped.update(hybrid_by_brand(index, lexical, query_text, query_embedding,
+                                               filters, searchable, top_k))
+        
+        missing = [brand for brand in brands if not grouped.get(brand)]
+        if missing and filters:
+            logger.info(f"No records match the filters {filters} for {missing}")
+            INDEX_EMPTY_FILTER_TOTAL.inc(len(missing), index="competitor_query")
+        
+        return grouped
+        
+    except Exception as e:
+        logger.error(f"Competitor query error: {e}")
+        return {brand: [] for brand in brands}
+
+def file_version(path: str) -> Optional[tuple]:
+    """Modification time and size of a file (None if it does not exist)"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+def index_fingerprint() -> tuple:
+    """Upload manifests and vector counts of both indexes; a change means the data was re-uploaded
+    
+    The manifest is rewritten by every sync that upserts or deletes, so in-place
+    content updates are caught even though they leave the vector counts unchanged.
+    """
+    fingerprint = fingerprint_cache.get("indexes")
+    if fingerprint is None:
+        fingerprint = (
+            file_version(TATA_MANIFEST_PATH),
+            file_version(COMPETITOR_MANIFEST_PATH),
+            tata_index.describe_index_stats().get("total_vector_count", 0),
+            competitor_index.describe_index_stats().get("total_vector_count", 0)
+        )
+        fingerprint_cache.set("indexes", fingerprint)
+    return fingerprint
+
 def calculate_sentiment_stats(matches: List[Dict]) -> SentimentStats:
     """Calculate sentiment distribution"""
     stats = {"positive": 0, "negative": 0, "neutral": 0, "total": len(matches)}
@@ -284,6 +710,23 @@ def calculate_sentiment_stats(matches: List[Dict]) -> SentimentStats:
     
     return SentimentStats(**stats)
 
+def population_stats(brand: str, filters: Dict) -> Optional[PopulationStats]:
+    """Exact sentiment stats for a brand (and the query's city) from the sentiment cube
+    
+    The sentiment filter is not applied: the point is the full label distribution.
+    """
+    if sentiment_cube is None:
+        return None
+    
+    scope = {"brand": brand}
+    location = filters.get("location")
+    if isinstance(location, dict):
+        location = location.get("$eq")
+    if isinstance(location, str):
+        scope["city"] = location.split(",")[0].strip()
+    
+    return PopulationStats(**sentiment_cube.stats(**scope), scope=scope)
+
 def extract_feedback_items(matches: List[Dict], brand: str = None) -> List[FeedbackItem]:
     """Extract feedback items from matches"""
     feedback_list = []
@@ -295,15 +738,26 @@ def extract_feedback_items(matches: List[Dict], brand: str = None) -> List[Feedb
             location=metadata.get("location", "Unknown"),
             sentiment=metadata.get("sentiment_label", "neutral"),
             score=round(match.get("score", 0), 4),
-            brand=brand or metadata.get("brand", "Unknown")
+            brand=brand or metadata.get("brand", "Unknown"),
+            duplicates=int(metadata.get("duplicate_count") or 0)
         ))
     
     return feedback_list
 
-def generate_comparative_analysis(user_query: str, tata_vehicle: str, 
-                                  tata_matches: List[Dict], 
-                                  competitor_data: Dict) -> str:
-    """Generate comprehensive analysis using Gemini"""
+def build_competitor_analysis(competitor: str, comp_matches: List[Dict], filters: Dict) -> CompetitorAnalysis:
+    """Summarize one competitor's matches"""
+    return CompetitorAnalysis(
+        name=competitor,
+        feedback_count=len(comp_matches),
+        sentiment_stats=calculate_sentiment_stats(comp_matches),
+        sample_feedback=extract_feedback_items(comp_matches[:3], competitor),
+        population_stats=population_stats(competitor, filters)
+    )
+
+def build_analysis_prompt(user_query: str, tata_vehicle: str, 
+                          tata_matches: List[Dict], 
+                          competitor_data: Dict) -> str:
+    """Build the comparative analysis prompt for Gemini"""
     
     tata_posts = [m["metadata"].get("content", "") for m in tata_matches[:5]]
     tata_stats = calculate_sentiment_stats(tata_matches)
@@ -370,12 +824,41 @@ Provide a comprehensive analysis with these sections:
 Keep the tone professional, data-driven, and focused on driving sales growth. Use bullet points for clarity.
 Total length: 300-400 words.
 """
-    
-    output = call_gemini(analysis_prompt, max_tokens=800, temperature=0.7)
-    return output if output else "Failed to generate analysis. Please try again."
+    return analysis_prompt
+
+async def generate_comparative_analysis(user_query: str, tata_vehicle: str, 
+                                  tata_matches: List[Dict], 
+                                  competitor_data: Dict) -> str:
+    """Generate comprehensive analysis using Gemini"""
+    analysis_prompt = build_analysis_prompt(user_query, tata_vehicle, tata_matches, competitor_data)
+    with stage("analysis"):
+        output = await call_gemini(analysis_prompt, max_tokens=800, temperature=0.7)
+    return output if output else ANALYSIS_FAILED_MESSAGE
 
 # ========== API Endpoints ==========
 
+@app.middleware("http")
+async def observe_requests(request: Request, call_next):
+    """Assign a request id, time the request and optionally add Server-Timing"""
+    request_id = request.headers.get("X-Request-ID") or uuid.uuid4().hex[:16]
+    timings = start_request(request_id)
+    started = time.perf_counter()
+    
+    response = await call_next(request)
+    
+    elapsed = time.perf_counter() - started
+    route = request.scope.get("route")
+    HTTP_REQUEST_SECONDS.observe(
+        elapsed,
+        method=request.method,
+        path=route.path if route else "unmatched",
+        status=response.status_code
+    )
+    response.headers["X-Request-ID"] = request_id
+    if SERVER_TIMING:
+        response.headers["Server-Timing"] = server_timing_header(timings, elapsed)
+    return response
+
 @app.get("/")
 async def root():
     """Root endpoint with API information"""
@@ -386,7 +869,13 @@ async def root():
         "documentation": "/docs",
         "endpoints": {
             "health": "GET /health",
-            "analyze": "POST /api/analyze"
+            "ready": "GET /ready",
+            "analyze": "POST /api/analyze",
+            "analyze_stream": "POST /api/analyze/stream",
+            "sentiment_stats": "GET /api/sentiment/stats",
+            "sentiment_trends": "GET /api/sentiment/trends",
+            "metrics": "GET /metrics",
+            "invalidate_cache": "POST /api/cache/invalidate"
         }
     }
 
@@ -397,6 +886,7 @@ async def health_check():
     
     Returns status of both indexes and available vehicles
     """
+    require_ready()
     try:
         tata_stats = tata_index.describe_index_stats()
         competitor_stats = competitor_index.describe_index_stats()
@@ -405,20 +895,82 @@ async def health_check():
             status="healthy",
             tata_index={
                 "name": TATA_INDEX_NAME,
+                "backend": VECTOR_BACKEND,
                 "vectors": tata_stats.get('total_vector_count', 0)
             },
             competitor_index={
                 "name": COMPETITOR_INDEX_NAME,
+                "backend": VECTOR_BACKEND,
                 "vectors": competitor_stats.get('total_vector_count', 0)
             },
             available_vehicles=["safari", "harrier"],
-            competitor_mapping=COMPETITOR_MAPPING
+            competitor_mapping=COMPETITOR_MAPPING,
+            embedding_cache=embedding_cache.stats(),
+            intent_parser={**intent_parser.stats(), "cache": intent_cache.stats()},
+            response_cache=response_cache.stats()
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Health check failed: {str(e)}")
 
+async def resolve_query(user_query: str, deadline: float):
+    """Resolve the query intent and its embedding (shared by every index lookup)"""
+    query_info = await asyncio.wait_for(identify_vehicle_and_competitors(user_query),
+                                        timeout=time_left(deadline))
+    query_info.setdefault("filter", {})
+    query_embedding = await run_blocking(deadline, embed_query, query_info["embedding_query"])
+    return query_info, query_embedding
+
+async def lookup_cached_response(query_embedding: List[float], cache_context, deadline: float):
+    """Semantic response cache lookup, invalidated when the indexes change"""
+    with stage("response_cache"):
+        response_cache.validate(await run_blocking(deadline, index_fingerprint))
+        return response_cache.lookup(query_embedding, cache_context)
+
+async def lookup_tata(query_info: Dict, query_embedding: List[float], top_k: int,
+                      deadline: float) -> List[Dict]:
+    return await run_blocking(
+        deadline, query_index, tata_index, query_info["embedding_query"],
+        query_info["filter"].copy(), top_k=top_k, query_embedding=query_embedding,
+        stage_name="tata_query", lexical=tata_lexical
+    )
+
+async def lookup_competitors(query_info: Dict, query_embedding: List[float],
+                             top_k: int, deadline: float) -> Dict[str, List[Dict]]:
+    return await run_blocking(
+        deadline,
+        query_competitors,
+        competitor_index, 
+        query_info["embedding_query"], 
+        query_info["filter"].copy(), 
+        query_info["competitors"],
+        top_k=top_k,
+        query_embedding=query_embedding,
+        lexical=competitor_lexical
+    )
+
+def no_results_response(user_query: str, tata_vehicle: str, filters: Dict) -> AnalysisResponse:
+    return AnalysisResponse(
+        success=False,
+        query=user_query,
+        tata_vehicle=tata_vehicle,
+        competitors_analyzed=[],
+        tata_feedback_count=0,
+        tata_sentiment_stats=SentimentStats(
+            positive=0, negative=0, neutral=0, total=0,
+            positive_pct=0.0, negative_pct=0.0, neutral_pct=0.0
+        ),
+        tata_sample_feedback=[],
+        tata_population_stats=population_stats(f"Tata {tata_vehicle.title()}", filters),
+        competitor_analysis=[],
+        comprehensive_analysis=(NO_FILTER_MATCHES_MESSAGE.format(
+            vehicle=tata_vehicle.title(), filters=", ".join(f"{k}={v}" for k, v in filters.items())
+        ) if filters else NO_RESULTS_MESSAGE),
+        filters_applied=filters,
+        error="No results found"
+    )
+
 @app.post("/api/analyze", response_model=AnalysisResponse)
-async def analyze_query(request: QueryRequest):
+async def analyze_query(request: QueryRequest, response: Response):
     """
     Comprehensive competitive analysis endpoint
     
@@ -455,7 +1007,12 @@ async def analyze_query(request: QueryRequest):
         - Comprehensive AI-generated comparative analysis
         - Sample feedback from both Tata and competitors
         - Actionable recommendations for sales growth
+    
+    Near-identical questions (same resolved vehicle and filters, similar
+    query embedding) are served from the response cache; the X-Cache
+    response header is HIT or MISS.
     """
+    require_ready()
     try:
         user_query = request.query.strip()
         
@@ -464,76 +1021,60 @@ async def analyze_query(request: QueryRequest):
         
         logger.info(f"Processing query: {user_query}")
         
-        # Step 1: Identify vehicle and competitors
-        query_info = identify_vehicle_and_competitors(user_query)
+        deadline = asyncio.get_running_loop().time() + ANALYZE_DEADLINE_SECONDS
+        
+        # Step 1: Identify vehicle and competitors, encode the query
+        query_info, query_embedding = await resolve_query(user_query, deadline)
         tata_vehicle = query_info["tata_vehicle"]
         competitors = query_info["competitors"]
-        embedding_query = query_info["embedding_query"]
-        filters = query_info.get("filter", {})
+        filters = query_info["filter"]
         
-        # Step 2: Query Tata data
-        logger.info(f"Querying Tata {tata_vehicle} data...")
-        tata_matches = query_index(tata_index, embedding_query, filters.copy(), 
-                                   top_k=request.top_k)
+        # Serve near-identical questions from the semantic response cache
+        cache_context = make_context_key(tata_vehicle, competitors, filters, request.top_k)
+        cached_response = await lookup_cached_response(query_embedding, cache_context, deadline)
+        response.headers["X-Cache"] = "HIT" if cached_response is not None else "MISS"
+        if cached_response is not None:
+            logger.info("Serving analysis from response cache")
+            return cached_response.model_copy(update={"query": user_query})
+        
+        # Steps 2 & 3: Query Tata and competitor data concurrently
+        logger.info(f"Querying Tata {tata_vehicle} and {len(competitors)} competitors...")
+        tata_matches, competitor_results = await asyncio.gather(
+            lookup_tata(query_info, query_embedding, request.top_k, deadline),
+            lookup_competitors(query_info, query_embedding, request.top_k, deadline)
+        )
         
         if not tata_matches:
-            return AnalysisResponse(
-                success=False,
-                query=user_query,
-                tata_vehicle=tata_vehicle,
-                competitors_analyzed=[],
-                tata_feedback_count=0,
-                tata_sentiment_stats=SentimentStats(
-                    positive=0, negative=0, neutral=0, total=0,
-                    positive_pct=0.0, negative_pct=0.0, neutral_pct=0.0
-                ),
-                tata_sample_feedback=[],
-                competitor_analysis=[],
-                comprehensive_analysis="No relevant feedback found for Tata vehicles. Please try rephrasing your query.",
-                filters_applied=filters,
-                error="No results found"
-            )
+            return no_results_response(user_query, tata_vehicle, filters)
         
         # Extract Tata data
         tata_sentiment_stats = calculate_sentiment_stats(tata_matches)
         tata_feedback_items = extract_feedback_items(tata_matches[:5], f"Tata {tata_vehicle.title()}")
+        tata_population_stats = population_stats(f"Tata {tata_vehicle.title()}", filters)
         
-        # Step 3: Query competitor data
-        logger.info("Querying competitor data...")
+        # Collect competitor data
         competitor_data = {}
         competitor_analyses = []
         
         for competitor in competitors:
-            comp_matches = query_index(
-                competitor_index, 
-                embedding_query, 
-                filters.copy(), 
-                top_k=request.top_k,
-                brand_filter=competitor
-            )
-            
+            comp_matches = competitor_results.get(competitor)
             if comp_matches:
                 competitor_data[competitor] = comp_matches
-                comp_sentiment_stats = calculate_sentiment_stats(comp_matches)
-                comp_feedback_items = extract_feedback_items(comp_matches[:3], competitor)
-                
-                competitor_analyses.append(CompetitorAnalysis(
-                    name=competitor,
-                    feedback_count=len(comp_matches),
-                    sentiment_stats=comp_sentiment_stats,
-                    sample_feedback=comp_feedback_items
-                ))
+                competitor_analyses.append(build_competitor_analysis(competitor, comp_matches, filters))
         
         # Step 4: Generate comprehensive analysis
         logger.info("Generating AI analysis...")
-        comprehensive_analysis = generate_comparative_analysis(
-            user_query, 
-            tata_vehicle, 
-            tata_matches, 
-            competitor_data
+        comprehensive_analysis = await asyncio.wait_for(
+            generate_comparative_analysis(
+                user_query, 
+                tata_vehicle, 
+                tata_matches, 
+                competitor_data
+            ),
+            timeout=time_left(deadline)
         )
         
-        return AnalysisResponse(
+        analysis_response = AnalysisResponse(
             success=True,
             query=user_query,
             tata_vehicle=tata_vehicle,
@@ -541,17 +1082,254 @@ async def analyze_query(request: QueryRequest):
             tata_feedback_count=len(tata_matches),
             tata_sentiment_stats=tata_sentiment_stats,
             tata_sample_feedback=tata_feedback_items,
+            tata_population_stats=tata_population_stats,
             competitor_analysis=competitor_analyses,
             comprehensive_analysis=comprehensive_analysis,
             filters_applied=filters
         )
+        if comprehensive_analysis != ANALYSIS_FAILED_MESSAGE:
+            response_cache.store(query_embedding, cache_context, analysis_response)
+        return analysis_response
         
     except HTTPException:
         raise
+    except asyncio.TimeoutError:
+        logger.error(f"Analysis deadline of {ANALYZE_DEADLINE_SECONDS}s exceeded")
+        raise HTTPException(status_code=504, detail="Analysis timed out. Please try again.")
     except Exception as e:
         logger.error(f"Analysis error: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
+@app.post("/api/analyze/stream")
+async def analyze_query_stream(request: QueryRequest):
+    """
+    Streaming variant of /api/analyze (Server-Sent Events)
+    
+    Same request body as /api/analyze. Events, in order:
+        - intent: resolved vehicle, competitors and filters
+        - tata: Tata feedback count, sampled and population sentiment stats and sample feedback
+        - competitor: one CompetitorAnalysis per competitor
+        - analysis: {"text": ...} chunks of the Gemini analysis as they are generated
+        - done: the complete AnalysisResponse (plus "cache": HIT or MISS)
+        - error: {"detail": ...} if the request fails part-way
+    """
+    require_ready()
+    user_query = request.query.strip()
+    
+    if not user_query:
+        raise HTTPException(status_code=400, detail="Query cannot be empty")
+    
+    return StreamingResponse(
+        stream_analysis(user_query, request.top_k),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def stream_analysis(user_query: str, top_k: int):
+    """Produce the SSE events for /api/analyze/stream"""
+    try:
+        logger.info(f"Streaming query: {user_query}")
+        deadline = asyncio.get_running_loop().time() + ANALYZE_DEADLINE_SECONDS
+        
+        query_info, query_embedding = await resolve_query(user_query, deadline)
+        tata_vehicle = query_info["tata_vehicle"]
+        competitors = query_info["competitors"]
+        filters = query_info["filter"]
+        yield sse_event("intent", {
+            "tata_vehicle": tata_vehicle,
+            "competitors": competitors,
+            "filters": filters
+        })
+        
+        cache_context = make_context_key(tata_vehicle, competitors, filters, top_k)
+        cached_response = await lookup_cached_response(query_embedding, cache_context, deadline)
+        if cached_response is not None:
+            cached_response = cached_response.model_copy(update={"query": user_query})
+            yield sse_event("tata", {
+                "feedback_count": cached_response.tata_feedback_count,
+                "sentiment_stats": cached_response.tata_sentiment_stats.model_dump(),
+                "population_stats": (cached_response.tata_population_stats.model_dump()
+                                     if cached_response.tata_population_stats else None),
+                "sample_feedback": [item.model_dump() for item in cached_response.tata_sample_feedback]
+            })
+            for analysis in cached_response.competitor_analysis:
+                yield sse_event("competitor", analysis.model_dump())
+            yield sse_event("analysis", {"text": cached_response.comprehensive_analysis})
+            yield sse_event("done", {**cached_response.model_dump(), "cache": "HIT"})
+            return
+        
+        # Start both lookups at once; report Tata first, then the competitors
+        tata_lookup = asyncio.ensure_future(lookup_tata(query_info, query_embedding, top_k, deadline))
+        competitor_lookup = asyncio.ensure_future(lookup_competitors(query_info, query_embedding, top_k, deadline))
+        
+        try:
+            tata_matches = await tata_lookup
+            if not tata_matches:
+                no_results = no_results_response(user_query, tata_vehicle, filters)
+                yield sse_event("done", {**no_results.model_dump(), "cache": "MISS"})
+                return
+            
+            tata_sentiment_stats = calculate_sentiment_stats(tata_matches)
+            tata_feedback_items = extract_feedback_items(tata_matches[:5], f"Tata {tata_vehicle.title()}")
+            tata_population_stats = population_stats(f"Tata {tata_vehicle.title()}", filters)
+            yield sse_event("tata", {
+                "feedback_count": len(tata_matches),
+                "sentiment_stats": tata_sentiment_stats.model_dump(),
+                "population_stats": tata_population_stats.model_dump() if tata_population_stats else None,
+                "sample_feedback": [item.model_dump() for item in tata_feedback_items]
+            })
+            
+            competitor_results = await competitor_lookup
+            competitor_data = {}
+            for competitor in competitors:
+                comp_matches = competitor_results.get(competitor)
+                if comp_matches:
+                    competitor_data[competitor] = comp_matches
+                    analysis = build_competitor_analysis(competitor, comp_matches, filters)
+                    yield sse_event("competitor", analysis.model_dump())
+        finally:
+            tata_lookup.cancel()
+            competitor_lookup.cancel()
+        
+        analysis_prompt = build_analysis_prompt(user_query, tata_vehicle, tata_matches, competitor_data)
+        chunks = []
+        stream_started = time.perf_counter()
+        stream = gemini_client.stream(analysis_prompt, max_tokens=800, temperature=0.7)
+        try:
+            while True:
+                # Bound every wait on the next chunk, so a stream stalled mid-response hits the deadline
+                try:
+                    chunk = await asyncio.wait_for(stream.__anext__(), timeout=time_left(deadline))
+                except StopAsyncIteration:
+                    break
+                if not chunks:
+                    STAGE_SECONDS.observe(time.perf_counter() - stream_started, stage="analysis_first_token")
+                chunks.append(chunk)
+                yield sse_event("analysis", {"text": chunk})
+            STAGE_SECONDS.observe(time.perf_counter() - stream_started, stage="analysis")
+        except GeminiError as e:
+            logger.error(f"Gemini streaming error: {e}")
+            if not chunks:
+                chunks.append(ANALYSIS_FAILED_MESSAGE)
+                yield sse_event("analysis", {"text": ANALYSIS_FAILED_MESSAGE})
+        finally:
+            await stream.aclose()
+        
+        comprehensive_analysis = "".join(chunks).strip()
+        analysis_response = AnalysisResponse(
+            success=True,
+            query=user_query,
+            tata_vehicle=tata_vehicle,
+            competitors_analyzed=list(competitor_data.keys()),
+            tata_feedback_count=len(tata_matches),
+            tata_sentiment_stats=tata_sentiment_stats,
+            tata_sample_feedback=tata_feedback_items,
+            tata_population_stats=tata_population_stats,
+            competitor_analysis=[build_competitor_analysis(c, m, filters) for c, m in competitor_data.items()],
+            comprehensive_analysis=comprehensive_analysis,
+            filters_applied=filters
+        )
+        if comprehensive_analysis != ANALYSIS_FAILED_MESSAGE:
+            response_cache.store(query_embedding, cache_context, analysis_response)
+        yield sse_event("done", {**analysis_response.model_dump(), "cache": "MISS"})
+        
+    except asyncio.TimeoutError:
+        logger.error(f"Streaming analysis deadline of {ANALYZE_DEADLINE_SECONDS}s exceeded")
+        yield sse_event("error", {"detail": "Analysis timed out. Please try again."})
+    except Exception as e:
+        logger.error(f"Streaming analysis error: {e}", exc_info=True)
+        yield sse_event("error", {"detail": f"Internal server error: {str(e)}"})
+
+@app.get("/ready")
+async def readiness():
+    """Readiness probe: 200 once the indexes are loaded and the encoder is warm, else 503"""
+    status_code = 200 if service_state["ready"] else 503
+    return Response(
+        content=json.dumps({**service_state, "embedding_backend": EMBEDDING_BACKEND}),
+        status_code=status_code,
+        media_type="application/json"
+    )
+
+@app.get("/api/sentiment/stats")
+async def get_sentiment_stats(brand: str = ALL, city: str = ALL, aspect: str = ALL, intent: str = ALL,
+                              month: str = ALL, group_by: Optional[str] = None):
+    """
+    Exact sentiment stats over the whole corpus, from the precomputed sentiment cube
+    
+    Query parameters (each defaults to "*", i.e. every value):
+        - brand: e.g. "Tata Safari", "Mahindra XUV700"
+        - city, aspect, intent, month ("YYYY-MM")
+        - group_by: one of brand, city, aspect, intent, month to get the stats per value
+    
+    No vector query is made; a single slice is one lookup.
+    """
+    require_ready()
+    if sentiment_cube is None:
+        raise HTTPException(status_code=503, detail="Sentiment cube not loaded; build it with sentiment_cube.py")
+    
+    scope = {"brand": brand, "city": city, "aspect": aspect, "intent": intent, "month": month}
+    if group_by is None:
+        return {"documents": sentiment_cube.documents, "scope": scope, "stats": sentiment_cube.stats(**scope)}
+    if group_by not in DIMENSIONS:
+        raise HTTPException(status_code=400, detail=f"group_by must be one of {', '.join(DIMENSIONS)}")
+    return {"documents": sentiment_cube.documents, "scope": scope, "group_by": group_by,
+            "groups": sentiment_cube.group_by(group_by, **{k: v for k, v in scope.items() if k != group_by})}
+
+@app.get("/api/sentiment/trends")
+async def get_sentiment_trends(brand: List[str] = Query(default=[]), vehicle: Optional[str] = None,
+                               granularity: str = "month", start: Optional[date] = None,
+                               end: Optional[date] = None):
+    """
+    Per-brand sentiment time series
+    
+    Query parameters:
+        - brand: brand name, repeatable (e.g. brand=Tata Harrier&brand=Jeep Compass)
+        - vehicle: "safari" or "harrier" adds the Tata vehicle and its mapped competitors
+        - granularity: day, week or month (default: month)
+        - start / end: YYYY-MM-DD (default: each brand's first and last post)
+    
+    Each point has the period's label counts, positive share and mean score,
+    plus rolling_7d / rolling_30d mean scores ending on the period's last day.
+    """
+    require_ready()
+    if sentiment_trends is None:
+        raise HTTPException(status_code=503, detail="Sentiment trends not loaded; build them with sentiment_trends.py")
+    if granularity not in GRANULARITIES:
+        raise HTTPException(status_code=400, detail=f"granularity must be one of {', '.join(GRANULARITIES)}")
+    
+    brands = list(brand)
+    if vehicle:
+        if vehicle.lower() not in COMPETITOR_MAPPING:
+            raise HTTPException(status_code=400, detail=f"vehicle must be one of {', '.join(COMPETITOR_MAPPING)}")
+        brands += [f"Tata {vehicle.title()}", *COMPETITOR_MAPPING[vehicle.lower()]]
+    if not brands:
+        raise HTTPException(status_code=400, detail="Pass at least one brand or a vehicle")
+    
+    # Every brand's series covers the same span, so the points line up
+    brands = list(dict.fromkeys(brands))
+    span = sentiment_trends.date_range(brands)
+    if span:
+        start, end = start or span[0], end or span[1]
+    return {
+        "granularity": granularity,
+        "start": start,
+        "end": end,
+        "series": {name: sentiment_trends.series(name, granularity, start, end) for name in brands}
+    }
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus metrics: stage latencies, Gemini usage, empty filters and cache hit rates"""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+@app.post("/api/cache/invalidate")
+async def invalidate_cache(x_admin_token: Optional[str] = Header(None)):
+    """Drop cached analyses, e.g. after re-uploading the indexes (requires X-Admin-Token)"""
+    require_admin(x_admin_token)
+    response_cache.invalidate()
+    fingerprint_cache.clear()
+    return {"success": True, "response_cache": response_cache.stats()}
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
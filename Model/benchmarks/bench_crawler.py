@@ -0,0 +1,83 @@
+"""
+Offline crawl benchmark: TataDataPipeline against the local Reddit/YouTube stub.
+
+Runs the Reddit and YouTube collection once per worker count (1 = the old
+sequential crawl, without its fixed sleeps) and reports wall time, records
+collected, the speedup over one worker, and the rate limiter statistics,
+including how often the stub's server-side limits answered 429.
+
+Usage (from Model/):
+    python benchmarks/bench_crawler.py --workers 1 8 --latency-ms 150
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+import uvicorn
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def start_stub(port: int) -> uvicorn.Server:
+    import crawl_stub
+    server = uvicorn.Server(uvicorn.Config(crawl_stub.app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def crawl(args, workers: int):
+    from web_scrapping import TataDataPipeline
+
+    url = f"http://127.0.0.1:{args.port}"
+    pipeline = TataDataPipeline(
+        "stub-id", "stub-secret", "stub-key",
+        max_workers=workers,
+        reddit_requests_per_minute=args.reddit_rpm,
+        youtube_requests_per_second=args.youtube_rps,
+        reddit_options={"oauth_url": url, "reddit_url": url},
+        youtube_options={"client_options": {"api_endpoint": url}, "static_discovery": True},
+    )
+    start = time.perf_counter()
+    reddit = pipeline.collect_reddit_posts([f"sub{i}" for i in range(args.subreddits)],
+                                           ["tata harrier", "tata safari"], days_back=3650, limit=50)
+    youtube = pipeline.collect_youtube_comments([f"search {i}" for i in range(args.searches)],
+                                                max_videos=args.videos, max_comments=20)
+    return time.perf_counter() - start, len(reddit) + len(youtube), pipeline.rate_limit_stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 8])
+    parser.add_argument("--subreddits", type=int, default=6)
+    parser.add_argument("--searches", type=int, default=4)
+    parser.add_argument("--videos", type=int, default=10)
+    parser.add_argument("--latency-ms", type=float, default=150)
+    parser.add_argument("--reddit-rpm", type=float, default=600, help="Client-side Reddit limit (requests/min)")
+    parser.add_argument("--youtube-rps", type=float, default=30, help="Client-side YouTube limit (requests/s)")
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+
+    os.environ["STUB_LATENCY_MS"] = str(args.latency_ms)
+    server = start_stub(args.port)
+    try:
+        baseline = None
+        for workers in args.workers:
+            elapsed, records, limits = crawl(args, workers)
+            baseline = baseline or elapsed
+            print(f"workers={workers:<3d} {elapsed:7.2f}s  {records} records  "
+                  f"speedup x{baseline / elapsed:.1f}")
+            for name, stats in limits.items():
+                print(f"    {name:14s} {stats}")
+        import crawl_stub
+        print(f"stub stats: {crawl_stub.stats}")
+    finally:
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
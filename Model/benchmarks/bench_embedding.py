@@ -0,0 +1,118 @@
+"""
+Compare query-encoder backends (torch float32, int8 dynamic quantization, ONNX).
+
+Loads each backend, measures load time, single-query latency percentiles and
+batch throughput on posts sampled from the Frontend/public datasets, and
+checks how closely the embeddings agree with the float32 reference (cosine
+similarity and top-10 neighbour overlap on the sample).
+
+Usage (from Model/):
+    python benchmarks/bench_embedding.py --backends torch int8 onnx --queries 200
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from embedding_backend import BACKENDS, load_query_encoder, warmup  # noqa: E402
+
+DEFAULT_DATA = [
+    os.path.join("..", "Frontend", "public", "tata_sentiment_dataset_20251003_170406.json"),
+    os.path.join("..", "Frontend", "public", "competitor_sentiment_dataset_20251003_173637.json"),
+]
+
+
+def load_sentences(paths, limit: int, seed: int = 0):
+    sentences = []
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        for doc in data.get("documents", data if isinstance(data, list) else []):
+            text = doc.get("clean_content") or doc.get("content")
+            if text:
+                sentences.append(text[:500])
+    if not sentences:
+        raise SystemExit("No sentences found; pass --data with a JSON dataset")
+    rng = np.random.default_rng(seed)
+    return [sentences[i] for i in rng.permutation(len(sentences))[:limit]]
+
+
+def normalize(matrix: np.ndarray) -> np.ndarray:
+    return matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+
+
+def bench(backend: str, sentences, batch_size: int):
+    start = time.perf_counter()
+    encoder = load_query_encoder(backend)
+    load_seconds = time.perf_counter() - start
+    warmup(encoder)
+
+    latencies = []
+    for text in sentences:
+        start = time.perf_counter()
+        encoder.encode(text)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    embeddings = encoder.encode(sentences, batch_size=batch_size)
+    throughput = len(sentences) / (time.perf_counter() - start)
+
+    lat = np.asarray(latencies)
+    return {
+        "load_s": load_seconds,
+        "p50": np.percentile(lat, 50),
+        "p95": np.percentile(lat, 95),
+        "throughput": throughput,
+        "embeddings": normalize(np.asarray(embeddings, dtype=np.float32)),
+    }
+
+
+def neighbour_overlap(reference: np.ndarray, candidate: np.ndarray, k: int = 10) -> float:
+    """Mean overlap of each sentence's top-k neighbours under both encoders"""
+    k = min(k, len(reference) - 1)
+    ref_top = np.argsort(-(reference @ reference.T), axis=1)[:, 1:k + 1]
+    cand_top = np.argsort(-(candidate @ candidate.T), axis=1)[:, 1:k + 1]
+    return float(np.mean([len(set(a) & set(b)) / k for a, b in zip(ref_top, cand_top)]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=BACKENDS)
+    parser.add_argument("--data", nargs="+", default=DEFAULT_DATA)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=32)
+    args = parser.parse_args()
+
+    sentences = load_sentences(args.data, args.queries)
+    print(f"{len(sentences)} sentences\n")
+
+    results = {}
+    for backend in args.backends:
+        try:
+            results[backend] = bench(backend, sentences, args.batch_size)
+        except Exception as e:
+            print(f"{backend:6s} unavailable: {e}")
+
+    reference = results.get("torch")
+    print(f"{'backend':8s} {'load s':>7s} {'p50 ms':>7s} {'p95 ms':>7s} {'sent/s':>8s} {'cosine':>7s} {'top10':>6s}")
+    for backend, r in results.items():
+        if reference is not None:
+            cosine = float(np.mean(np.sum(reference["embeddings"] * r["embeddings"], axis=1)))
+            overlap = neighbour_overlap(reference["embeddings"], r["embeddings"])
+            agreement = f"{cosine:7.4f} {overlap:6.2f}"
+        else:
+            agreement = f"{'-':>7s} {'-':>6s}"
+        print(f"{backend:8s} {r['load_s']:7.2f} {r['p50']:7.2f} {r['p95']:7.2f} "
+              f"{r['throughput']:8.1f} {agreement}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Offline load test of GeminiClient against the local Gemini stub.
+
+Starts gemini_stub on a local port, fires concurrent requests drawn from a
+small pool of prompts (so identical prompts overlap in flight), and reports
+latency percentiles, throughput and how many upstream calls were coalesced.
+
+Usage (from Model/):
+    python benchmarks/bench_gemini_client.py --requests 500 --concurrency 50 --distinct 20
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+import uvicorn
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import gemini_stub  # noqa: E402
+from gemini_client import GeminiClient, GeminiError  # noqa: E402
+
+
+def start_stub(port: int) -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(gemini_stub.app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+async def run(args):
+    client = GeminiClient(
+        api_key="stub",
+        model="stub-model",
+        base_url=f"http://127.0.0.1:{args.port}/v1beta",
+        max_connections=args.max_connections,
+        max_concurrency=args.max_concurrency,
+        backoff_base=0.05,
+    )
+    prompts = [f"Question {i} about Tata Safari" for i in range(args.distinct)]
+    limiter = asyncio.Semaphore(args.concurrency)
+    latencies, failures = [], 0
+
+    async def one(i):
+        nonlocal failures
+        async with limiter:
+            start = time.perf_counter()
+            try:
+                await client.generate(prompts[i % len(prompts)])
+            except GeminiError:
+                failures += 1
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(args.requests)))
+    elapsed = time.perf_counter() - start
+    await client.aclose()
+
+    lat = np.asarray(latencies)
+    print(f"requests:        {args.requests} ({failures} failed)")
+    print(f"throughput:      {args.requests / elapsed:.1f} req/s")
+    print(f"latency p50/p95/p99: {np.percentile(lat, 50):.0f} / {np.percentile(lat, 95):.0f} / "
+          f"{np.percentile(lat, 99):.0f} ms")
+    print(f"client stats:    {client.stats()}")
+    print(f"stub stats:      {gemini_stub.stats}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--distinct", type=int, default=20, help="Number of distinct prompts")
+    parser.add_argument("--max-connections", type=int, default=20)
+    parser.add_argument("--max-concurrency", type=int, default=8)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    server = start_stub(args.port)
+    try:
+        asyncio.run(run(args))
+    finally:
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
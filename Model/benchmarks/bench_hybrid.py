@@ -0,0 +1,145 @@
+"""
+Retrieval quality of vector-only, BM25-only and hybrid (RRF) search on a
+small labeled query set drawn from the Frontend/public datasets.
+
+Each query names a concrete thing (a feature, a part, a rating body, a city)
+and is phrased the way analysts ask. A post counts as relevant when its
+cleaned text matches the query's term rule below, i.e. it talks about the
+named thing. Reports recall@k (relevant posts in the top k, out of
+min(k, #relevant)), MRR and per-query latency for each retrieval mode.
+
+The posts are embedded with the configured query encoder, so run it with
+the real MiniLM model: vector-only numbers from a substitute encoder say
+nothing about the gain.
+
+Usage (from Model/):
+    python benchmarks/bench_hybrid.py
+    python benchmarks/bench_hybrid.py --backend int8 --top-k 20
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from corpus_store import iter_documents  # noqa: E402
+from embedding_backend import EMBEDDING_MODEL_NAME, embedding_text, load_query_encoder  # noqa: E402
+from lexical_index import BM25Index, fuse  # noqa: E402
+from vector_store import LocalIndex, build_metadata, vector_id  # noqa: E402
+
+DEFAULT_DATA = [
+    os.path.join("..", "Frontend", "public", "tata_sentiment_dataset_20251003_170406.json"),
+    os.path.join("..", "Frontend", "public", "competitor_sentiment_dataset_20251003_173637.json"),
+]
+
+# (query, relevance rule: every pattern must match the post's cleaned text)
+LABELED_QUERIES = [
+    ("Problems with the panoramic sunroof", [r"sunroof"]),
+    ("How do people rate the gearbox?", [r"gearbox"]),
+    ("Does the ADAS work well on Indian roads?", [r"\badas\b"]),
+    ("What safety rating did it get in NCAP crash tests?", [r"ncap"]),
+    ("Complaints about the service center", [r"service (center|centre)"]),
+    ("What do owners in Pune say?", [r"\bpune\b"]),
+    ("Is the infotainment laggy?", [r"infotainment"]),
+    ("How long is the waiting period for delivery?", [r"waiting period"]),
+    ("How is the ground clearance?", [r"ground clearance"]),
+    ("Any clutch problems?", [r"clutch"]),
+    ("Resale value after a few years", [r"resale"]),
+    ("How many airbags does it have?", [r"airbag"]),
+    ("Are the brakes good?", [r"brake"]),
+    ("Is the 360 camera useful?", [r"360"]),
+    ("Ventilated seats in summer", [r"ventilated"]),
+    ("Rust problems on the body", [r"\brust"]),
+    ("What does the warranty cover?", [r"warranty"]),
+    ("How much boot space is there?", [r"boot space"]),
+    ("Is the third row usable for adults?", [r"third row|3rd row"]),
+    ("How good is the build quality?", [r"build quality"]),
+]
+
+
+def load_corpus(paths):
+    ids, texts, metadata, seen = [], [], [], set()
+    for path in paths:
+        for doc in iter_documents(path):
+            doc_id = vector_id(doc)
+            if doc_id in seen:
+                continue
+            seen.add(doc_id)
+            ids.append(doc_id)
+            texts.append(embedding_text(doc))
+            metadata.append(build_metadata(doc))
+    return ids, texts, metadata
+
+
+def relevant_ids(ids, texts, patterns):
+    rules = [re.compile(p) for p in patterns]
+    return {doc_id for doc_id, text in zip(ids, texts) if all(rule.search(text) for rule in rules)}
+
+
+def evaluate(search, labeled, top_k):
+    recalls, reciprocal_ranks, latencies = [], [], []
+    for query, vector, relevant in labeled:
+        start = time.perf_counter()
+        matches = search(query, vector)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+        ranked = [m["id"] for m in matches[:top_k]]
+        recalls.append(len(relevant.intersection(ranked)) / min(top_k, len(relevant)))
+        first = next((rank for rank, doc_id in enumerate(ranked, 1) if doc_id in relevant), None)
+        reciprocal_ranks.append(1 / first if first else 0.0)
+    return np.mean(recalls), np.mean(reciprocal_ranks), np.percentile(latencies, 50), recalls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", nargs="+", default=DEFAULT_DATA, help="Dataset JSON/JSONL files")
+    parser.add_argument("--backend", default="torch", help="Encoder backend (torch, int8, onnx)")
+    parser.add_argument("--model", default=EMBEDDING_MODEL_NAME)
+    parser.add_argument("--top-k", type=int, default=10)
+    args = parser.parse_args()
+
+    ids, texts, metadata = load_corpus(args.data)
+    encoder = load_query_encoder(args.backend, args.model)
+
+    start = time.perf_counter()
+    vectors = np.asarray(encoder.encode(texts, batch_size=256), dtype=np.float32)
+    vector_index = LocalIndex(ids, vectors, metadata, index_type="exact")
+    print(f"Corpus: {len(ids)} posts embedded in {time.perf_counter() - start:.1f}s ({args.model}, {args.backend})")
+    start = time.perf_counter()
+    lexical = BM25Index.build(ids, texts, metadata)
+    print(f"BM25 index: {len(lexical.terms)} terms built in {(time.perf_counter() - start) * 1000:.0f} ms\n")
+
+    labeled = []
+    for query, patterns in LABELED_QUERIES:
+        relevant = relevant_ids(ids, texts, patterns)
+        if relevant:
+            labeled.append((query, np.asarray(encoder.encode(query), dtype=np.float32), relevant))
+
+    top_k = args.top_k
+    modes = {
+        "vector": lambda q, v: vector_index.query(v, top_k=top_k)["matches"],
+        "bm25": lambda q, v: lexical.search(q, top_k=top_k),
+        "hybrid (RRF)": lambda q, v: fuse(vector_index.query(v, top_k=top_k)["matches"],
+                                          lexical.search(q, top_k=top_k), top_k),
+    }
+
+    print(f"{len(labeled)} labeled queries, top_k={top_k}\n")
+    print(f"{'mode':<16}{f'recall@{top_k}':>11}{'MRR':>8}{'p50 ms':>9}")
+    per_query = {}
+    for name, search in modes.items():
+        recall, mrr, p50, per_query[name] = evaluate(search, labeled, top_k)
+        print(f"{name:<16}{recall:>11.3f}{mrr:>8.3f}{p50:>9.2f}")
+
+    print(f"\n{'query':<52}{'relevant':>9}{'vector':>8}{'bm25':>7}{'hybrid':>8}")
+    for i, (query, _, relevant) in enumerate(labeled):
+        print(f"{query[:50]:<52}{len(relevant):>9}{per_query['vector'][i]:>8.2f}"
+              f"{per_query['bm25'][i]:>7.2f}{per_query['hybrid (RRF)'][i]:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Near-duplicate detection at growing corpus sizes: MinHash/LSH throughput
+against pairwise shingle comparison, and recall of planted duplicates.
+
+The corpus is built from the long posts of the Frontend/public datasets
+(with their own near-duplicates removed): originals are those posts and, once
+they are used up, splices of the first half of one post and the second half
+of another; --copy-rate of the records are edited copies of an earlier
+original (a word dropped, replaced or appended, like re-posted comments).
+Pairwise comparison is only timed up to --brute-force-max records.
+
+Usage (from Model/):
+    python benchmarks/bench_near_duplicates.py
+    python benchmarks/bench_near_duplicates.py --sizes 5000 20000 80000 --copy-rate 0.3
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from near_duplicates import NearDuplicateIndex, record_text, shingles  # noqa: E402
+
+DEFAULT_DATA = [
+    os.path.join("..", "Frontend", "public", "tata_sentiment_dataset_20251003_170406.json"),
+    os.path.join("..", "Frontend", "public", "competitor_sentiment_dataset_20251003_173637.json"),
+]
+
+
+def load_texts(paths):
+    texts = set()
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            texts.update(record_text(doc) for doc in json.load(f)["documents"])
+    # Long posts only, so a one-word edit keeps the copy above the threshold
+    index = NearDuplicateIndex()
+    return [text for i, text in enumerate(sorted(texts))
+            if len(text.split()) >= 40 and index.add(str(i), text) is None]
+
+
+def edit(text, rng):
+    words = text.split()
+    i = rng.randrange(len(words))
+    kind = rng.choice(("drop", "replace", "append"))
+    if kind == "drop":
+        del words[i]
+    elif kind == "replace":
+        words[i] = rng.choice(("great", "bad", "car", "tata", "bro"))
+    else:
+        words.append(rng.choice(("👍", "+1", "same here", "true")))
+    return " ".join(words)
+
+
+def build_corpus(texts, size, copy_rate, rng):
+    """(id, text, original id or None) rows: originals with planted copies"""
+    rows, originals = [], []
+    while len(rows) < size:
+        if originals and rng.random() < copy_rate:
+            original_id, text = rng.choice(originals)
+            rows.append((f"doc{len(rows)}", edit(text, rng), original_id))
+        else:
+            if len(originals) < len(texts):
+                text = texts[len(originals)]
+            else:
+                first, second = rng.sample(texts, 2)
+                first, second = first.split(), second.split()
+                text = " ".join(first[:len(first) // 2] + second[len(second) // 2:])
+            originals.append((f"doc{len(rows)}", text))
+            rows.append((f"doc{len(rows)}", text, None))
+    return rows
+
+
+def lsh(rows):
+    index = NearDuplicateIndex()
+    start = time.perf_counter()
+    found = {doc_id: index.add(doc_id, text) for doc_id, text, _ in rows}
+    return time.perf_counter() - start, found
+
+
+def brute_force(rows, threshold=0.8):
+    start = time.perf_counter()
+    canonical = []
+    for _, text, _ in rows:
+        words = shingles(text)
+        if not any(len(words & other) / len(words | other) >= threshold for other in canonical):
+            canonical.append(words)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", nargs="+", default=DEFAULT_DATA)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[2000, 8000, 32000])
+    parser.add_argument("--copy-rate", type=float, default=0.2)
+    parser.add_argument("--brute-force-max", type=int, default=8000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    texts = load_texts(args.data)
+    print(f"{len(texts)} distinct posts of 40+ words as originals, copy rate {args.copy_rate}\n")
+    print(f"{'records':>8}{'planted':>9}{'recall':>8}{'false +':>9}{'lsh rec/s':>11}{'pairwise rec/s':>16}")
+
+    for size in args.sizes:
+        rows = build_corpus(texts, size, args.copy_rate, random.Random(args.seed))
+        seconds, found = lsh(rows)
+        planted = [row for row in rows if row[2]]
+        recall = sum(1 for doc_id, _, _ in planted if found[doc_id]) / max(len(planted), 1)
+        false_positives = sum(1 for doc_id, _, original in rows if found[doc_id] and not original)
+
+        pairwise = "-"
+        if size <= args.brute_force_max:
+            pairwise = f"{size / brute_force(rows):.0f}"
+        print(f"{size:>8}{len(planted):>9}{recall:>8.3f}{false_positives:>9}{size / seconds:>11.0f}{pairwise:>16}")
+
+
+if __name__ == "__main__":
+    main()
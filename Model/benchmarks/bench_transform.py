@@ -0,0 +1,73 @@
+"""
+Transform stage throughput: TataDataPipeline.iter_transformed (VADER sentiment,
+aspects, vehicle model) in the main process vs across a process pool.
+
+The documents in Frontend/public are turned back into raw posts and run
+through each worker count; the output of every parallel run is checked
+against the in-process one (same records, same order).
+
+Usage (from Model/):
+    python benchmarks/bench_transform.py --workers 1 2 4 8 --repeat 2
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from web_scrapping import TataDataPipeline  # noqa: E402
+
+DEFAULT_DATA = [
+    os.path.join("..", "Frontend", "public", "tata_sentiment_dataset_20251003_170406.json"),
+    os.path.join("..", "Frontend", "public", "competitor_sentiment_dataset_20251003_173637.json"),
+]
+
+
+def load_raw_posts(paths, repeat):
+    posts = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            documents = json.load(f).get("documents", [])
+        for doc in documents:
+            posts.append({
+                "platform": doc.get("platform"),
+                "source": "benchmark",
+                "post_id": doc.get("source_id"),
+                "username": doc.get("username"),
+                "content": doc.get("content") or "",
+                "timestamp": doc.get("timestamp"),
+            })
+    return posts * repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", nargs="+", default=DEFAULT_DATA)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1])
+    parser.add_argument("--repeat", type=int, default=1, help="Copies of the dataset to run through")
+    parser.add_argument("--chunk-size", type=int, default=200)
+    args = parser.parse_args()
+
+    pipeline = TataDataPipeline("-", "-", "-")
+    posts = load_raw_posts(args.data, args.repeat)
+    print(f"{len(posts)} posts, {os.cpu_count()} CPUs\n")
+
+    start = time.perf_counter()
+    expected = list(pipeline.iter_transformed(posts, workers=1))
+    baseline = len(posts) / (time.perf_counter() - start)
+
+    print(f"{'workers':>8s} {'posts/s':>10s} {'speedup':>8s} {'identical':>10s}")
+    print(f"{1:8d} {baseline:10.0f} {1.0:8.2f} {'yes':>10s}")
+    for workers in sorted(set(args.workers) - {1}):
+        # Includes process start-up, as a pipeline run would
+        start = time.perf_counter()
+        result = list(pipeline.iter_transformed(posts, workers=workers, chunk_size=args.chunk_size))
+        rate = len(posts) / (time.perf_counter() - start)
+        print(f"{workers:8d} {rate:10.0f} {rate / baseline:8.2f} {'yes' if result == expected else 'NO':>10s}")
+
+
+if __name__ == "__main__":
+    main()
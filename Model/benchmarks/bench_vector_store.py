@@ -0,0 +1,100 @@
+"""
+Recall and latency of the local IVF index against exact (brute-force) search,
+unfiltered and with metadata filters of decreasing selectivity (brand: 1/4
+of the corpus, city: 1/100, brand + city: 1/400, and a filter matching nothing).
+
+Usage (from Model/):
+    python benchmarks/bench_vector_store.py --data tata_data_embedded.jsonl
+    python benchmarks/bench_vector_store.py --synthetic 100000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vector_store import LocalIndex, iter_embedded_records  # noqa: E402
+
+
+def load_corpus(args):
+    if args.data:
+        vectors = [post["embedding"] for post in iter_embedded_records(args.data)]
+        vectors = np.asarray(vectors, dtype=np.float32)
+    else:
+        # Clustered synthetic data: closer to real embeddings than uniform noise
+        rng = np.random.default_rng(args.seed)
+        centers = rng.normal(size=(256, args.dim)).astype(np.float32)
+        labels = rng.integers(0, len(centers), args.synthetic)
+        vectors = centers[labels] + 1.5 * rng.normal(size=(args.synthetic, args.dim)).astype(np.float32)
+
+    ids = [str(i) for i in range(len(vectors))]
+    metadata = [{"brand": f"brand-{i % 4}", "location": f"city-{i // 4 % 100}"} for i in range(len(vectors))]
+    return ids, vectors, metadata
+
+
+def run_queries(index, queries, top_k, filter=None):
+    latencies, results = [], []
+    for q in queries:
+        start = time.perf_counter()
+        response = index.query(vector=q, top_k=top_k, filter=filter)
+        latencies.append((time.perf_counter() - start) * 1000)
+        results.append({m["id"] for m in response["matches"]})
+    return np.asarray(latencies), results
+
+
+def recall(truth, approx):
+    hits = sum(len(t & a) for t, a in zip(truth, approx))
+    total = sum(len(t) for t in truth)
+    return hits / total if total else 1.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", help="Embedded JSONL file to index")
+    parser.add_argument("--synthetic", type=int, default=50_000, help="Synthetic corpus size if --data is not given")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    ids, vectors, metadata = load_corpus(args)
+    rng = np.random.default_rng(args.seed + 1)
+    sample = rng.choice(len(vectors), min(args.queries, len(vectors)), replace=False)
+    queries = vectors[sample] + 0.1 * rng.normal(size=(len(sample), vectors.shape[1])).astype(np.float32)
+
+    print(f"Corpus: {len(vectors)} vectors x {vectors.shape[1]} dims, {len(queries)} queries, top_k={args.top_k}\n")
+
+    start = time.perf_counter()
+    exact = LocalIndex(ids, vectors, metadata, index_type="exact")
+    print(f"exact build: {time.perf_counter() - start:.2f}s")
+    start = time.perf_counter()
+    ivf = LocalIndex(ids, vectors, metadata, index_type="ivf")
+    print(f"ivf build:   {time.perf_counter() - start:.2f}s ({len(ivf.centroids)} lists)\n")
+
+    print(f"{'mode':<22}{'filter':<12}{'recall':>8}{'p50 ms':>10}{'p95 ms':>10}")
+    filters = {
+        "none": None,
+        "brand": {"brand": "brand-1"},
+        "city": {"location": "city-7"},
+        "brand+city": {"brand": "brand-1", "location": "city-7"},
+        "empty": {"location": "city-none"},
+    }
+    for label, filter in filters.items():
+        exact_lat, truth = run_queries(exact, queries, args.top_k, filter)
+        print(f"{'exact':<22}{label:<12}{1.0:>8.3f}{np.percentile(exact_lat, 50):>10.2f}"
+              f"{np.percentile(exact_lat, 95):>10.2f}")
+        for nprobe in args.nprobe:
+            ivf.nprobe = nprobe
+            lat, approx = run_queries(ivf, queries, args.top_k, filter)
+            print(f"{f'ivf nprobe={nprobe}':<22}{label:<12}{recall(truth, approx):>8.3f}"
+                  f"{np.percentile(lat, 50):>10.2f}{np.percentile(lat, 95):>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,449 @@
+"""
+Offline end-to-end load test of the API and the crawl pipeline.
+
+Everything external is replaced by a local stand-in, each in its own process:
+
+- Gemini: gemini_stub (--gemini-latency-ms, --gemini-tokens-per-second)
+- vector index: VECTOR_BACKEND=local, seeded once by embedding the
+  Frontend/public datasets with the real encoder (kept in --work-dir)
+- Reddit / YouTube: crawl_stub (--crawl-latency-ms)
+
+Scenarios:
+
+- analyze: the real app (app:app under uvicorn) is started with that
+  configuration and POST /api/analyze is driven at --concurrency
+- crawl: TataDataPipeline.run_pipeline collects, transforms and saves a crawl
+  from the stub; latencies are per Reddit/YouTube API call
+
+Each scenario reports p50/p95/p99 latency, requests (or records) per second
+and the peak RSS of the process under test. Results are written as JSON with
+the git commit, so runs of different commits can be compared.
+
+Usage (from Model/):
+    python benchmarks/loadtest.py --out results/main.json
+    python benchmarks/loadtest.py --scenario analyze --requests 500 --concurrency 32 \\
+        --env EMBEDDING_BACKEND=int8 --out results/int8.json --compare results/main.json
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import platform
+import queue
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import httpx
+import numpy as np
+
+MODEL_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, MODEL_DIR)
+
+DEFAULT_DATA = {
+    "tata_data_embedded.jsonl": os.path.join(MODEL_DIR, "..", "Frontend", "public",
+                                             "tata_sentiment_dataset_20251003_170406.json"),
+    "competitor_data_embedding.jsonl": os.path.join(MODEL_DIR, "..", "Frontend", "public",
+                                                    "competitor_sentiment_dataset_20251003_173637.json"),
+}
+SCENARIOS = ("analyze", "crawl")
+
+TATA_VEHICLES = ["Safari", "Harrier", "Nexon", "Punch"]
+COMPETITORS = ["XUV700", "Alcazar", "Hector Plus", "Creta", "Scorpio N"]
+CITIES = ["Pune", "Mumbai", "Delhi", "Bangalore", "Chennai", "Hyderabad"]
+TEMPLATES = [
+    "How is the Tata {tata} doing vs the {competitor} in {city}?",
+    "negative feedback on {tata} service in {city}",
+    "compare {tata} and {competitor} mileage",
+    "what do owners in {city} like about the {competitor}?",
+]
+
+
+# ========== Helpers ==========
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of the calling process"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def percentiles(latencies_ms) -> dict:
+    if not latencies_ms:
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None}
+    lat = np.asarray(latencies_ms)
+    return {f"p{p}_ms": round(float(np.percentile(lat, p)), 1) for p in (50, 95, 99)}
+
+
+def git_revision() -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=MODEL_DIR,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=MODEL_DIR,
+                               capture_output=True, text=True, check=True).stdout.strip()
+        return {"commit": commit, "dirty": bool(dirty)}
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+
+
+def make_queries(distinct: int) -> list:
+    queries = []
+    for i in range(distinct):
+        template = TEMPLATES[i % len(TEMPLATES)]
+        queries.append(template.format(tata=TATA_VEHICLES[i % len(TATA_VEHICLES)],
+                                       competitor=COMPETITORS[(i // 2) % len(COMPETITORS)],
+                                       city=CITIES[(i // 3) % len(CITIES)]))
+    return queries
+
+
+# ========== Local index seed ==========
+
+def seed_index(work_dir: str, backend: str, reseed: bool = False) -> dict:
+    """Embed the sample datasets into the JSONL files the local vector backend loads"""
+    from embedding_backend import embedding_text
+    from embedding_backend import load_query_encoder
+
+    paths = {name: os.path.join(work_dir, name) for name in DEFAULT_DATA}
+    if not reseed and all(os.path.exists(p) for p in paths.values()):
+        return paths
+
+    print(f"🌱 Seeding local index in {work_dir} ({backend} encoder)...")
+    encoder = load_query_encoder(backend)
+    for name, source in DEFAULT_DATA.items():
+        with open(source, "r", encoding="utf-8") as f:
+            documents = json.load(f)["documents"]
+        vectors = encoder.encode([embedding_text(doc) for doc in documents], batch_size=256)
+        tmp = paths[name] + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            for doc, vector in zip(documents, vectors):
+                f.write(json.dumps({**doc, "embedding": [round(float(x), 6) for x in vector]},
+                                   ensure_ascii=False) + "\n")
+        os.replace(tmp, paths[name])
+        print(f"   {len(documents)} documents -> {paths[name]}")
+    return paths
+
+
+# ========== Processes ==========
+
+def _redirect_output(log_path: str):
+    """Send a child process's stdout/stderr (prints and logging) to a file"""
+    log = os.open(log_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    os.dup2(log, 1)
+    os.dup2(log, 2)
+
+
+def _serve(module: str, port: int, env: dict, log_path: str, stop, results):
+    """Child process: serve module:app until `stop` is set, then report peak RSS"""
+    _redirect_output(log_path)
+    os.environ.update(env)
+    os.chdir(MODEL_DIR)
+    import importlib
+    import threading
+    import uvicorn
+
+    app = importlib.import_module(module).app
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+
+    def watch():
+        stop.wait()
+        server.should_exit = True
+
+    threading.Thread(target=watch, daemon=True).start()
+    server.run()
+    results.put({"module": module, "peak_rss_mb": peak_rss_mb()})
+
+
+class Service:
+    """A module:app served by uvicorn in a spawned process, logging to <work_dir>/<module>.log"""
+
+    def __init__(self, module: str, env: dict, work_dir: str):
+        self.module = module
+        self.port = free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        self.log_path = os.path.join(work_dir, module + ".log")
+        ctx = multiprocessing.get_context("spawn")
+        self._stop = ctx.Event()
+        self._results = ctx.Queue()
+        self._process = ctx.Process(target=_serve, daemon=True,
+                                    args=(module, self.port, env, self.log_path, self._stop, self._results))
+
+    def start(self, ready_path: str = "/docs", timeout: float = 600) -> float:
+        """Start and wait until ready_path answers 200; returns the seconds it took"""
+        started = time.perf_counter()
+        self._process.start()
+        while time.perf_counter() - started < timeout:
+            if not self._process.is_alive():
+                raise RuntimeError(f"{self.module} exited during start-up, see {self.log_path}")
+            try:
+                if httpx.get(self.url + ready_path, timeout=1).status_code == 200:
+                    return time.perf_counter() - started
+            except httpx.TransportError:
+                pass
+            time.sleep(0.1)
+        raise TimeoutError(f"{self.module} not ready after {timeout}s, see {self.log_path}")
+
+    def stop(self) -> dict:
+        """Graceful shutdown; returns what the process reported (peak RSS)"""
+        self._stop.set()
+        try:
+            return self._results.get(timeout=30)
+        except queue.Empty:
+            return {"module": self.module, "peak_rss_mb": None}
+        finally:
+            self._process.join(5)
+            if self._process.is_alive():
+                self._process.kill()
+
+
+# ========== Scenarios ==========
+
+async def drive(url: str, queries: list, requests: int, concurrency: int, timeout: float) -> dict:
+    limiter = asyncio.Semaphore(concurrency)
+    latencies, statuses = [], {}
+
+    async with httpx.AsyncClient(base_url=url, timeout=timeout,
+                                 limits=httpx.Limits(max_connections=concurrency)) as client:
+        async def one(i):
+            async with limiter:
+                start = time.perf_counter()
+                try:
+                    response = await client.post("/api/analyze", json={"query": queries[i % len(queries)]})
+                    status = str(response.status_code)
+                except httpx.HTTPError as e:
+                    status = type(e).__name__
+                latencies.append((time.perf_counter() - start) * 1000)
+                statuses[status] = statuses.get(status, 0) + 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(requests)))
+        elapsed = time.perf_counter() - start
+
+    return {
+        "requests": requests,
+        "errors": requests - statuses.get("200", 0),
+        "statuses": statuses,
+        "seconds": round(elapsed, 2),
+        "requests_per_second": round(requests / elapsed, 2),
+        **percentiles(latencies),
+    }
+
+
+def run_analyze(args) -> dict:
+    paths = seed_index(args.work_dir, args.embedding_backend, args.reseed)
+    gemini = Service("gemini_stub", {
+        "STUB_LATENCY_MS": str(args.gemini_latency_ms),
+        "STUB_TOKENS_PER_SECOND": str(args.gemini_tokens_per_second),
+    }, args.work_dir)
+    gemini.start()
+
+    env = {
+        "VECTOR_BACKEND": "local",
+        "TATA_EMBEDDED_PATH": paths["tata_data_embedded.jsonl"],
+        "COMPETITOR_EMBEDDED_PATH": paths["competitor_data_embedding.jsonl"],
+        "GEMINI_API_KEY": "stub",
+        "GEMINI_BASE_URL": gemini.url + "/v1beta",
+        "EMBEDDING_BACKEND": args.embedding_backend,
+    }
+    if not args.with_caches:
+        env.update(RESPONSE_CACHE_SIZE="0", EMBEDDING_CACHE_SIZE="0", INTENT_CACHE_SIZE="0")
+    env.update(args.env)
+
+    app = Service("app", env, args.work_dir)
+    try:
+        startup = app.start("/ready")
+        print(f"🚀 API ready in {startup:.1f}s; {args.requests} requests at concurrency {args.concurrency}")
+        queries = make_queries(args.distinct)
+        # Warm-up requests are not measured
+        asyncio.run(drive(app.url, queries, min(args.concurrency, args.requests), args.concurrency, args.timeout))
+        result = asyncio.run(drive(app.url, queries, args.requests, args.concurrency, args.timeout))
+    finally:
+        process = app.stop()
+        gemini.stop()
+
+    return {**result, "startup_seconds": round(startup, 2), "peak_rss_mb": process["peak_rss_mb"],
+            "config": {"concurrency": args.concurrency, "distinct_queries": args.distinct,
+                       "caches": args.with_caches, "env": env}}
+
+
+def _crawl(args, stub_url: str, output: str, results):
+    """Child process: one full run_pipeline against the crawl stub"""
+    _redirect_output(os.path.join(args.work_dir, "crawl.log"))
+    os.chdir(MODEL_DIR)
+    from web_scrapping import CONFIG, TataDataPipeline
+
+    pipeline = TataDataPipeline(
+        "stub-id", "stub-secret", "stub-key",
+        max_workers=args.crawl_workers,
+        reddit_requests_per_minute=args.reddit_rpm,
+        youtube_requests_per_second=args.youtube_rps,
+        reddit_options={"oauth_url": stub_url, "reddit_url": stub_url},
+        youtube_options={"client_options": {"api_endpoint": stub_url}, "static_discovery": True},
+    )
+
+    # Time every API call as the crawler sees it, rate limiter waits included
+    latencies = []
+
+    def timed(call):
+        def wrapper(*a, **kw):
+            start = time.perf_counter()
+            try:
+                return call(*a, **kw)
+            finally:
+                latencies.append((time.perf_counter() - start) * 1000)
+        return wrapper
+
+    pipeline.call_reddit = timed(pipeline.call_reddit)
+    pipeline.call_youtube = timed(pipeline.call_youtube)
+
+    config = {
+        **CONFIG,
+        "REDDIT_SUBREDDITS": [f"sub{i}" for i in range(args.subreddits)],
+        "YOUTUBE_SEARCHES": [f"search {i}" for i in range(args.searches)],
+        "DAYS_BACK": 3650,
+        "REDDIT_LIMIT": 100,
+        "YOUTUBE_MAX_VIDEOS": args.videos,
+        "YOUTUBE_MAX_COMMENTS": args.comments,
+        "TRANSFORM_WORKERS": args.transform_workers,
+        "OUTPUT_FILE": output,
+        "SENTIMENT_CUBE": output + ".cube.json",
+        "SENTIMENT_TRENDS": output + ".trends.json",
+        "NEAR_DUPLICATES": output + ".duplicates",
+    }
+    start = time.perf_counter()
+    _, records = pipeline.run_pipeline(config)
+    elapsed = time.perf_counter() - start
+
+    results.put({
+        "records": records,
+        "api_calls": len(latencies),
+        "seconds": round(elapsed, 2),
+        "records_per_second": round(records / elapsed, 2),
+        "requests_per_second": round(len(latencies) / elapsed, 2),
+        **percentiles(latencies),
+        "throttled": {name: stats["throttled"] for name, stats in pipeline.rate_limit_stats().items()},
+        "peak_rss_mb": peak_rss_mb(),
+    })
+
+
+def run_crawl(args) -> dict:
+    stub = Service("crawl_stub", {
+        "STUB_LATENCY_MS": str(args.crawl_latency_ms),
+        "STUB_COMMENTS_PER_VIDEO": str(args.comments),
+    }, args.work_dir)
+    stub.start()
+    output = os.path.join(args.work_dir, "loadtest_crawl.jsonl")
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    process = ctx.Process(target=_crawl, args=(args, stub.url, output, results))
+    try:
+        process.start()
+        process.join()
+        if process.exitcode != 0:
+            raise RuntimeError(f"Crawl failed, see {os.path.join(args.work_dir, 'crawl.log')}")
+        result = results.get()
+    finally:
+        stub.stop()
+        for path in (output, output + ".cube.json", output + ".trends.json",
+                     output + ".duplicates.npy", output + ".duplicates.json"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    return {**result, "config": {"crawl_workers": args.crawl_workers, "transform_workers": args.transform_workers,
+                                 "subreddits": args.subreddits, "searches": args.searches,
+                                 "videos": args.videos, "comments_per_video": args.comments}}
+
+
+# ========== Reporting ==========
+
+METRICS = ("requests_per_second", "records_per_second", "p50_ms", "p95_ms", "p99_ms",
+           "peak_rss_mb", "startup_seconds", "errors")
+
+
+def print_results(results: dict, baseline: dict = None):
+    for name, scenario in results["scenarios"].items():
+        print(f"\n📊 {name}")
+        old = ((baseline or {}).get("scenarios") or {}).get(name, {})
+        for metric in METRICS:
+            if scenario.get(metric) is None:
+                continue
+            line = f"   {metric:22s} {scenario[metric]:>10}"
+            if old.get(metric):
+                change = (scenario[metric] - old[metric]) / old[metric] * 100
+                line += f"   (was {old[metric]}, {change:+.1f}%)"
+            print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", choices=SCENARIOS, nargs="+", default=list(SCENARIOS))
+    parser.add_argument("--out", help="Write results JSON here")
+    parser.add_argument("--compare", help="Results JSON of an earlier run to compare against")
+    parser.add_argument("--work-dir", default=os.path.join(tempfile.gettempdir(), "tata_loadtest"),
+                        help="Seeded index and crawl output (kept between runs)")
+    parser.add_argument("--reseed", action="store_true", help="Re-embed the sample datasets")
+
+    api = parser.add_argument_group("analyze")
+    api.add_argument("--requests", type=int, default=200)
+    api.add_argument("--concurrency", type=int, default=16)
+    api.add_argument("--distinct", type=int, default=50, help="Number of distinct queries")
+    api.add_argument("--with-caches", action="store_true", help="Keep the app's response/embedding/intent caches")
+    api.add_argument("--embedding-backend", default=os.getenv("EMBEDDING_BACKEND", "torch"))
+    api.add_argument("--gemini-latency-ms", type=float, default=300)
+    api.add_argument("--gemini-tokens-per-second", type=float, default=0, help="0 = no per-token delay")
+    api.add_argument("--timeout", type=float, default=120)
+    api.add_argument("--env", action="append", default=[], metavar="KEY=VALUE",
+                     help="Extra app configuration (repeatable)")
+
+    crawl = parser.add_argument_group("crawl")
+    crawl.add_argument("--crawl-workers", type=int, default=8)
+    crawl.add_argument("--transform-workers", type=int, default=1)
+    crawl.add_argument("--subreddits", type=int, default=6)
+    crawl.add_argument("--searches", type=int, default=2)
+    crawl.add_argument("--videos", type=int, default=10)
+    crawl.add_argument("--comments", type=int, default=500, help="Comments per video")
+    crawl.add_argument("--crawl-latency-ms", type=float, default=100)
+    crawl.add_argument("--reddit-rpm", type=float, default=600)
+    crawl.add_argument("--youtube-rps", type=float, default=30)
+    args = parser.parse_args()
+
+    args.env = dict(item.split("=", 1) for item in args.env)
+    os.makedirs(args.work_dir, exist_ok=True)
+
+    results = {
+        **git_revision(),
+        "timestamp": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "machine": {"cpus": os.cpu_count(), "python": platform.python_version(), "platform": platform.platform()},
+        "scenarios": {},
+    }
+    runners = {"analyze": run_analyze, "crawl": run_crawl}
+    for name in args.scenario:
+        print(f"\n▶ {name}")
+        results["scenarios"][name] = runners[name](args)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        print(f"\nCompared with {baseline.get('commit')} ({baseline.get('timestamp')})")
+    print_results(results, baseline)
+
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n✅ Results written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
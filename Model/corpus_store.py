@@ -0,0 +1,252 @@
+"""
+Columnar, memory-mapped store for the sentiment datasets.
+
+A store is a directory with one file per column plus meta.json:
+
+- category columns (platform, vehicle_model, sentiment.label, location.city,
+  intent, ...): int32 codes in <column>.npy, -1 for missing; the category
+  values are listed in meta.json
+- numeric columns (sentiment.score) and timestamps (datetime64[s]): <column>.npy
+- text columns (content, username, source_id, JSON-encoded lists):
+  int64 offsets in <column>.offsets.npy and UTF-8 bytes in <column>.bin
+
+Every column is opened with mmap on first use, so an aggregation reads only
+the columns it touches.
+
+Usage (from Model/):
+    python corpus_store.py ../Frontend/public/tata_sentiment_dataset_20251003_170406.json corpus/tata
+"""
+
+import argparse
+import json
+import logging
+import os
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+CATEGORY_COLUMNS = (
+    "platform", "vehicle_model", "target_vehicle", "vehicle_category", "intent",
+    "sentiment.label", "location.city", "location.state", "location.tier", "location.final_location",
+)
+FLOAT_COLUMNS = ("sentiment.score",)
+TIME_COLUMNS = ("timestamp",)
+TEXT_COLUMNS = ("source_id", "username", "content")
+JSON_COLUMNS = ("competitor_models", "keywords", "aspects")  # lists, stored as JSON text
+
+META_FILE = "meta.json"
+
+
+def get_field(doc: Dict, path: str):
+    """Read a dotted field path such as "sentiment.label" from a document"""
+    value = doc
+    for key in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+def iter_documents(path: str) -> Iterator[Dict]:
+    """Documents from a dataset JSON ({"documents": [...]} or a list) or a JSONL file"""
+    if path.endswith(".jsonl"):
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        return
+
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    yield from data["documents"] if isinstance(data, dict) else data
+
+
+# ========== Writing ==========
+
+def _write_text(out_dir: str, name: str, values: Sequence[Optional[str]]):
+    offsets = np.zeros(len(values) + 1, dtype=np.int64)
+    with open(os.path.join(out_dir, name + ".bin"), 'wb') as f:
+        for i, value in enumerate(values):
+            data = value.encode("utf-8") if value else b""
+            f.write(data)
+            offsets[i + 1] = offsets[i] + len(data)
+    np.save(os.path.join(out_dir, name + ".offsets.npy"), offsets)
+
+
+def convert(paths: List[str], out_dir: str) -> Dict:
+    """Convert one or more dataset files into a columnar store; returns its metadata"""
+    os.makedirs(out_dir, exist_ok=True)
+
+    columns = {name: [] for name in
+               CATEGORY_COLUMNS + FLOAT_COLUMNS + TIME_COLUMNS + TEXT_COLUMNS + JSON_COLUMNS}
+    rows = 0
+    for path in paths:
+        for doc in iter_documents(path):
+            for name in columns:
+                columns[name].append(get_field(doc, name))
+            rows += 1
+
+    meta = {"rows": rows, "sources": [os.path.basename(p) for p in paths], "columns": {}}
+
+    for name in CATEGORY_COLUMNS:
+        values = columns[name]
+        categories = sorted({v for v in values if v is not None})
+        lookup = {value: code for code, value in enumerate(categories)}
+        codes = np.array([lookup[v] if v is not None else -1 for v in values], dtype=np.int32)
+        np.save(os.path.join(out_dir, name + ".npy"), codes)
+        meta["columns"][name] = {"kind": "category", "categories": categories}
+
+    for name in FLOAT_COLUMNS:
+        values = np.array([v if v is not None else np.nan for v in columns[name]], dtype=np.float64)
+        np.save(os.path.join(out_dir, name + ".npy"), values)
+        meta["columns"][name] = {"kind": "float"}
+
+    for name in TIME_COLUMNS:
+        values = np.array([v.rstrip("Z") if v else "NaT" for v in columns[name]], dtype="datetime64[s]")
+        np.save(os.path.join(out_dir, name + ".npy"), values)
+        meta["columns"][name] = {"kind": "time"}
+
+    for name in TEXT_COLUMNS:
+        _write_text(out_dir, name, columns[name])
+        meta["columns"][name] = {"kind": "text"}
+
+    for name in JSON_COLUMNS:
+        _write_text(out_dir, name, [json.dumps(v, ensure_ascii=False) if v else None
+                                    for v in columns[name]])
+        meta["columns"][name] = {"kind": "json"}
+
+    with open(os.path.join(out_dir, META_FILE), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+
+    logger.info(f"Wrote {rows} documents to {out_dir}")
+    return meta
+
+
+# ========== Reading ==========
+
+class TextColumn:
+    """Lazily decoded, memory-mapped text column"""
+
+    def __init__(self, offsets: np.ndarray, blob: np.ndarray, is_json: bool = False):
+        self.offsets = offsets
+        self.blob = blob
+        self.is_json = is_json
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, row: int):
+        start, end = int(self.offsets[row]), int(self.offsets[row + 1])
+        if start == end:
+            return [] if self.is_json else None
+        text = self.blob[start:end].tobytes().decode("utf-8")
+        return json.loads(text) if self.is_json else text
+
+
+class CorpusStore:
+    """
+    Read side of a columnar store.
+
+    - codes(name) / categories(name): raw category codes and their values
+    - column(name): decoded values (object array for categories, the mmap for
+      numbers and times, a TextColumn for text)
+    - documents(rows, fields): documents rebuilt from the selected columns
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, META_FILE), 'r', encoding='utf-8') as f:
+            self.meta = json.load(f)
+        self._columns: Dict[str, object] = {}
+
+    def __len__(self) -> int:
+        return self.meta["rows"]
+
+    @property
+    def column_names(self) -> List[str]:
+        return list(self.meta["columns"])
+
+    def _spec(self, name: str) -> Dict:
+        if name not in self.meta["columns"]:
+            raise KeyError(f"Unknown column: {name}")
+        return self.meta["columns"][name]
+
+    def _load(self, name: str):
+        if name not in self._columns:
+            spec = self._spec(name)
+            if spec["kind"] in ("text", "json"):
+                offsets = np.load(os.path.join(self.path, name + ".offsets.npy"), mmap_mode="r")
+                blob_path = os.path.join(self.path, name + ".bin")
+                blob = (np.memmap(blob_path, dtype=np.uint8, mode="r")
+                        if os.path.getsize(blob_path) else np.empty(0, dtype=np.uint8))
+                self._columns[name] = TextColumn(offsets, blob, is_json=spec["kind"] == "json")
+            else:
+                self._columns[name] = np.load(os.path.join(self.path, name + ".npy"), mmap_mode="r")
+        return self._columns[name]
+
+    def codes(self, name: str) -> np.ndarray:
+        if self._spec(name)["kind"] != "category":
+            raise ValueError(f"{name} is not a category column")
+        return self._load(name)
+
+    def categories(self, name: str) -> List[str]:
+        return self._spec(name)["categories"]
+
+    def code_of(self, name: str, value: str) -> int:
+        """Code of a category value, -1 if it never occurs"""
+        try:
+            return self.categories(name).index(value)
+        except ValueError:
+            return -1
+
+    def column(self, name: str):
+        spec = self._spec(name)
+        if spec["kind"] == "category":
+            values = np.array(spec["categories"] + [None], dtype=object)
+            return values[self.codes(name)]  # code -1 picks the trailing None
+        return self._load(name)
+
+    def value(self, name: str, row: int):
+        spec = self._spec(name)
+        if spec["kind"] == "category":
+            code = int(self.codes(name)[row])
+            return spec["categories"][code] if code >= 0 else None
+        value = self._load(name)[row]
+        if spec["kind"] == "float":
+            return None if np.isnan(value) else float(value)
+        if spec["kind"] == "time":
+            return None if np.isnat(value) else str(value) + "Z"
+        return value
+
+    def documents(self, rows: Optional[Sequence[int]] = None,
+                  fields: Optional[Sequence[str]] = None) -> Iterator[Dict]:
+        """Rebuild (nested) documents for the given rows from the given columns"""
+        fields = fields or self.column_names
+        for row in (range(len(self)) if rows is None else rows):
+            doc = {}
+            for name in fields:
+                *parents, leaf = name.split(".")
+                target = doc
+                for key in parents:
+                    target = target.setdefault(key, {})
+                target[leaf] = self.value(name, int(row))
+            yield doc
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("inputs", nargs="+", help="Dataset JSON/JSONL files")
+    parser.add_argument("out_dir", help="Store directory")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    meta = convert(args.inputs, args.out_dir)
+    size = sum(os.path.getsize(os.path.join(args.out_dir, f)) for f in os.listdir(args.out_dir))
+    print(f"✅ {meta['rows']} documents, {len(meta['columns'])} columns, "
+          f"{size / 1e6:.1f} MB in {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional, Set
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS seen (
+    platform TEXT NOT NULL,
+    post_id TEXT NOT NULL,
+    first_seen TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%SZ', 'now')),
+    PRIMARY KEY (platform, post_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS watermarks (
+    source TEXT PRIMARY KEY,
+    newest TEXT NOT NULL,
+    updated_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%SZ', 'now'))
+);
+"""
+
+# SQLite's default limit on host parameters per statement
+MAX_PARAMS = 900
+
+
+class CrawlState:
+    """
+    Persistent crawl state in SQLite: seen post/comment ids and the newest
+    timestamp fetched per source (subreddit + keyword, YouTube video).
+
+    Timestamps are ISO-8601 UTC strings ("2025-10-03T17:04:06Z"), which
+    compare correctly as text. Safe to share between crawler threads.
+    """
+
+    def __init__(self, path: str = "crawl_state.db"):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self):
+        self._conn.close()
+
+    # ========== Watermarks ==========
+
+    def watermark(self, source: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT newest FROM watermarks WHERE source = ?", (source,)).fetchone()
+        return row[0] if row else None
+
+    def update_watermarks(self, newest: Dict[str, str]):
+        """Raise each source's watermark to the given timestamp (never lowers it)"""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                """INSERT INTO watermarks (source, newest) VALUES (?, ?)
+                   ON CONFLICT(source) DO UPDATE SET
+                       newest = max(newest, excluded.newest),
+                       updated_at = strftime('%Y-%m-%dT%H:%M:%SZ', 'now')""",
+                newest.items()
+            )
+
+    # ========== Seen ids ==========
+
+    def seen_ids(self, platform: str, post_ids: Iterable[str]) -> Set[str]:
+        """The subset of post_ids already recorded for a platform"""
+        post_ids = list(post_ids)
+        seen = set()
+        with self._lock:
+            for i in range(0, len(post_ids), MAX_PARAMS):
+                chunk = post_ids[i:i + MAX_PARAMS]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT post_id FROM seen WHERE platform = ? AND post_id IN ({placeholders})",
+                    [platform, *chunk]
+                )
+                seen.update(row[0] for row in rows)
+        return seen
+
+    def filter_new(self, items: List[Dict]) -> List[Dict]:
+        """Items (with platform/post_id keys) not seen in an earlier run"""
+        seen = {}
+        for platform in {item["platform"] for item in items}:
+            seen[platform] = self.seen_ids(platform, (item["post_id"] for item in items
+                                                      if item["platform"] == platform))
+        return [item for item in items if item["post_id"] not in seen[item["platform"]]]
+
+    def mark_seen(self, items: Iterable[Dict]):
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO seen (platform, post_id) VALUES (?, ?)",
+                ((item["platform"], item["post_id"]) for item in items)
+            )
+
+    def stats(self) -> Dict:
+        with self._lock:
+            seen = dict(self._conn.execute("SELECT platform, COUNT(*) FROM seen GROUP BY platform").fetchall())
+            sources = self._conn.execute("SELECT COUNT(*) FROM watermarks").fetchone()[0]
+        return {"seen": seen, "sources": sources}
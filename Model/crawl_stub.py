@@ -0,0 +1,118 @@
+"""
+Local stand-in for the Reddit and YouTube Data APIs, for offline crawler
+benchmarks.
+
+Serves just enough of each API for TataDataPipeline: the Reddit OAuth token
+and subreddit search endpoints, and YouTube search.list / commentThreads.list
+(paged with nextPageToken, newest first). Each API has its own server-side
+rate limit and answers 429 when a client exceeds it.
+
+Usage (from Model/):
+    STUB_LATENCY_MS=150 uvicorn crawl_stub:app --port 8002
+"""
+
+import asyncio
+import hashlib
+import os
+import time
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+
+STUB_LATENCY_MS = float(os.getenv("STUB_LATENCY_MS", "150"))
+STUB_REDDIT_RPS = float(os.getenv("STUB_REDDIT_RPS", "20"))    # server-side limits (0 = none)
+STUB_YOUTUBE_RPS = float(os.getenv("STUB_YOUTUBE_RPS", "40"))
+STUB_COMMENTS_PER_VIDEO = int(os.getenv("STUB_COMMENTS_PER_VIDEO", "250"))
+STUB_NOW = time.time()
+
+app = FastAPI(title="Crawl stub")
+stats = {"reddit": 0, "youtube": 0, "rejected": 0}
+_windows = {}
+
+
+def over_limit(api: str, rps: float) -> bool:
+    """Fixed one-second window per API"""
+    if rps <= 0:
+        return False
+    window = int(time.monotonic())
+    start, count = _windows.get(api, (window, 0))
+    if start != window:
+        start, count = window, 0
+    _windows[api] = (start, count + 1)
+    return count + 1 > rps
+
+
+def rejected(api: str):
+    stats["rejected"] += 1
+    return JSONResponse({"error": {"code": 429, "message": f"{api} rate limit",
+                                   "errors": [{"reason": "rateLimitExceeded"}]}},
+                        status_code=429, headers={"Retry-After": "1"})
+
+
+def fake_id(*parts) -> str:
+    return hashlib.sha1("|".join(map(str, parts)).encode()).hexdigest()[:10]
+
+
+@app.post("/api/v1/access_token")
+async def access_token():
+    return {"access_token": "stub", "token_type": "bearer", "expires_in": 86400, "scope": "*"}
+
+
+@app.get("/r/{subreddit}/search")
+@app.get("/r/{subreddit}/search/")
+async def reddit_search(subreddit: str, q: str, limit: int = 25):
+    stats["reddit"] += 1
+    await asyncio.sleep(STUB_LATENCY_MS / 1000)
+    if over_limit("reddit", STUB_REDDIT_RPS):
+        return rejected("reddit")
+
+    children = []
+    for i in range(min(limit, 100)):
+        post_id = fake_id(subreddit, q, i)
+        children.append({"kind": "t3", "data": {
+            "id": post_id, "name": f"t3_{post_id}", "title": f"{q} thread {i}",
+            "selftext": f"Owner experience with the {q}, mileage and service notes.",
+            "created_utc": STUB_NOW - i * 3600, "author": f"user_{i % 37}",
+            "score": i, "num_comments": i % 11,
+            "permalink": f"/r/{subreddit}/comments/{post_id}/",
+        }})
+    return {"kind": "Listing", "data": {"after": None, "dist": len(children), "children": children}}
+
+
+@app.get("/youtube/v3/search")
+async def youtube_search(q: str, maxResults: int = 5):
+    stats["youtube"] += 1
+    await asyncio.sleep(STUB_LATENCY_MS / 1000)
+    if over_limit("youtube", STUB_YOUTUBE_RPS):
+        return rejected("youtube")
+
+    return {"items": [{"id": {"kind": "youtube#video", "videoId": fake_id(q, i)},
+                       "snippet": {"title": f"{q} video {i}"}} for i in range(maxResults)]}
+
+
+@app.get("/youtube/v3/commentThreads")
+async def youtube_comments(videoId: str, maxResults: int = 20, pageToken: str = ""):
+    stats["youtube"] += 1
+    await asyncio.sleep(STUB_LATENCY_MS / 1000)
+    if over_limit("youtube", STUB_YOUTUBE_RPS):
+        return rejected("youtube")
+
+    # Newest first, paged by offset
+    start = int(pageToken or 0)
+    end = min(start + maxResults, STUB_COMMENTS_PER_VIDEO)
+    items = []
+    for i in range(start, end):
+        published = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(STUB_NOW - i * 600))
+        items.append({"id": fake_id(videoId, i), "snippet": {"topLevelComment": {"snippet": {
+            "authorDisplayName": f"viewer_{i}", "textDisplay": f"Great comfort but poor mileage ({i})",
+            "publishedAt": published, "likeCount": i,
+        }}}})
+    response = {"items": items}
+    if end < STUB_COMMENTS_PER_VIDEO:
+        response["nextPageToken"] = str(end)
+    return response
+
+
+@app.get("/stats")
+async def get_stats():
+    return stats
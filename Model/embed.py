@@ -0,0 +1,177 @@
+"""
+Batched, multi-process embedding stage.
+
+Streams cleaned records from a JSONL file, encodes them in large batches
+across CPU worker processes and writes the vectors to a memory-mappable .npy
+sidecar, with a row file (<out>.ids.jsonl) giving the id and content hash of
+each row and <out>.meta.json recording the model, backend and dtype the
+hashes were taken with. Records whose content hash is already in an existing
+sidecar are copied over instead of being re-encoded.
+
+Usage (from Model/):
+    python embed.py tata_data.jsonl --out tata_vectors
+    python embed.py competitor_data.jsonl --out competitor_vectors --workers 4 --dtype float32
+"""
+
+import argparse
+import json
+import logging
+import os
+import time
+from multiprocessing import get_context
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from embedding_backend import EMBEDDING_MODEL_NAME, embedding_text, load_query_encoder, text_hash
+from vector_store import Sidecar, sidecar_paths, sidecar_prefix, vector_id
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 256
+DEFAULT_DTYPE = "float16"
+
+
+# ========== Text ==========
+
+def iter_texts(path: str) -> Iterator[Tuple[str, str]]:
+    """Yield (id, text) per record; repeated ids keep their first record"""
+    seen = set()
+    with open(path, 'rb') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            post = json.loads(line)
+            post_id = vector_id(post)
+            if post_id in seen:
+                continue
+            seen.add(post_id)
+            yield post_id, embedding_text(post)
+
+
+# ========== Encoding ==========
+
+_worker_encoder = None
+
+
+def _init_worker(backend: str, model_name: str, threads: int):
+    global _worker_encoder
+    import torch
+    torch.set_num_threads(threads)
+    _worker_encoder = load_query_encoder(backend, model_name)
+
+
+def _encode_batch(texts: List[str]) -> np.ndarray:
+    return np.asarray(_worker_encoder.encode(texts, batch_size=len(texts)), dtype=np.float32)
+
+
+def iter_text_batches(path: str, wanted: set, batch_size: int) -> Iterator[List[str]]:
+    batch = []
+    for post_id, text in iter_texts(path):
+        if post_id in wanted:
+            batch.append(text)
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+def embed_file(path: str, out: str, backend: str = "torch", model_name: str = EMBEDDING_MODEL_NAME,
+               workers: int = 0, batch_size: int = DEFAULT_BATCH_SIZE, dtype: str = DEFAULT_DTYPE) -> Dict:
+    """
+    Embed every record of a JSONL file into <out>.npy + <out>.ids.jsonl.
+
+    The input is read twice (ids/hashes first, then the texts to encode), so
+    only one batch of text per worker is held in memory.
+    """
+    workers = workers or os.cpu_count() or 1
+    old = Sidecar.open(out)
+    old_vectors, old_rows = (old.vectors, old.rows) if old else (None, {})
+
+    # Pass 1: ids and hashes, and which rows need encoding
+    ids, hashes, to_encode = [], [], []
+    for post_id, text in iter_texts(path):
+        digest = text_hash(text, model_name, backend, dtype)
+        ids.append(post_id)
+        hashes.append(digest)
+        if old_rows.get(post_id, (None, None))[1] != digest:
+            to_encode.append(len(ids) - 1)
+
+    npy_path, ids_path, meta_path = sidecar_paths(out)
+    tmp_npy, tmp_ids, tmp_meta = out + ".tmp.npy", ids_path + ".tmp", meta_path + ".tmp"
+    vectors = None
+
+    def open_output(dim: int) -> np.ndarray:
+        return np.lib.format.open_memmap(tmp_npy, mode="w+", dtype=dtype, shape=(len(ids), dim))
+
+    # Pass 2: encode the new/changed rows in batches across worker processes
+    started = time.perf_counter()
+    encoded = 0
+    if to_encode:
+        wanted = {ids[row] for row in to_encode}
+        threads = max(1, (os.cpu_count() or 1) // workers)
+        pool = get_context("spawn").Pool(workers, initializer=_init_worker,
+                                         initargs=(backend, model_name, threads))
+        try:
+            for batch_vectors in pool.imap(_encode_batch, iter_text_batches(path, wanted, batch_size)):
+                if vectors is None:
+                    vectors = open_output(batch_vectors.shape[1])
+                rows = to_encode[encoded:encoded + len(batch_vectors)]
+                vectors[rows] = batch_vectors
+                encoded += len(batch_vectors)
+                print(f"🧮 {encoded}/{len(to_encode)} embedded "
+                      f"({encoded / (time.perf_counter() - started):.0f} sentences/s)")
+        finally:
+            pool.close()
+            pool.join()
+    elapsed = time.perf_counter() - started
+
+    if vectors is None:
+        if old_vectors is None:
+            raise ValueError(f"No records to embed in {path}")
+        vectors = open_output(old_vectors.shape[1])
+
+    # Unchanged rows are copied from the previous sidecar
+    reused = [(row, old_rows[post_id][0]) for row, post_id in enumerate(ids)
+              if post_id in old_rows and old_rows[post_id][1] == hashes[row]]
+    if reused:
+        new_rows, old_positions = map(np.asarray, zip(*reused))
+        vectors[new_rows] = old_vectors[old_positions]
+
+    vectors.flush()
+    del vectors, old_vectors, old
+    with open(tmp_ids, 'w', encoding='utf-8') as f:
+        for post_id, digest in zip(ids, hashes):
+            f.write(json.dumps({"id": post_id, "hash": digest}, ensure_ascii=False) + "\n")
+    with open(tmp_meta, 'w', encoding='utf-8') as f:
+        json.dump({"model": model_name, "backend": backend, "dtype": dtype}, f)
+    os.replace(tmp_npy, npy_path)
+    os.replace(tmp_ids, ids_path)
+    os.replace(tmp_meta, meta_path)
+
+    return {"rows": len(ids), "encoded": encoded, "reused": len(reused), "seconds": round(elapsed, 2),
+            "sentences_per_second": round(encoded / max(elapsed, 1e-9), 1)}
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="Cleaned (or raw) records JSONL")
+    parser.add_argument("--out", help="Output prefix (default: <input>_vectors, where LocalIndex and the uploader look)")
+    parser.add_argument("--backend", default=os.getenv("EMBEDDING_BACKEND", "torch"))
+    parser.add_argument("--model", default=EMBEDDING_MODEL_NAME)
+    parser.add_argument("--workers", type=int, default=0, help="Encoder processes (default: CPU count)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--dtype", choices=("float16", "float32"), default=DEFAULT_DTYPE)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    out = args.out or sidecar_prefix(args.input)
+    result = embed_file(args.input, out, backend=args.backend, model_name=args.model,
+                        workers=args.workers, batch_size=args.batch_size, dtype=args.dtype)
+    print(f"\n✅ {result['rows']} rows in {out}.npy: {result['encoded']} embedded, "
+          f"{result['reused']} reused ({result['sentences_per_second']} sentences/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import hashlib
+import logging
+import os
+import re
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
+# Pre-exported quantized ONNX graph shipped in the sentence-transformers model repo
+DEFAULT_ONNX_FILE = "onnx/model_qint8_avx512_vnni.onnx"
+
+BACKENDS = ("torch", "int8", "onnx")
+
+
+def clean_text(text: str) -> str:
+    """Same cleaning as the normalization notebooks"""
+    text = re.sub(r"http\S+|www\S+", "", text)
+    text = re.sub(r"@\w+", "", text)
+    text = re.sub(r"#", "", text)
+    text = re.sub(r"[^\w\s,.!?]", "", text)
+    text = re.sub(r"\s+", " ", text).strip()
+    return text.lower()
+
+
+def embedding_text(post: Dict) -> str:
+    """Text that is embedded for a record (and indexed by BM25): clean_content, else the cleaned content"""
+    return post.get("clean_content") or clean_text(post.get("content") or "")
+
+
+def text_hash(text: str, model_name: str, backend: str, dtype: str) -> str:
+    """Key of a stored vector: the text and everything that changes its embedding"""
+    key = f"{model_name}\n{backend}\n{dtype}\n{text}"
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+
+
+def load_query_encoder(backend: str = "torch", model_name: str = EMBEDDING_MODEL_NAME):
+    """
+    Load the query encoder for the requested CPU backend.
+
+    - torch: the stock float32 SentenceTransformer model
+    - int8:  the same model with its Linear layers dynamically quantized to int8
+    - onnx:  ONNX Runtime inference (needs `optimum[onnxruntime]`); uses the
+             quantized graph in ONNX_MODEL_FILE unless it is set to empty
+
+    Every backend returns an object with SentenceTransformer's `encode`.
+    """
+    from sentence_transformers import SentenceTransformer
+
+    if backend == "torch":
+        return SentenceTransformer(model_name, device="cpu")
+
+    if backend == "int8":
+        import torch
+        model = SentenceTransformer(model_name, device="cpu")
+        return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+    if backend == "onnx":
+        onnx_file = os.getenv("ONNX_MODEL_FILE", DEFAULT_ONNX_FILE)
+        model_kwargs = {"file_name": onnx_file} if onnx_file else {}
+        return SentenceTransformer(model_name, device="cpu", backend="onnx", model_kwargs=model_kwargs)
+
+    raise ValueError(f"Unknown embedding backend: {backend} (expected one of {', '.join(BACKENDS)})")
+
+
+def warmup(encoder, rounds: int = 3):
+    """Run a few encodes so lazy framework initialization happens before the first request"""
+    for _ in range(rounds):
+        encoder.encode("How is the Tata Safari doing against the Mahindra XUV700?")
@@ -0,0 +1,204 @@
+import asyncio
+import hashlib
+import json
+import logging
+import random
+from typing import AsyncIterator, Dict, Optional
+
+import httpx
+
+from metrics import (GEMINI_COALESCED_TOTAL, GEMINI_REQUESTS_TOTAL, GEMINI_RETRIES_TOTAL,
+                     record_gemini_usage)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASE_URL = "https://generativelanguage.googleapis.com/v1beta"
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class GeminiError(Exception):
+    """Raised when Gemini keeps failing after all retries"""
+
+
+class GeminiClient:
+    """
+    Async Gemini client with a pooled keep-alive connection.
+
+    - max_connections / max_concurrency bound the upstream load
+    - identical in-flight requests are coalesced into a single upstream call
+    - 429 and 5xx responses are retried with jittered exponential backoff
+    """
+
+    def __init__(self, api_key: str, model: str, base_url: str = DEFAULT_BASE_URL,
+                 max_connections: int = 20, max_concurrency: int = 8,
+                 timeout: float = 30.0, max_retries: int = 3,
+                 backoff_base: float = 0.5, backoff_max: float = 8.0):
+        self.model = model
+        self.base_url = base_url.rstrip("/")
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self._client = httpx.AsyncClient(
+            headers={"Content-Type": "application/json", "x-goog-api-key": api_key},
+            timeout=httpx.Timeout(timeout, connect=min(timeout, 10.0)),
+            limits=httpx.Limits(max_connections=max_connections,
+                                max_keepalive_connections=max_connections),
+        )
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+        self.upstream_calls = 0
+        self.coalesced_calls = 0
+        self.retries = 0
+
+    @property
+    def endpoint(self) -> str:
+        return f"{self.base_url}/models/{self.model}:generateContent"
+
+    @property
+    def stream_endpoint(self) -> str:
+        return f"{self.base_url}/models/{self.model}:streamGenerateContent?alt=sse"
+
+    @staticmethod
+    def _payload(prompt: str, max_tokens: int, temperature: float) -> Dict:
+        return {
+            "contents": [{"parts": [{"text": prompt}]}],
+            "generationConfig": {
+                "maxOutputTokens": max_tokens,
+                "temperature": temperature
+            }
+        }
+
+    async def aclose(self):
+        await self._client.aclose()
+
+    async def generate(self, prompt: str, max_tokens: int = 200, temperature: float = 0.7) -> str:
+        """Generate text for a prompt; raises GeminiError on failure"""
+        response_json = await self.generate_content(prompt, max_tokens, temperature)
+
+        if "candidates" not in response_json:
+            raise GeminiError(f"No candidates in response: {response_json}")
+
+        return response_json["candidates"][0]["content"]["parts"][0]["text"].strip()
+
+    async def generate_content(self, prompt: str, max_tokens: int = 200,
+                               temperature: float = 0.7) -> Dict:
+        """Raw generateContent response, coalescing identical in-flight requests"""
+        payload = self._payload(prompt, max_tokens, temperature)
+        key = hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+        future = self._inflight.get(key)
+        if future is not None:
+            self.coalesced_calls += 1
+            GEMINI_COALESCED_TOTAL.inc()
+            return await asyncio.shield(future)
+
+        future = asyncio.ensure_future(self._post_with_retry(payload))
+        self._inflight[key] = future
+        future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(future)
+
+    async def stream(self, prompt: str, max_tokens: int = 200,
+                     temperature: float = 0.7) -> AsyncIterator[str]:
+        """Yield text chunks as Gemini generates them (streamGenerateContent, SSE)
+        
+        Retryable errors are retried until the first chunk has been received;
+        after that a failure raises GeminiError.
+        """
+        payload = self._payload(prompt, max_tokens, temperature)
+        received = False
+
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            try:
+                async with self._semaphore:
+                    self.upstream_calls += 1
+                    async with self._client.stream("POST", self.stream_endpoint, json=payload) as response:
+                        GEMINI_REQUESTS_TOTAL.inc(endpoint="stream", status=response.status_code)
+                        if response.status_code not in RETRYABLE_STATUS:
+                            response.raise_for_status()
+                            # Every chunk may repeat the cumulative usageMetadata; count the last one once
+                            usage = {}
+                            try:
+                                async for line in response.aiter_lines():
+                                    if not line.startswith("data:"):
+                                        continue
+                                    chunk = json.loads(line[len("data:"):])
+                                    usage = chunk.get("usageMetadata") or usage
+                                    for candidate in chunk.get("candidates", [])[:1]:
+                                        for part in candidate.get("content", {}).get("parts", []):
+                                            if part.get("text"):
+                                                received = True
+                                                yield part["text"]
+                            finally:
+                                record_gemini_usage({"usageMetadata": usage})
+                            return
+
+                        error = GeminiError(f"Gemini returned HTTP {response.status_code}")
+                        retry_after = response.headers.get("retry-after")
+            except httpx.TransportError as e:
+                GEMINI_REQUESTS_TOTAL.inc(endpoint="stream", status="transport_error")
+                error = GeminiError(f"Gemini transport error: {e}")
+                if received:
+                    raise error from e
+            except httpx.HTTPStatusError as e:
+                raise GeminiError(f"Gemini returned HTTP {e.response.status_code}") from e
+
+            if attempt == self.max_retries:
+                raise error
+
+            delay = self._backoff(attempt, retry_after)
+            self.retries += 1
+            GEMINI_RETRIES_TOTAL.inc(endpoint="stream")
+            logger.warning(f"{error}; retrying stream in {delay:.2f}s ({attempt + 1}/{self.max_retries})")
+            await asyncio.sleep(delay)
+
+    def _backoff(self, attempt: int, retry_after: Optional[str]) -> float:
+        """Full-jitter exponential backoff, honouring Retry-After when present"""
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_max)
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    async def _post_with_retry(self, payload: Dict) -> Dict:
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            try:
+                async with self._semaphore:
+                    self.upstream_calls += 1
+                    response = await self._client.post(self.endpoint, json=payload)
+                GEMINI_REQUESTS_TOTAL.inc(endpoint="generate", status=response.status_code)
+
+                if response.status_code not in RETRYABLE_STATUS:
+                    response.raise_for_status()
+                    response_json = response.json()
+                    record_gemini_usage(response_json)
+                    return response_json
+
+                error = GeminiError(f"Gemini returned HTTP {response.status_code}")
+                retry_after = response.headers.get("retry-after")
+            except httpx.TransportError as e:
+                GEMINI_REQUESTS_TOTAL.inc(endpoint="generate", status="transport_error")
+                error = GeminiError(f"Gemini transport error: {e}")
+            except httpx.HTTPStatusError as e:
+                raise GeminiError(f"Gemini returned HTTP {e.response.status_code}") from e
+
+            if attempt == self.max_retries:
+                raise error
+
+            delay = self._backoff(attempt, retry_after)
+            self.retries += 1
+            GEMINI_RETRIES_TOTAL.inc(endpoint="generate")
+            logger.warning(f"{error}; retrying in {delay:.2f}s ({attempt + 1}/{self.max_retries})")
+            await asyncio.sleep(delay)
+
+    def stats(self) -> Dict:
+        return {
+            "upstream_calls": self.upstream_calls,
+            "coalesced_calls": self.coalesced_calls,
+            "retries": self.retries,
+            "inflight": len(self._inflight),
+        }
@@ -0,0 +1,104 @@
+"""
+Local stand-in for the Gemini generateContent / streamGenerateContent API,
+for offline load tests.
+
+Usage (from Model/):
+    STUB_LATENCY_MS=400 STUB_ERROR_RATE=0.05 uvicorn gemini_stub:app --port 8001
+    GEMINI_BASE_URL=http://127.0.0.1:8001/v1beta uvicorn app:app
+"""
+
+import asyncio
+import json
+import os
+import random
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+STUB_LATENCY_MS = float(os.getenv("STUB_LATENCY_MS", "300"))
+STUB_TOKENS_PER_SECOND = float(os.getenv("STUB_TOKENS_PER_SECOND", "0"))  # 0 = no per-token delay
+STUB_ERROR_RATE = float(os.getenv("STUB_ERROR_RATE", "0"))
+
+INTENT_RESPONSE = (
+    '{"tata_vehicle": "safari", "competitors": ["Mahindra XUV700", "Hyundai Alcazar", '
+    '"MG Hector Plus"], "embedding_query": "safari vehicle feedback", "filter": {}}'
+)
+ANALYSIS_RESPONSE = (
+    "1. EXECUTIVE SUMMARY\n"
+    "Stub analysis generated offline. Sentiment is broadly comparable to competitors.\n\n"
+    "2. SENTIMENT COMPARISON\n- Stub comparison point.\n\n"
+    "3. KEY STRENGTHS\n- Design\n- Safety\n- Ride comfort\n\n"
+    "4. AREAS FOR IMPROVEMENT\n- Service network\n- Fuel efficiency\n\n"
+    "5. ACTIONABLE RECOMMENDATIONS\n- Highlight safety ratings\n- Improve after-sales experience\n"
+)
+
+app = FastAPI(title="Gemini stub")
+stats = {"requests": 0, "errors": 0}
+
+
+def build_reply(payload: dict) -> str:
+    prompt = payload["contents"][0]["parts"][0]["text"]
+    text = INTENT_RESPONSE if "Return ONLY valid JSON" in prompt else ANALYSIS_RESPONSE
+    max_tokens = payload.get("generationConfig", {}).get("maxOutputTokens", 200)
+    return " ".join(text.split(" ")[:max_tokens])
+
+
+def usage(payload: dict, text: str) -> dict:
+    prompt_tokens = len(payload["contents"][0]["parts"][0]["text"].split())
+    output_tokens = len(text.split())
+    return {
+        "promptTokenCount": prompt_tokens,
+        "candidatesTokenCount": output_tokens,
+        "totalTokenCount": prompt_tokens + output_tokens,
+    }
+
+
+@app.post("/v1beta/models/{model}:generateContent")
+async def generate_content(model: str, request: Request):
+    stats["requests"] += 1
+    payload = await request.json()
+    await asyncio.sleep(STUB_LATENCY_MS / 1000)
+
+    if random.random() < STUB_ERROR_RATE:
+        stats["errors"] += 1
+        return JSONResponse({"error": {"code": 429, "message": "Stub rate limit"}}, status_code=429)
+
+    text = build_reply(payload)
+    if STUB_TOKENS_PER_SECOND > 0:
+        await asyncio.sleep(len(text.split()) / STUB_TOKENS_PER_SECOND)
+
+    return {
+        "candidates": [{"content": {"parts": [{"text": text}], "role": "model"}}],
+        "usageMetadata": usage(payload, text),
+    }
+
+
+@app.post("/v1beta/models/{model}:streamGenerateContent")
+async def stream_generate_content(model: str, request: Request):
+    stats["requests"] += 1
+    payload = await request.json()
+    await asyncio.sleep(STUB_LATENCY_MS / 1000)
+
+    if random.random() < STUB_ERROR_RATE:
+        stats["errors"] += 1
+        return JSONResponse({"error": {"code": 429, "message": "Stub rate limit"}}, status_code=429)
+
+    text = build_reply(payload)
+
+    async def events():
+        words = text.split(" ")
+        for i, word in enumerate(words):
+            if STUB_TOKENS_PER_SECOND > 0:
+                await asyncio.sleep(1 / STUB_TOKENS_PER_SECOND)
+            # Like Gemini, every chunk carries the usage so far
+            chunk = {"candidates": [{"content": {"parts": [{"text": word if i == 0 else " " + word}],
+                                                 "role": "model"}}],
+                     "usageMetadata": usage(payload, " ".join(words[:i + 1]))}
+            yield f"data: {json.dumps(chunk)}\r\n\r\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+@app.get("/stats")
+async def get_stats():
+    return stats
@@ -0,0 +1,146 @@
+import re
+from typing import Dict, List, Optional
+
+# Surface forms for each competitor; longer aliases are matched first so
+# "hector plus" wins over "hector"
+COMPETITOR_ALIASES = {
+    "Mahindra XUV700": ["xuv700", "xuv 700", "xuv-700", "xuv7oo"],
+    "Hyundai Alcazar": ["alcazar"],
+    "MG Hector Plus": ["hector plus", "hector+"],
+    "MG Hector": ["hector"],
+    "Jeep Compass": ["compass"],
+    "Hyundai Tucson": ["tucson"],
+}
+
+# Cities as they appear in the location metadata (final_location = "City, India")
+CITY_ALIASES = {
+    "Delhi": ["delhi", "new delhi", "ncr"],
+    "Mumbai": ["mumbai", "bombay"],
+    "Pune": ["pune"],
+    "Bangalore": ["bangalore", "bengaluru"],
+    "Chennai": ["chennai", "madras"],
+    "Hyderabad": ["hyderabad"],
+    "Kolkata": ["kolkata", "calcutta"],
+    "Lucknow": ["lucknow"],
+    "Kanpur": ["kanpur"],
+    "Varanasi": ["varanasi"],
+    "Bhopal": ["bhopal"],
+    "Ahmedabad": ["ahmedabad"],
+    "Rajkot": ["rajkot"],
+    "Kochi": ["kochi", "cochin"],
+    "Patna": ["patna"],
+    "Jaipur": ["jaipur"],
+    "Nagpur": ["nagpur"],
+    "Indore": ["indore"],
+    "Chandigarh": ["chandigarh"],
+    "Surat": ["surat"],
+}
+
+# Only explicit sentiment requests become filters, mirroring the LLM prompt rules
+SENTIMENT_KEYWORDS = {
+    "negative": ["negative", "complaint", "complaints", "criticism", "criticisms"],
+    "positive": ["positive", "praise", "praises"],
+    "neutral": ["neutral"],
+}
+
+# A capitalised place after a preposition that we could not resolve to a known city
+_UNKNOWN_PLACE = re.compile(r"\b(?:in|from|around|near)\s+([A-Z][a-z]{2,})")
+
+
+def _alias_pattern(aliases: Dict[str, List[str]]):
+    """One word-boundary regex over every alias, longest first"""
+    lookup = {alias: canonical for canonical, forms in aliases.items() for alias in forms}
+    alternatives = sorted(lookup, key=len, reverse=True)
+    pattern = re.compile(r"(?<!\w)(" + "|".join(re.escape(a) for a in alternatives) + r")(?!\w)")
+    return pattern, lookup
+
+
+class IntentParser:
+    """
+    Deterministic keyword parser for /api/analyze queries.
+
+    Produces the same dict as identify_vehicle_and_competitors (tata_vehicle,
+    competitors, embedding_query, filter) or None when the query is ambiguous
+    and should be escalated to the LLM.
+    """
+
+    def __init__(self, competitor_mapping: Dict[str, List[str]]):
+        self.competitor_mapping = competitor_mapping
+        self.vehicles = list(competitor_mapping)
+        self._vehicle_pattern = re.compile(r"\b(" + "|".join(self.vehicles) + r")\b")
+        self._competitor_pattern, self._competitor_lookup = _alias_pattern(COMPETITOR_ALIASES)
+        self._city_pattern, self._city_lookup = _alias_pattern(CITY_ALIASES)
+        self._sentiment_pattern, self._sentiment_lookup = _alias_pattern(SENTIMENT_KEYWORDS)
+        self._known_words = {
+            word
+            for forms in (COMPETITOR_ALIASES, CITY_ALIASES)
+            for aliases in forms.values()
+            for alias in aliases
+            for word in alias.split()
+        } | set(self.vehicles) | {"india", "tata", "mahindra", "hyundai", "jeep", "mg"}
+
+        self.rule_hits = 0
+        self.escalations = 0
+
+    def parse(self, user_query: str) -> Optional[Dict]:
+        """Parse a query, or return None if it needs the LLM"""
+        result = self._parse(user_query)
+        if result is None:
+            self.escalations += 1
+        else:
+            self.rule_hits += 1
+        return result
+
+    def _parse(self, user_query: str) -> Optional[Dict]:
+        text = user_query.lower()
+
+        vehicles = set(self._vehicle_pattern.findall(text))
+        competitors = list(dict.fromkeys(self._competitor_lookup[m] for m in self._competitor_pattern.findall(text)))
+        cities = set(self._city_lookup[m] for m in self._city_pattern.findall(text))
+        sentiments = set(self._sentiment_lookup[m] for m in self._sentiment_pattern.findall(text))
+
+        # Ambiguous: several vehicles, cities or sentiments asked for at once
+        if len(vehicles) > 1 or len(cities) > 1 or len(sentiments) > 1:
+            return None
+
+        # A place we don't know how to normalise
+        for place in _UNKNOWN_PLACE.findall(user_query):
+            if place.lower() not in self._known_words:
+                return None
+
+        if vehicles:
+            vehicle = vehicles.pop()
+        elif competitors:
+            # Infer the Tata vehicle from whose competitor set was mentioned
+            owners = {v for v, comps in self.competitor_mapping.items() for c in competitors if c in comps}
+            if len(owners) != 1:
+                return None
+            vehicle = owners.pop()
+        else:
+            vehicle = "safari"
+
+        filters = {}
+        if cities:
+            filters["location"] = f"{cities.pop()}, India"
+        if sentiments:
+            filters["sentiment_label"] = sentiments.pop()
+
+        embedding_query = user_query.strip()
+        if vehicle not in text:
+            embedding_query = f"Tata {vehicle.title()} {embedding_query}"
+
+        return {
+            "tata_vehicle": vehicle,
+            "competitors": competitors or list(self.competitor_mapping[vehicle]),
+            "embedding_query": embedding_query,
+            "filter": filters,
+        }
+
+    def stats(self) -> Dict:
+        """Rule hit / LLM escalation counters"""
+        total = self.rule_hits + self.escalations
+        return {
+            "rule_hits": self.rule_hits,
+            "llm_escalations": self.escalations,
+            "llm_skip_rate": round(self.rule_hits / total, 4) if total else 0.0,
+        }
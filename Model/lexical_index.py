@@ -0,0 +1,253 @@
+"""
+Local BM25 inverted index over post content, fused with vector search.
+
+Dense retrieval misses posts that mention an exact term the encoder blurs
+(a model code, "DCA", "NCAP", a city name). The lexical index scores those
+with BM25 over the same cleaned text that is embedded, and ``fuse`` merges
+its ranking with the vector ranking by reciprocal rank fusion (RRF).
+
+Postings are stored column-wise (CSR: term -> doc rows, BM25 weights), so a
+query is one slice + scatter-add per query term. Matches use the Pinecone
+response shape and the same metadata as LocalIndex, so the Pinecone-style
+filters used by app.py apply unchanged.
+
+Usage (from Model/):
+    python lexical_index.py tata_data_embedded.jsonl
+    python lexical_index.py competitor_data_embedding.jsonl --out competitor_data_embedding.jsonl.bm25
+"""
+
+import argparse
+import json
+import logging
+import os
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from embedding_backend import clean_text, embedding_text
+from near_duplicates import NearDuplicateIndex
+from vector_store import MetadataIndex, Sidecar, build_metadata, iter_canonical_records, sidecar_prefix, vector_id
+
+logger = logging.getLogger(__name__)
+
+K1 = 1.2
+B = 0.75
+RRF_K = 60
+
+TOKEN = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset("""
+a about above after again all also am an and any are as at be because been before being below between
+both but by can could did do does doing down during each few for from further had has have having he
+her here hers him his how i if in into is it its itself just me more most my no nor not now of off on
+once only or other our out over own same she should so some such than that the their them then there
+these they this those through to too under until up very was we were what when where which while who
+whom why will with would you your yours
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens of the cleaned text, without stopwords and 1-char tokens"""
+    return [token for token in TOKEN.findall(clean_text(text or ""))
+            if len(token) > 1 and token not in STOPWORDS]
+
+
+def index_paths(prefix: str) -> Tuple[str, str]:
+    return prefix + ".npz", prefix + ".json"
+
+
+# ========== BM25 Index ==========
+
+class BM25Index:
+    """In-process BM25 index with Pinecone-style metadata filters"""
+
+    def __init__(self, ids: List[str], metadata: List[Dict], terms: List[str],
+                 indptr: np.ndarray, rows: np.ndarray, tfs: np.ndarray, doc_lengths: np.ndarray):
+        self.ids = np.asarray(ids, dtype=object)
+        self.metadata = metadata
+        self.terms = terms
+        self.vocabulary = {term: i for i, term in enumerate(terms)}
+        self.indptr = indptr
+        self.rows = rows
+        self.tfs = tfs
+        self.doc_lengths = doc_lengths
+        self.metadata_index = MetadataIndex(metadata)
+
+        # Query-independent part of the BM25 term weight, one value per posting
+        size = len(ids)
+        average = float(doc_lengths.mean()) if size else 0.0
+        norm = K1 * (1 - B + B * doc_lengths / average) if average else np.full(size, K1)
+        self.weights = (tfs * (K1 + 1) / (tfs + norm[rows])).astype(np.float32)
+        df = np.diff(indptr)
+        self.idf = np.log(1 + (size - df + 0.5) / (df + 0.5)).astype(np.float32)
+
+        logger.info(f"Lexical index ready: {size} documents, {len(terms)} terms")
+
+    @classmethod
+    def build(cls, ids: List[str], texts: Iterable[str], metadata: List[Dict]) -> "BM25Index":
+        vocabulary: Dict[str, int] = {}
+        postings: List[Dict[int, int]] = []
+        doc_lengths = []
+        for row, text in enumerate(texts):
+            tokens = tokenize(text)
+            doc_lengths.append(len(tokens))
+            for token in tokens:
+                term = vocabulary.setdefault(token, len(vocabulary))
+                if term == len(postings):
+                    postings.append({})
+                postings[term][row] = postings[term].get(row, 0) + 1
+
+        # Terms in sorted order so the saved index is deterministic
+        terms = sorted(vocabulary)
+        counts = [postings[vocabulary[term]] for term in terms]
+        indptr = np.zeros(len(terms) + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum([len(docs) for docs in counts])
+        rows = np.fromiter((row for docs in counts for row in docs), dtype=np.int32, count=indptr[-1])
+        tfs = np.fromiter((tf for docs in counts for tf in docs.values()), dtype=np.float32, count=indptr[-1])
+        return cls(ids, metadata, terms, indptr, rows, tfs, np.asarray(doc_lengths, dtype=np.float32))
+
+    @classmethod
+    def from_jsonl(cls, path: str, sidecar: Optional[str] = None, collapse_duplicates: bool = True) -> "BM25Index":
+        """Index the embedded JSONL file behind a LocalIndex / Pinecone upload (same ids and records)"""
+        ids, texts, metadata = [], [], []
+        duplicates = NearDuplicateIndex() if collapse_duplicates else None
+        for post in iter_canonical_records(path, duplicates, Sidecar.open(sidecar or sidecar_prefix(path))):
+            ids.append(vector_id(post))
+            texts.append(embedding_text(post))
+            metadata.append(build_metadata(post))
+        if duplicates is not None:
+            for post_id, meta in zip(ids, metadata):
+                meta["duplicate_count"] = duplicates.duplicate_count(post_id)
+        logger.info(f"Loaded {len(ids)} documents from {path}")
+        return cls.build(ids, texts, metadata)
+
+    # ========== Persistence ==========
+
+    def save(self, prefix: str):
+        """Write <prefix>.npz (postings) and <prefix>.json (ids, terms, metadata), atomically"""
+        arrays_path, rows_path = index_paths(prefix)
+        tmp = arrays_path + ".tmp"
+        with open(tmp, 'wb') as f:
+            np.savez(f, indptr=self.indptr, rows=self.rows, tfs=self.tfs, doc_lengths=self.doc_lengths)
+        os.replace(tmp, arrays_path)
+
+        tmp = rows_path + ".tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({"ids": self.ids.tolist(), "terms": self.terms, "metadata": self.metadata},
+                      f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, rows_path)
+
+    @classmethod
+    def load(cls, prefix: str) -> "BM25Index":
+        arrays_path, rows_path = index_paths(prefix)
+        with open(rows_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        with np.load(arrays_path) as arrays:
+            return cls(data["ids"], data["metadata"], data["terms"], arrays["indptr"],
+                       arrays["rows"], arrays["tfs"], arrays["doc_lengths"])
+
+    @classmethod
+    def exists(cls, prefix: str) -> bool:
+        return all(os.path.exists(path) for path in index_paths(prefix))
+
+    # ========== Queries ==========
+
+    def scores(self, query_text: str) -> np.ndarray:
+        """BM25 score of every document for the query (0 = no query term)"""
+        scores = np.zeros(len(self.ids), dtype=np.float32)
+        for token in set(tokenize(query_text)):
+            term = self.vocabulary.get(token)
+            if term is None:
+                continue
+            lo, hi = self.indptr[term], self.indptr[term + 1]
+            scores[self.rows[lo:hi]] += self.idf[term] * self.weights[lo:hi]
+        return scores
+
+    def _top_matches(self, rows: np.ndarray, scores: np.ndarray, top_k: int) -> List[Dict]:
+        if len(rows) > top_k:
+            best = np.argpartition(-scores, top_k)[:top_k]
+        else:
+            best = np.arange(len(rows))
+        best = best[np.argsort(-scores[best], kind="stable")]
+        return [{"id": self.ids[rows[i]], "score": float(scores[i]), "metadata": self.metadata[rows[i]]}
+                for i in best]
+
+    def _matching(self, scores: np.ndarray, filter: Optional[Dict]) -> np.ndarray:
+        mask = scores > 0
+        filter_mask = self.metadata_index.mask(filter)
+        if filter_mask is not None:
+            mask &= filter_mask
+        return mask
+
+    def search(self, query_text: str, top_k: int = 10, filter: Optional[Dict] = None) -> List[Dict]:
+        """Top_k documents containing at least one query term, best BM25 score first"""
+        if self.metadata_index.estimate(filter) == 0:
+            return []
+        scores = self.scores(query_text)
+        rows = np.flatnonzero(self._matching(scores, filter))
+        return self._top_matches(rows, scores[rows], top_k)
+
+    def search_grouped(self, query_text: str, groups: List[str], top_k: int = 10,
+                       group_field: str = "brand", filter: Optional[Dict] = None) -> Dict[str, List[Dict]]:
+        """Top_k documents for each group (e.g. brand), scoring the query once"""
+        if self.metadata_index.estimate(filter) == 0:
+            return {group: [] for group in groups}
+        scores = self.scores(query_text)
+        mask = self._matching(scores, filter)
+        column = self.metadata_index.columns.get(group_field, np.array([None] * len(self.ids), dtype=object))
+
+        results = {}
+        for group in groups:
+            rows = np.flatnonzero(mask & (column == group))
+            results[group] = self._top_matches(rows, scores[rows], top_k)
+        return results
+
+
+# ========== Fusion ==========
+
+def fuse(vector_matches: List[Dict], lexical_matches: List[Dict], top_k: int, k: int = RRF_K) -> List[Dict]:
+    """Reciprocal rank fusion of a vector and a lexical ranking
+
+    A match's score is sum(1 / (k + rank)) over the rankings it appears in,
+    rescaled so that rank 1 in both rankings scores 1.0. Each fused match
+    records its rank in either list under "retrieval" (None = not retrieved).
+    """
+    fused: Dict[str, Dict] = {}
+    for source, matches in (("vector_rank", vector_matches), ("bm25_rank", lexical_matches)):
+        for rank, match in enumerate(matches, 1):
+            entry = fused.get(match["id"])
+            if entry is None:
+                entry = fused[match["id"]] = {
+                    "id": match["id"],
+                    "score": 0.0,
+                    "metadata": match.get("metadata", {}),
+                    "retrieval": {"vector_rank": None, "bm25_rank": None},
+                }
+            entry["score"] += 1.0 / (k + rank)
+            entry["retrieval"][source] = rank
+
+    best = 2.0 / (k + 1)
+    ranked = sorted(fused.values(), key=lambda entry: -entry["score"])[:top_k]
+    for entry in ranked:
+        entry["score"] = entry["score"] / best
+    return ranked
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="Embedded JSONL file (the one the vector index is built from)")
+    parser.add_argument("--out", help="Output prefix (default: <input>.bm25)")
+    parser.add_argument("--keep-duplicates", action="store_true",
+                        help="Index near-duplicate records too (match an upload made with --keep-duplicates)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    out = args.out or args.input + ".bm25"
+    index = BM25Index.from_jsonl(args.input, collapse_duplicates=not args.keep_duplicates)
+    index.save(out)
+    print(f"✅ {len(index.ids)} documents, {len(index.terms)} terms, "
+          f"{len(index.rows)} postings in {', '.join(index_paths(out))}")
+
+
+if __name__ == "__main__":
+    main()
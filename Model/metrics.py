@@ -0,0 +1,200 @@
+import contextvars
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+# Per-request context: request id and the (stage, seconds) timings recorded so far
+request_id_var = contextvars.ContextVar("request_id", default="-")
+stage_timings_var = contextvars.ContextVar("stage_timings", default=None)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = ['%s="%s"' % (n, str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " "))
+             for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labels)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        super().__init__(name, help, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labels, key)} {value}")
+        return lines
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        self._values: Dict[Tuple[str, ...], List] = {}  # key -> [bucket counts, sum, count]
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.setdefault(key, [[0] * len(self.buckets), 0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][i] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._values.items()):
+                for bound, bucket_count in zip(self.buckets, counts):
+                    le = 'le="%s"' % bound
+                    lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {bucket_count}")
+                le = 'le="+Inf"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {count}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {total}")
+                lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {count}")
+        return lines
+
+
+class CallbackGauge(_Metric):
+    """Gauge whose labelled values are read from a callback at scrape time"""
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...],
+                 callback: Callable[[], Dict[Tuple[str, ...], float]]):
+        super().__init__(name, help, labels)
+        self.callback = callback
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for key, value in sorted(self.callback().items()):
+            lines.append(f"{self.name}{_format_labels(self.labels, key)} {value}")
+        return lines
+
+
+class CallbackCounter(CallbackGauge):
+    """Counter whose monotonically increasing values are read from a callback at scrape time"""
+    kind = "counter"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        """Prometheus text exposition format"""
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+HTTP_REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency", ("method", "path", "status")))
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "analyze_stage_duration_seconds", "Latency of each /api/analyze pipeline stage", ("stage",)))
+INTENT_SOURCE_TOTAL = REGISTRY.register(Counter(
+    "intent_resolutions_total", "How query intents were resolved", ("source",)))
+INDEX_EMPTY_FILTER_TOTAL = REGISTRY.register(Counter(
+    "index_empty_filter_total", "Index queries whose metadata filter matched no records", ("index",)))
+LEXICAL_TIMEOUT_TOTAL = REGISTRY.register(Counter(
+    "lexical_search_timeouts_total", "BM25 searches that missed the latency budget (vector-only results)", ("index",)))
+GEMINI_REQUESTS_TOTAL = REGISTRY.register(Counter(
+    "gemini_requests_total", "Upstream Gemini HTTP requests", ("endpoint", "status")))
+GEMINI_RETRIES_TOTAL = REGISTRY.register(Counter(
+    "gemini_retries_total", "Gemini requests retried after 429/5xx/transport errors", ("endpoint",)))
+GEMINI_COALESCED_TOTAL = REGISTRY.register(Counter(
+    "gemini_coalesced_total", "Gemini calls served by an identical in-flight request"))
+GEMINI_TOKENS_TOTAL = REGISTRY.register(Counter(
+    "gemini_tokens_total", "Gemini tokens reported in usageMetadata", ("kind",)))
+
+
+def record_gemini_usage(response_json: Dict):
+    """Count prompt/output tokens from a Gemini usageMetadata block"""
+    usage = response_json.get("usageMetadata") or {}
+    if usage.get("promptTokenCount"):
+        GEMINI_TOKENS_TOTAL.inc(usage["promptTokenCount"], kind="prompt")
+    if usage.get("candidatesTokenCount"):
+        GEMINI_TOKENS_TOTAL.inc(usage["candidatesTokenCount"], kind="output")
+
+
+# ========== Request Context ==========
+
+def start_request(request_id: str) -> List[Tuple[str, float]]:
+    """Bind a request id and a fresh stage-timing list to the current context"""
+    timings = []
+    request_id_var.set(request_id)
+    stage_timings_var.set(timings)
+    return timings
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time a pipeline stage into the stage histogram and the request's timings"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe(elapsed, stage=name)
+        timings = stage_timings_var.get()
+        if timings is not None:
+            timings.append((name, elapsed))
+
+
+def server_timing_header(timings: List[Tuple[str, float]], total: Optional[float] = None) -> str:
+    """Format stage timings as a Server-Timing header value"""
+    entries = [f"{name};dur={elapsed * 1000:.1f}" for name, elapsed in timings]
+    if total is not None:
+        entries.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(entries)
+
+
+class RequestIdFilter(logging.Filter):
+    """Adds the current request id to log records as %(request_id)s"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
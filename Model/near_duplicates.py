@@ -0,0 +1,286 @@
+"""
+Near-duplicate detection with MinHash signatures and LSH banding.
+
+Copy-pasted YouTube comments and cross-posted Reddit threads are collapsed
+into one canonical record (the first one seen) that carries the number of
+duplicates it stands for.
+
+Each text is reduced to its set of word 3-shingles and a 128-value MinHash
+signature. The signature is cut into 32 bands of 4 values; records sharing a
+band are candidates, and a candidate is a duplicate when the share of equal
+signature values (an estimate of the shingle Jaccard similarity) reaches the
+threshold. Records are only compared with canonical records that share a
+band, so clustering a crawl stays far from quadratic.
+
+Usage (from Model/):
+    python near_duplicates.py ../Frontend/public/*_sentiment_dataset_*.json
+    python near_duplicates.py tata_data.jsonl --out tata_data.dedup.jsonl --threshold 0.9
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+import zlib
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+NUM_PERM = 128
+BANDS = 32
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 3
+DEFAULT_THRESHOLD = 0.8
+
+# Multiply-shift hashing of 32-bit shingle hashes: ((a * x + b) mod 2^64) >> 32, one (a, b) per permutation
+_rng = np.random.default_rng(1)
+_A = _rng.integers(1, 1 << 63, NUM_PERM, dtype=np.uint64) | np.uint64(1)
+_B = _rng.integers(0, 1 << 63, NUM_PERM, dtype=np.uint64)
+_SHIFT = np.uint64(32)
+# Mixes the ROWS values of a band into one 64-bit bucket key
+_BAND_MIX = _rng.integers(1, 1 << 63, ROWS, dtype=np.uint64) | np.uint64(1)
+
+WORD = re.compile(r"\w+")
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> set:
+    """Word n-grams of the lowercased text (the whole text if it is shorter, nothing if it has no words)"""
+    words = WORD.findall((text or "").lower())
+    if not words:
+        return set()
+    if len(words) <= size:
+        return {" ".join(words)}
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def signature(text: str) -> Optional[np.ndarray]:
+    """MinHash signature (NUM_PERM uint32 values) of the text's shingle set, None if it has no words"""
+    words = shingles(text)
+    if not words:
+        return None
+    hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in words), dtype=np.uint64)
+    return ((np.outer(hashes, _A) + _B) >> _SHIFT).min(axis=0).astype(np.uint32)
+
+
+def band_keys(sig: np.ndarray) -> List[int]:
+    """One LSH bucket key per band of the signature"""
+    return (sig.reshape(BANDS, ROWS).astype(np.uint64) * _BAND_MIX).sum(axis=1).tolist()
+
+
+def record_text(record: Dict) -> str:
+    """Text compared for near-duplicates: clean_content, else the raw content (embed.embedding_text cleans it)"""
+    return record.get("clean_content") or record.get("content") or ""
+
+
+def document_id(record: Dict) -> str:
+    """source_id of a dataset record, else the pipeline post_id, else a hash of its text"""
+    return (record.get("source_id") or record.get("post_id")
+            or "sha256:" + hashlib.sha256(record_text(record).encode("utf-8")).hexdigest()[:32])
+
+
+class NearDuplicateIndex:
+    """Canonical records' signatures plus LSH band buckets pointing at them"""
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD):
+        self.threshold = threshold
+        self.ids: List[str] = []
+        self.counts: List[int] = []  # duplicates merged into each canonical record
+        self.signatures = np.empty((0, NUM_PERM), dtype=np.uint32)
+        self._size = 0
+        self._slots: Dict[str, int] = {}
+        self._wordless: set = set()  # canonical records without text, never compared
+        self._buckets: List[Dict[int, List[int]]] = [{} for _ in range(BANDS)]
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def duplicates(self) -> int:
+        return sum(self.counts)
+
+    def _insert(self, record_id: str, sig: np.ndarray, count: int = 0):
+        if self._size == len(self.signatures):
+            grown = np.empty((max(1024, 2 * self._size), NUM_PERM), dtype=np.uint32)
+            grown[:self._size] = self.signatures[:self._size]
+            self.signatures = grown
+        slot = self._size
+        self.signatures[slot] = sig
+        self._size += 1
+        self.ids.append(record_id)
+        self.counts.append(count)
+        self._slots[record_id] = slot
+        for bucket, key in zip(self._buckets, band_keys(sig)):
+            bucket.setdefault(key, []).append(slot)
+
+    def find(self, sig: np.ndarray) -> Optional[int]:
+        """Slot of the most similar canonical record at or above the threshold, if any"""
+        candidates = set()
+        for bucket, key in zip(self._buckets, band_keys(sig)):
+            candidates.update(bucket.get(key, ()))
+        if not candidates:
+            return None
+        slots = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+        similarity = (self.signatures[slots] == sig).mean(axis=1)
+        best = int(np.argmax(similarity))
+        return int(slots[best]) if similarity[best] >= self.threshold else None
+
+    def add(self, record_id: str, text: str) -> Optional[str]:
+        """Id of the canonical record this one duplicates, or None if it becomes canonical"""
+        slot = self._slots.get(record_id)
+        if slot is not None or record_id in self._wordless:
+            return None  # same record seen again
+
+        sig = signature(text)
+        if sig is None:
+            self._wordless.add(record_id)  # empty posts are not duplicates of each other
+            return None
+        slot = self.find(sig)
+        if slot is None:
+            self._insert(record_id, sig)
+            return None
+        self.counts[slot] += 1
+        return self.ids[slot]
+
+    def is_canonical(self, record_id: str) -> bool:
+        return record_id in self._slots or record_id in self._wordless
+
+    def duplicate_count(self, record_id: str) -> int:
+        slot = self._slots.get(record_id)
+        return 0 if slot is None else self.counts[slot]
+
+    def clusters(self) -> List[Tuple[str, int]]:
+        """(canonical id, duplicates) for every canonical record with duplicates, largest first"""
+        return sorted(((i, c) for i, c in zip(self.ids, self.counts) if c), key=lambda item: -item[1])
+
+    # ========== Persistence ==========
+
+    def save(self, prefix: str):
+        """Write <prefix>.npy (signatures) and <prefix>.json (ids, counts), atomically"""
+        tmp = prefix + ".npy.tmp"
+        with open(tmp, 'wb') as f:
+            np.save(f, self.signatures[:self._size])
+        os.replace(tmp, prefix + ".npy")
+
+        tmp = prefix + ".json.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({"threshold": self.threshold, "ids": self.ids, "counts": self.counts,
+                       "wordless": sorted(self._wordless)},
+                      f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, prefix + ".json")
+
+    @classmethod
+    def load(cls, prefix: str) -> "NearDuplicateIndex":
+        with open(prefix + ".json", 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        index = cls(data["threshold"])
+        for record_id, count, sig in zip(data["ids"], data["counts"], np.load(prefix + ".npy")):
+            index._insert(record_id, sig, count)
+        index._wordless.update(data.get("wordless", ()))
+        return index
+
+    @classmethod
+    def open(cls, prefix: str, threshold: float = DEFAULT_THRESHOLD) -> "NearDuplicateIndex":
+        """Load the index at prefix, or start an empty one if it does not exist yet
+
+        Its clusters were formed at the saved threshold, so opening it with
+        another one raises ValueError.
+        """
+        if not os.path.exists(prefix + ".json"):
+            return cls(threshold)
+        index = cls.load(prefix)
+        if index.threshold != threshold:
+            raise ValueError(f"{prefix}.json was built with threshold {index.threshold}, not {threshold}; "
+                             f"delete {prefix}.* to rebuild it at the new threshold")
+        return index
+
+
+# ========== Collapsing ==========
+
+def mark_duplicates(records: Iterable[Dict], index: NearDuplicateIndex, id_field: str = "post_id") -> Iterator[Dict]:
+    """Tag each near-duplicate record with "duplicate_of" (the canonical record's id)"""
+    for record in records:
+        canonical = index.add(record.get(id_field), record_text(record))
+        if canonical is not None:
+            record["duplicate_of"] = canonical
+        yield record
+
+
+def collapse(read_records, record_id=document_id, threshold: float = DEFAULT_THRESHOLD) -> Iterator[Dict]:
+    """Canonical records of a re-readable stream, with "duplicate_count" set
+
+    Two passes over read_records(): the first clusters the records, the
+    second yields the canonical ones. Clustering is deterministic, so records
+    tagged by mark_duplicates at crawl time end up in the same clusters.
+    Repeated ids count once (their first record) and are yielded once.
+    """
+    index = NearDuplicateIndex(threshold)
+    seen = set()
+    for record in read_records():
+        rid = record_id(record)
+        if rid not in seen:
+            seen.add(rid)
+            index.add(rid, record_text(record))
+
+    yielded = set()
+    for record in read_records():
+        rid = record_id(record)
+        if rid in yielded or not index.is_canonical(rid):
+            continue
+        yielded.add(rid)
+        record["duplicate_count"] = index.duplicate_count(rid)
+        yield record
+
+
+def main(argv: Optional[List[str]] = None):
+    from corpus_store import iter_documents
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("inputs", nargs="+", help="Dataset JSON/JSONL files (each is deduplicated on its own)")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Estimated Jaccard similarity of word 3-shingles to count as a duplicate")
+    parser.add_argument("--out", help="Write the canonical records (with duplicate_count) of the input to this JSONL")
+    parser.add_argument("--examples", type=int, default=3, help="Largest clusters to print per input")
+    args = parser.parse_args(argv)
+    if args.out and len(args.inputs) > 1:
+        parser.error("--out takes a single input")
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    for path in args.inputs:
+        started = time.perf_counter()
+        index = NearDuplicateIndex(args.threshold)
+        texts, seen, total = {}, set(), 0
+        for doc in iter_documents(path):
+            doc_id = document_id(doc)
+            total += 1
+            if doc_id in seen:
+                continue
+            seen.add(doc_id)
+            if index.add(doc_id, record_text(doc)) is None:
+                texts[doc_id] = record_text(doc)
+        seconds = time.perf_counter() - started
+
+        removed = index.duplicates
+        unique = len(seen)
+        print(f"📄 {os.path.basename(path)}: {total} records ({total - unique} repeated ids), "
+              f"{unique} distinct → {len(index)} canonical: {removed} near-duplicates removed "
+              f"({removed / max(unique, 1) * 100:.1f}%) in {len(index.clusters())} clusters, "
+              f"{total / seconds:.0f} records/s")
+        for canonical, count in index.clusters()[:args.examples]:
+            print(f"   ×{count + 1}: {texts[canonical][:100]!r}")
+
+        if args.out:
+            written = 0
+            with open(args.out, 'w', encoding='utf-8') as f:
+                for doc in collapse(lambda: iter_documents(path), document_id, args.threshold):
+                    f.write(json.dumps(doc, ensure_ascii=False) + "\n")
+                    written += 1
+            print(f"✅ {written} canonical records written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+import logging
+import random
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimited(Exception):
+    """An API call was rejected for exceeding a rate limit (HTTP 429 and friends)"""
+
+    def __init__(self, message: str = "", retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class QuotaExhausted(Exception):
+    """An API's quota is used up; no point retrying until it resets"""
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: `rate` tokens per second, bursts up to `capacity`.
+
+    Adapts to the server: `throttle()` after a 429 pauses the bucket and
+    halves the rate, and each `recover()` after a success adds back 1/50th
+    of the configured rate. Quota budgets (adaptive=False) are never throttled.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None, name: str = "",
+                 min_rate: Optional[float] = None, adaptive: bool = True):
+        self.name = name
+        self.adaptive = adaptive
+        self.base_rate = rate
+        self.rate = rate
+        self.min_rate = min_rate or rate / 16
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+
+        self.acquired = 0
+        self.waited_seconds = 0.0
+        self.throttled = 0
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """Block until `tokens` are available and take them; returns seconds waited
+
+        A cost above the capacity is taken in capacity-sized installments, so
+        it is still paid at the bucket's rate instead of failing.
+        """
+        waited = 0.0
+        while tokens > self.capacity:
+            waited += self._acquire(self.capacity)
+            tokens -= self.capacity
+        return waited + self._acquire(tokens)
+
+    def _acquire(self, tokens: float) -> float:
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now < self.paused_until:
+                    delay = self.paused_until - now
+                elif self.tokens >= tokens:
+                    self.tokens -= tokens
+                    self.acquired += 1
+                    self.waited_seconds += waited
+                    return waited
+                else:
+                    delay = (tokens - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def throttle(self, retry_after: Optional[float] = None):
+        """Back off after the server rejected a call for rate limiting"""
+        if not self.adaptive:
+            return
+        with self._lock:
+            now = time.monotonic()
+            # Calls already in flight when the first 429 arrived don't halve the rate again
+            if now >= self.paused_until:
+                self.rate = max(self.min_rate, self.rate / 2)
+            pause = retry_after if retry_after is not None else 1.0 / self.rate
+            self.paused_until = max(self.paused_until, now + pause)
+            self.tokens = 0.0
+            self.throttled += 1
+        logger.warning(f"{self.name} rate limited; pausing {pause:.2f}s, rate now {self.rate:.2f}/s")
+
+    def recover(self):
+        """Creep back towards the configured rate after a successful call"""
+        if self.rate < self.base_rate:
+            with self._lock:
+                self.rate = min(self.base_rate, self.rate + self.base_rate / 50)
+
+    def stats(self) -> Dict:
+        return {
+            "rate": round(self.rate, 3),
+            "acquired": self.acquired,
+            "waited_seconds": round(self.waited_seconds, 2),
+            "throttled": self.throttled,
+        }
+
+
+def call_limited(func: Callable, limits: Tuple[Tuple[TokenBucket, float], ...],
+                 classify: Callable[[Exception], Optional[Exception]], max_retries: int = 5):
+    """
+    Call `func` after taking tokens from each (bucket, cost) in `limits`.
+
+    `classify` maps API errors to RateLimited (retried after throttling the
+    buckets), QuotaExhausted (raised) or None (re-raised as is).
+    """
+    for attempt in range(max_retries + 1):
+        for bucket, cost in limits:
+            bucket.acquire(cost)
+        try:
+            result = func()
+        except Exception as e:
+            error = classify(e)
+            if error is None:
+                raise
+            if isinstance(error, QuotaExhausted) or attempt == max_retries:
+                raise error from e
+            for bucket, _ in limits:
+                bucket.throttle(error.retry_after)
+            if error.retry_after is None:
+                time.sleep(random.uniform(0, min(30.0, 0.5 * 2 ** attempt)))
+            continue
+
+        for bucket, _ in limits:
+            bucket.recover()
+        return result
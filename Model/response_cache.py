@@ -0,0 +1,98 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional
+
+import numpy as np
+
+
+def make_context_key(tata_vehicle: str, competitors: List[str], filters: Dict, top_k: int) -> Hashable:
+    """Responses are only reused for the same resolved vehicle, competitors, filters and top_k"""
+    return (tata_vehicle, tuple(competitors), json.dumps(filters, sort_keys=True), top_k)
+
+
+class SemanticResponseCache:
+    """
+    Response cache matched on query-embedding cosine similarity.
+
+    A lookup hits when a cached entry with the same context key has a query
+    embedding at least `threshold` similar to the incoming one and is younger
+    than `ttl` seconds. Entries are evicted least-recently-used beyond `maxsize`.
+    """
+
+    def __init__(self, threshold: float = 0.92, maxsize: int = 512, ttl: Optional[float] = 3600):
+        self.threshold = threshold
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()  # entry id -> (context key, unit vector, response, stored_at)
+        self._next_id = 0
+        self._fingerprint = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _unit(embedding) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(self, embedding, context: Hashable) -> Optional[Any]:
+        """Return the most similar cached response for this context, if close enough"""
+        query = self._unit(embedding)
+        now = time.monotonic()
+
+        with self._lock:
+            best_id, best_score = None, self.threshold
+            for entry_id, (entry_context, vector, _, stored_at) in list(self._entries.items()):
+                if self.ttl is not None and now - stored_at >= self.ttl:
+                    del self._entries[entry_id]
+                    continue
+                if entry_context != context:
+                    continue
+                score = float(vector @ query)
+                if score >= best_score:
+                    best_id, best_score = entry_id, score
+
+            if best_id is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(best_id)
+            self.hits += 1
+            return self._entries[best_id][2]
+
+    def store(self, embedding, context: Hashable, response: Any):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[self._next_id] = (context, self._unit(embedding), response, time.monotonic())
+            self._next_id += 1
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self):
+        """Drop every cached response (e.g. after the indexes were re-uploaded)"""
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def validate(self, fingerprint: Hashable):
+        """Invalidate when the underlying index fingerprint has changed"""
+        if self._fingerprint is not None and fingerprint != self._fingerprint:
+            self.invalidate()
+        self._fingerprint = fingerprint
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "threshold": self.threshold,
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
@@ -0,0 +1,298 @@
+"""
+Precomputed sentiment aggregates over the full corpus.
+
+Every document is counted into one cell per combination of
+
+    brand x city x aspect x intent x month
+
+where each dimension is either a concrete value or "*" (all values), so the
+sentiment of any slice (e.g. Tata Safari, Pune, every aspect, every month) is
+a single dictionary lookup. A cell holds the label counts and the sum of
+sentiment scores. Cells with aspect "*" use the document's sentiment; cells
+for a specific aspect use the sentiment attached to that aspect.
+
+The cube is updated document by document, so ingest can add new records to
+an existing cube without rebuilding it. A full build from a columnar corpus
+store (corpus_store.py) aggregates whole columns instead.
+
+Usage (from Model/):
+    python sentiment_cube.py ../Frontend/public/*_sentiment_dataset_*.json --out sentiment_cube.json
+    python sentiment_cube.py corpus/tata corpus/competitor --out sentiment_cube.json
+    python sentiment_cube.py tata_data.jsonl --out sentiment_cube.json --append
+"""
+
+import argparse
+import itertools
+import json
+import logging
+import os
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from corpus_store import CorpusStore, get_field, iter_documents
+
+logger = logging.getLogger(__name__)
+
+DIMENSIONS = ("brand", "city", "aspect", "intent", "month")
+ALL = "*"
+UNKNOWN = "unknown"
+LABELS = ("positive", "negative", "neutral")
+
+# Cell layout: [total, positive, negative, neutral, score_sum, scored]
+TOTAL, SCORE_SUM, SCORED = 0, 4, 5
+
+
+def document_dimensions(doc: Dict) -> Dict[str, str]:
+    """brand, city, intent and month of a dataset or pipeline record"""
+    city = get_field(doc, "location.city") or (get_field(doc, "location.final_location") or "").split(",")[0]
+    return {
+        "brand": doc.get("target_vehicle") or doc.get("vehicle_model") or UNKNOWN,
+        "city": city.strip() or UNKNOWN,
+        "intent": doc.get("intent") or UNKNOWN,
+        "month": (doc.get("timestamp") or "")[:7] or UNKNOWN,
+    }
+
+
+def empty_stats() -> Dict:
+    return {"total": 0, "positive": 0, "negative": 0, "neutral": 0,
+            "positive_pct": 0.0, "negative_pct": 0.0, "neutral_pct": 0.0, "mean_score": None}
+
+
+def cell_stats(cell: Optional[List[float]]) -> Dict:
+    """Counts, percentages and mean score of a cell, shaped like SentimentStats"""
+    if not cell or not cell[TOTAL]:
+        return empty_stats()
+    total = int(cell[TOTAL])
+    stats = {"total": total}
+    for i, label in enumerate(LABELS, 1):
+        stats[label] = int(cell[i])
+        stats[f"{label}_pct"] = round(cell[i] / total * 100, 1)
+    stats["mean_score"] = round(cell[SCORE_SUM] / cell[SCORED], 4) if cell[SCORED] else None
+    return stats
+
+
+def count_into(cell: List[float], label: Optional[str], score: Optional[float]):
+    """Add one labelled (and optionally scored) post to a cell"""
+    cell[TOTAL] += 1
+    label = (label or "neutral").lower()
+    cell[1 + LABELS.index(label if label in LABELS else "neutral")] += 1
+    if score is not None:
+        cell[SCORE_SUM] += score
+        cell[SCORED] += 1
+
+
+def merge_into(cells: Dict, key, cell: List[float]):
+    """Add the sums of `cell` to cells[key]"""
+    target = cells.get(key)
+    if target is None:
+        target = cells[key] = [0, 0, 0, 0, 0.0, 0]
+    for i, value in enumerate(cell):
+        target[i] += value
+
+
+# ========== Columnar stores ==========
+
+def _category_values(store: CorpusStore, name: str, transform=lambda value: value) -> np.ndarray:
+    """transform() of each row's category value (None where missing), computed once per category"""
+    values = [transform(value) for value in store.categories(name)]
+    return np.array(values + [None], dtype=object)[store.codes(name)]
+
+
+def store_brands(store: CorpusStore) -> np.ndarray:
+    """Brand of every row: target_vehicle, else vehicle_model, else UNKNOWN"""
+    target = _category_values(store, "target_vehicle")
+    brands = np.where(target.astype(bool), target, _category_values(store, "vehicle_model"))
+    brands[~brands.astype(bool)] = UNKNOWN
+    return brands
+
+
+def store_dimensions(store: CorpusStore) -> Dict[str, np.ndarray]:
+    """document_dimensions() for every row of a store, as object arrays"""
+    city = np.where(_category_values(store, "location.city").astype(bool),
+                    _category_values(store, "location.city", lambda value: value.strip() or UNKNOWN),
+                    _category_values(store, "location.final_location",
+                                     lambda value: value.split(",")[0].strip() or UNKNOWN))
+    city[~city.astype(bool)] = UNKNOWN
+
+    intent = _category_values(store, "intent")
+    intent[~intent.astype(bool)] = UNKNOWN
+    month = np.asarray(store.column("timestamp")).astype("datetime64[M]").astype(str).astype(object)
+    month[month == "NaT"] = UNKNOWN
+    return {"brand": store_brands(store), "city": city, "intent": intent, "month": month}
+
+
+def store_cells(store: CorpusStore) -> np.ndarray:
+    """One cell-layout row per document, counting its overall sentiment"""
+    labels = [(label or "neutral").lower() for label in store.categories("sentiment.label")]
+    neutral = LABELS.index("neutral")
+    index = np.array([LABELS.index(label) if label in LABELS else neutral for label in labels] + [neutral])
+    scores = np.asarray(store.column("sentiment.score"), dtype=np.float64)
+    scored = ~np.isnan(scores)
+
+    cells = np.zeros((len(store), 6))
+    cells[:, TOTAL] = 1
+    cells[np.arange(len(store)), 1 + index[store.codes("sentiment.label")]] = 1
+    cells[scored, SCORE_SUM] = scores[scored]
+    cells[:, SCORED] = scored
+    return cells
+
+
+def group_rows(columns: Sequence[np.ndarray], cells: np.ndarray) -> Tuple[List[tuple], np.ndarray, List[List[float]]]:
+    """Distinct value combinations of the columns, each row's group, and the summed cells per group"""
+    uniques, codes = zip(*(np.unique(column, return_inverse=True) for column in columns))
+    combinations, inverse = np.unique(np.stack([c.reshape(-1) for c in codes], axis=1), axis=0, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    uniques = [values.tolist() for values in uniques]
+    groups = [tuple(values[code] for values, code in zip(uniques, row)) for row in combinations]
+    sums = np.stack([np.bincount(inverse, weights=cells[:, i], minlength=len(groups)) for i in range(6)], axis=1)
+    sums = [[int(v) for v in row[:SCORE_SUM]] + [float(row[SCORE_SUM]), int(row[SCORED])] for row in sums]
+    return groups, inverse, sums
+
+
+class SentimentCube:
+    """Label counts and score sums for every roll-up of the cube dimensions"""
+
+    def __init__(self):
+        self.cells: Dict[tuple, List[float]] = {}
+        self.values: Dict[str, set] = {dimension: set() for dimension in DIMENSIONS}
+        self.documents = 0
+
+    def _count(self, key: tuple, label: Optional[str], score: Optional[float]):
+        cell = self.cells.get(key)
+        if cell is None:
+            cell = self.cells[key] = [0, 0, 0, 0, 0.0, 0]
+        count_into(cell, label, score)
+
+    def add(self, doc: Dict):
+        """Count one document into every cell it belongs to"""
+        dims = document_dimensions(doc)
+        sentiment = doc.get("sentiment") or {}
+        entries = [(ALL, sentiment.get("label"), sentiment.get("score"))]
+        for aspect in doc.get("aspects") or []:
+            if aspect.get("aspect"):
+                entries.append((aspect["aspect"], aspect.get("sentiment"), aspect.get("score")))
+                self.values["aspect"].add(aspect["aspect"])
+        for dimension, value in dims.items():
+            self.values[dimension].add(value)
+
+        choices = [(dims[d], ALL) for d in ("brand", "city", "intent", "month")]
+        for brand, city, intent, month in itertools.product(*choices):
+            for aspect, label, score in entries:
+                self._count((brand, city, aspect, intent, month), label, score)
+        self.documents += 1
+
+    def add_many(self, docs: Iterable[Dict]) -> int:
+        added = 0
+        for doc in docs:
+            self.add(doc)
+            added += 1
+        return added
+
+    def add_store(self, store: CorpusStore) -> int:
+        """Count every document of a columnar store, reading only the columns the cube uses
+
+        Rows are grouped by (brand, city, intent, month) first, so each roll-up
+        cell is updated once per group rather than once per document.
+        """
+        if not len(store):
+            return 0
+        dims = store_dimensions(store)
+        groups, inverse, sums = group_rows([dims[d] for d in ("brand", "city", "intent", "month")],
+                                           store_cells(store))
+
+        aspects = store.column("aspects")
+        aspect_cells: Dict[tuple, List[float]] = {}  # (group, aspect) -> cell
+        for row in np.flatnonzero(np.diff(aspects.offsets) > 0):
+            for aspect in aspects[row]:
+                if aspect.get("aspect"):
+                    cell = aspect_cells.setdefault((int(inverse[row]), aspect["aspect"]), [0, 0, 0, 0, 0.0, 0])
+                    count_into(cell, aspect.get("sentiment"), aspect.get("score"))
+
+        entries = [(group, ALL, cell) for group, cell in enumerate(sums)]
+        entries += [(group, aspect, cell) for (group, aspect), cell in aspect_cells.items()]
+        for group, aspect, cell in entries:
+            choices = [(value, ALL) for value in groups[group]]
+            for brand, city, intent, month in itertools.product(*choices):
+                merge_into(self.cells, (brand, city, aspect, intent, month), cell)
+
+        for dimension, column in dims.items():
+            self.values[dimension].update(np.unique(column).tolist())
+        self.values["aspect"].update(aspect for _, aspect in aspect_cells)
+        self.documents += len(store)
+        return len(store)
+
+    # ========== Queries ==========
+
+    def stats(self, brand: str = ALL, city: str = ALL, aspect: str = ALL,
+              intent: str = ALL, month: str = ALL) -> Dict:
+        """Exact sentiment stats of one slice (ALL = every value of that dimension)"""
+        return cell_stats(self.cells.get((brand, city, aspect, intent, month)))
+
+    def group_by(self, dimension: str, **scope) -> Dict[str, Dict]:
+        """Stats of the slice for each value of `dimension`, skipping empty groups"""
+        if dimension not in DIMENSIONS:
+            raise ValueError(f"Unknown dimension: {dimension}")
+        groups = {}
+        for value in sorted(self.values[dimension]):
+            stats = self.stats(**{**scope, dimension: value})
+            if stats["total"]:
+                groups[value] = stats
+        return groups
+
+    # ========== Persistence ==========
+
+    def save(self, path: str):
+        """Write the cube as JSON (atomically)"""
+        data = {
+            "dimensions": DIMENSIONS,
+            "documents": self.documents,
+            "cells": [[*key, *cell] for key, cell in self.cells.items()],
+        }
+        tmp = path + ".tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "SentimentCube":
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if tuple(data["dimensions"]) != DIMENSIONS:
+            raise ValueError(f"{path} has dimensions {data['dimensions']}, expected {list(DIMENSIONS)}")
+
+        cube = cls()
+        cube.documents = data["documents"]
+        size = len(DIMENSIONS)
+        for row in data["cells"]:
+            key = tuple(row[:size])
+            cube.cells[key] = row[size:]
+            for dimension, value in zip(DIMENSIONS, key):
+                if value != ALL:
+                    cube.values[dimension].add(value)
+        return cube
+
+    @classmethod
+    def open(cls, path: str) -> "SentimentCube":
+        """Load the cube at path, or start an empty one if it does not exist yet"""
+        return cls.load(path) if os.path.exists(path) else cls()
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("inputs", nargs="+", help="Dataset JSON/JSONL files or corpus store directories")
+    parser.add_argument("--out", default="sentiment_cube.json")
+    parser.add_argument("--append", action="store_true",
+                        help="Add the inputs to an existing cube (only pass records not counted before)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    cube = SentimentCube.open(args.out) if args.append else SentimentCube()
+    added = sum(cube.add_store(CorpusStore(path)) if os.path.isdir(path) else cube.add_many(iter_documents(path))
+                for path in args.inputs)
+    cube.save(args.out)
+    print(f"✅ {added} documents added ({cube.documents} total), {len(cube.cells)} cells in {args.out}")
+
+
+if __name__ == "__main__":
+    main()
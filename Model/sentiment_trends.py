@@ -0,0 +1,222 @@
+"""
+Per-brand daily sentiment buckets for trend queries.
+
+Each ingested post adds to one (brand, day) bucket holding label counts and
+the sum of sentiment scores, so keeping the history current costs O(1) per
+post. Day, week and month series, and the trailing 7- and 30-day rolling mean
+score at the end of each period, are read off prefix sums over the buckets
+in the requested range.
+
+Usage (from Model/):
+    python sentiment_trends.py ../Frontend/public/*_sentiment_dataset_*.json --out sentiment_trends.json
+    python sentiment_trends.py corpus/tata corpus/competitor --out sentiment_trends.json
+    python sentiment_trends.py tata_data.jsonl --out sentiment_trends.json --append
+"""
+
+import argparse
+import json
+import logging
+import os
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from corpus_store import CorpusStore, iter_documents
+from sentiment_cube import LABELS, UNKNOWN, group_rows, merge_into, store_brands, store_cells
+
+logger = logging.getLogger(__name__)
+
+GRANULARITIES = ("day", "week", "month")
+ROLLING_WINDOWS = (7, 30)
+
+# Bucket layout: [total, positive, negative, neutral, score_sum, scored]
+TOTAL, POSITIVE, SCORE_SUM, SCORED = 0, 1, 4, 5
+
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def period_start(day: date, granularity: str) -> date:
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())  # ISO weeks start on Monday
+    if granularity == "month":
+        return day.replace(day=1)
+    return day
+
+
+def period_label(start: date, granularity: str) -> str:
+    return start.strftime("%Y-%m") if granularity == "month" else start.isoformat()
+
+
+class SentimentTrends:
+    """Daily sentiment buckets per brand"""
+
+    def __init__(self):
+        self.buckets: Dict[str, Dict[int, List[float]]] = {}  # brand -> day ordinal -> bucket
+        self.documents = 0
+        self.skipped = 0  # posts without a usable timestamp
+
+    @property
+    def brands(self) -> List[str]:
+        return sorted(self.buckets)
+
+    def date_range(self, brands: Iterable[str]) -> Optional[Tuple[date, date]]:
+        """First and last day with posts across the given brands"""
+        ordinals = [ordinal for brand in brands for ordinal in (self.buckets.get(brand) or {})]
+        if not ordinals:
+            return None
+        return date.fromordinal(min(ordinals)), date.fromordinal(max(ordinals))
+
+    def add(self, doc: Dict):
+        try:
+            day = date.fromisoformat((doc.get("timestamp") or "")[:10])
+        except ValueError:
+            self.skipped += 1
+            return
+
+        brand = doc.get("target_vehicle") or doc.get("vehicle_model") or UNKNOWN
+        days = self.buckets.setdefault(brand, {})
+        bucket = days.get(day.toordinal())
+        if bucket is None:
+            bucket = days[day.toordinal()] = [0, 0, 0, 0, 0.0, 0]
+
+        sentiment = doc.get("sentiment") or {}
+        label = (sentiment.get("label") or "neutral").lower()
+        bucket[TOTAL] += 1
+        bucket[1 + LABELS.index(label if label in LABELS else "neutral")] += 1
+        if sentiment.get("score") is not None:
+            bucket[SCORE_SUM] += sentiment["score"]
+            bucket[SCORED] += 1
+        self.documents += 1
+
+    def add_many(self, docs: Iterable[Dict]) -> int:
+        added = 0
+        for doc in docs:
+            self.add(doc)
+            added += 1
+        return added
+
+    def add_store(self, store: CorpusStore) -> int:
+        """Add every document of a columnar store, reading only its brand, timestamp and sentiment columns"""
+        if not len(store):
+            return 0
+        days = np.asarray(store.column("timestamp")).astype("datetime64[D]")
+        dated = ~np.isnat(days)
+        ordinals = days[dated].astype(np.int64) + EPOCH_ORDINAL
+        if dated.any():
+            groups, _, sums = group_rows([store_brands(store)[dated], ordinals], store_cells(store)[dated])
+            for (brand, ordinal), bucket in zip(groups, sums):
+                merge_into(self.buckets.setdefault(brand, {}), ordinal, bucket)
+
+        self.documents += int(dated.sum())
+        self.skipped += int((~dated).sum())
+        return len(store)
+
+    # ========== Queries ==========
+
+    def series(self, brand: str, granularity: str = "month",
+               start: Optional[date] = None, end: Optional[date] = None) -> List[Dict]:
+        """One point per period between start and end (default: the brand's first and last post)
+
+        Empty periods are included with a total of 0 so series of different
+        brands line up. rolling_7d / rolling_30d are the mean score over the
+        7 / 30 days up to the last day of the period.
+        """
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"Unknown granularity: {granularity}")
+        days = self.buckets.get(brand)
+        if not days:
+            return []
+
+        first = start.toordinal() if start else min(days)
+        last = end.toordinal() if end else max(days)
+        if first > last:
+            return []
+
+        # Dense daily arrays from the start of the earliest rolling window
+        origin = first - max(ROLLING_WINDOWS)
+        dense = np.zeros((last - origin + 1, 6))
+        for ordinal, bucket in days.items():
+            if origin <= ordinal <= last:
+                dense[ordinal - origin] = bucket
+        cumulative = np.vstack([np.zeros((1, 6)), np.cumsum(dense, axis=0)])
+
+        def window(lo: int, hi: int) -> List[float]:
+            """Sums over day ordinals lo..hi inclusive"""
+            return (cumulative[hi - origin + 1] - cumulative[max(lo, origin) - origin]).tolist()
+
+        points = []
+        period = period_start(date.fromordinal(first), granularity)
+        while period.toordinal() <= last:
+            if granularity == "month":
+                following = (period.replace(day=28) + timedelta(days=4)).replace(day=1)
+            else:
+                following = period + timedelta(days=1 if granularity == "day" else 7)
+            lo, hi = max(period.toordinal(), first), min(following.toordinal() - 1, last)
+
+            sums = window(lo, hi)
+            total = int(sums[TOTAL])
+            point = {"period": period_label(period, granularity), "total": total}
+            for i, label in enumerate(LABELS, POSITIVE):
+                point[label] = int(sums[i])
+            point["positive_pct"] = round(sums[POSITIVE] / total * 100, 1) if total else None
+            point["mean_score"] = round(sums[SCORE_SUM] / sums[SCORED], 4) if sums[SCORED] else None
+            for size in ROLLING_WINDOWS:
+                rolling = window(hi - size + 1, hi)
+                point[f"rolling_{size}d"] = round(rolling[SCORE_SUM] / rolling[SCORED], 4) if rolling[SCORED] else None
+            points.append(point)
+            period = following
+        return points
+
+    # ========== Persistence ==========
+
+    def save(self, path: str):
+        """Write the buckets as JSON (atomically)"""
+        data = {
+            "documents": self.documents,
+            "skipped": self.skipped,
+            "brands": {brand: {date.fromordinal(ordinal).isoformat(): bucket
+                               for ordinal, bucket in sorted(days.items())}
+                       for brand, days in self.buckets.items()},
+        }
+        tmp = path + ".tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "SentimentTrends":
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        trends = cls()
+        trends.documents = data["documents"]
+        trends.skipped = data.get("skipped", 0)
+        trends.buckets = {brand: {date.fromisoformat(day).toordinal(): bucket for day, bucket in days.items()}
+                          for brand, days in data["brands"].items()}
+        return trends
+
+    @classmethod
+    def open(cls, path: str) -> "SentimentTrends":
+        """Load the buckets at path, or start empty if the file does not exist yet"""
+        return cls.load(path) if os.path.exists(path) else cls()
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("inputs", nargs="+", help="Dataset JSON/JSONL files or corpus store directories")
+    parser.add_argument("--out", default="sentiment_trends.json")
+    parser.add_argument("--append", action="store_true",
+                        help="Add the inputs to existing buckets (only pass records not counted before)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    trends = SentimentTrends.open(args.out) if args.append else SentimentTrends()
+    added = sum(trends.add_store(CorpusStore(path)) if os.path.isdir(path) else trends.add_many(iter_documents(path))
+                for path in args.inputs)
+    trends.save(args.out)
+    print(f"✅ {added} documents added ({trends.documents} total, {trends.skipped} without timestamp), "
+          f"{len(trends.brands)} brands in {args.out}")
+
+
+if __name__ == "__main__":
+    main()
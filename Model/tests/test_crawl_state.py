@@ -0,0 +1,81 @@
+import pytest
+
+from crawl_state import MAX_PARAMS, CrawlState
+from web_scrapping import TataDataPipeline
+
+
+@pytest.fixture
+def state(tmp_path):
+    state = CrawlState(str(tmp_path / "crawl_state.db"))
+    yield state
+    state.close()
+
+
+def test_watermarks_only_move_forward_and_persist(state, tmp_path):
+    state.update_watermarks({"reddit:r/CarsIndia:safari": "2025-03-01T10:00:00Z"})
+    state.update_watermarks({"reddit:r/CarsIndia:safari": "2025-02-01T10:00:00Z",
+                             "youtube:video:abc": "2025-01-05T00:00:00Z"})
+    assert state.watermark("reddit:r/CarsIndia:safari") == "2025-03-01T10:00:00Z"
+    state.close()
+
+    reopened = CrawlState(str(tmp_path / "crawl_state.db"))
+    assert reopened.watermark("youtube:video:abc") == "2025-01-05T00:00:00Z"
+    assert reopened.watermark("youtube:video:other") is None
+    assert reopened.stats()["sources"] == 2
+    reopened.close()
+
+
+def test_seen_ids_are_per_platform(state):
+    posts = [{"platform": "reddit", "post_id": f"p{i}"} for i in range(MAX_PARAMS + 50)]
+    state.mark_seen(posts[:MAX_PARAMS + 10])
+    state.mark_seen(posts[:5])  # marking again is a no-op
+    new = state.filter_new(posts + [{"platform": "youtube", "post_id": "p1"}])
+    assert [post["post_id"] for post in new] == [f"p{i}" for i in range(MAX_PARAMS + 10, MAX_PARAMS + 50)] + ["p1"]
+    assert state.stats()["seen"] == {"reddit": MAX_PARAMS + 10}
+
+
+def comment(comment_id, published):
+    return {"id": comment_id, "snippet": {"topLevelComment": {"snippet": {
+        "publishedAt": published, "authorDisplayName": "user", "textDisplay": "nice car", "likeCount": 0}}}}
+
+
+def pipeline_with_pages(state, pages):
+    """A pipeline whose YouTube calls return the given commentThreads pages (an Exception is raised)"""
+    pipeline = TataDataPipeline("id", "secret", "key", state=state, youtube_options={"static_discovery": True})
+    pages = list(pages)
+
+    def call_youtube(func, cost):
+        page = pages.pop(0)
+        if isinstance(page, Exception):
+            raise page
+        return page
+
+    pipeline.call_youtube = call_youtube
+    return pipeline
+
+
+def test_incremental_paging_stops_at_the_previous_watermark(state):
+    state.update_watermarks({"youtube:video:v1": "2025-03-01T00:00:00Z"})
+    pipeline = pipeline_with_pages(state, [
+        {"items": [comment("c3", "2025-03-03T00:00:00Z"), comment("c2", "2025-03-02T00:00:00Z")],
+         "nextPageToken": "page2"},
+        {"items": [comment("c1", "2025-02-28T00:00:00Z")], "nextPageToken": "page3"},
+    ])
+    comments = pipeline.fetch_video_comments("v1", "Safari review", max_comments=100)
+    assert [c["post_id"] for c in comments] == ["c3", "c2"]
+
+    # The new watermark waits for the run to save its data
+    assert pipeline.pending_watermarks == {"youtube:video:v1": "2025-03-03T00:00:00Z"}
+    assert state.watermark("youtube:video:v1") == "2025-03-01T00:00:00Z"
+    state.update_watermarks(pipeline.pending_watermarks)
+    assert state.watermark("youtube:video:v1") == "2025-03-03T00:00:00Z"
+
+
+def test_video_failing_part_way_keeps_its_watermark(state):
+    pipeline = pipeline_with_pages(state, [
+        {"items": [comment("c2", "2025-03-02T00:00:00Z")], "nextPageToken": "page2"},
+        RuntimeError("connection reset"),
+    ])
+    with pytest.raises(RuntimeError):
+        pipeline.fetch_video_comments("v1", "Safari review", max_comments=100)
+    assert pipeline.pending_watermarks == {}
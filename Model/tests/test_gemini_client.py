@@ -0,0 +1,36 @@
+import asyncio
+import json
+
+import httpx
+
+from gemini_client import GeminiClient
+from metrics import GEMINI_TOKENS_TOTAL
+
+
+def sse(chunks):
+    return "".join(f"data: {json.dumps(chunk)}\r\n\r\n" for chunk in chunks)
+
+
+def test_stream_counts_cumulative_usage_once():
+    words = ["Safari", " sells", " well"]
+    # Like Gemini, each chunk repeats the usage so far
+    chunks = [{"candidates": [{"content": {"parts": [{"text": word}]}}],
+               "usageMetadata": {"promptTokenCount": 12, "candidatesTokenCount": i + 1}}
+              for i, word in enumerate(words)]
+
+    def handler(request):
+        return httpx.Response(200, text=sse(chunks), headers={"content-type": "text/event-stream"})
+
+    async def run():
+        client = GeminiClient("key", "model")
+        await client.aclose()
+        client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        try:
+            return [text async for text in client.stream("How is the Safari doing?")]
+        finally:
+            await client.aclose()
+
+    prompt, output = GEMINI_TOKENS_TOTAL.value(kind="prompt"), GEMINI_TOKENS_TOTAL.value(kind="output")
+    assert asyncio.run(run()) == words
+    assert GEMINI_TOKENS_TOTAL.value(kind="prompt") - prompt == 12
+    assert GEMINI_TOKENS_TOTAL.value(kind="output") - output == 3
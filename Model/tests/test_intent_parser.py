@@ -0,0 +1,63 @@
+import pytest
+
+from intent_parser import IntentParser
+
+COMPETITOR_MAPPING = {
+    "safari": ["Mahindra XUV700", "Hyundai Alcazar", "MG Hector Plus"],
+    "harrier": ["Jeep Compass", "MG Hector", "Hyundai Tucson"],
+}
+
+
+@pytest.fixture
+def parser():
+    return IntentParser(COMPETITOR_MAPPING)
+
+
+def test_vehicle_city_and_sentiment_become_filters(parser):
+    assert parser.parse("Negative feedback on the Harrier in Bengaluru") == {
+        "tata_vehicle": "harrier",
+        "competitors": ["Jeep Compass", "MG Hector", "Hyundai Tucson"],
+        "embedding_query": "Negative feedback on the Harrier in Bengaluru",
+        "filter": {"location": "Bangalore, India", "sentiment_label": "negative"},
+    }
+
+
+def test_named_competitors_replace_the_default_set(parser):
+    result = parser.parse("how is safari doing vs xuv 700 and alcazar")
+    assert result["tata_vehicle"] == "safari"
+    assert result["competitors"] == ["Mahindra XUV700", "Hyundai Alcazar"]
+    assert result["filter"] == {}
+
+
+def test_longest_alias_wins(parser):
+    assert parser.parse("safari or hector plus?")["competitors"] == ["MG Hector Plus"]
+
+
+def test_vehicle_is_inferred_from_its_competitors(parser):
+    result = parser.parse("what do people think of the jeep compass")
+    assert result["tata_vehicle"] == "harrier"
+    assert result["embedding_query"] == "Tata Harrier what do people think of the jeep compass"
+
+
+def test_query_without_a_vehicle_defaults_to_safari(parser):
+    result = parser.parse("overall customer feedback")
+    assert result["tata_vehicle"] == "safari"
+    assert result["competitors"] == COMPETITOR_MAPPING["safari"]
+
+
+@pytest.mark.parametrize("query", [
+    "compare safari and harrier",                      # two Tata vehicles
+    "harrier reviews in pune and mumbai",              # two cities
+    "positive and negative safari feedback",           # two sentiments
+    "safari feedback from Guwahati",                   # a place we cannot normalise
+    "xuv700 vs compass",                               # competitors of different vehicles
+])
+def test_ambiguous_queries_escalate(parser, query):
+    assert parser.parse(query) is None
+
+
+def test_stats_count_rule_hits_and_escalations(parser):
+    parser.parse("harrier in pune")
+    parser.parse("compare safari and harrier")
+    parser.parse("safari near Mumbai")
+    assert parser.stats() == {"rule_hits": 2, "llm_escalations": 1, "llm_skip_rate": round(2 / 3, 4)}
@@ -0,0 +1,85 @@
+import random
+
+import numpy as np
+import pytest
+
+from vector_store import MetadataIndex
+
+VALUES = {
+    "brand": ["Tata Safari", "Tata Harrier", "Mahindra XUV700", None],
+    "location": ["Pune, India", "Mumbai, India", "Delhi, India", None],
+    "sentiment_label": ["positive", "negative", "neutral"],
+    "platform": ["reddit", "youtube"],
+    "duplicate_count": [0, 1, 2],  # no bitmap: answered from the metadata column
+}
+
+
+def make_metadata(n, rng):
+    rows = []
+    for _ in range(n):
+        meta = {field: rng.choice(values) for field, values in VALUES.items()}
+        rows.append({field: value for field, value in meta.items() if value is not None})
+    return rows
+
+
+def random_condition(field, rng):
+    values = [v for v in VALUES[field] if v is not None] + ["never seen"]
+    op = rng.choice(["plain", "$eq", "$ne", "$in", "$nin"])
+    if op == "plain":
+        return rng.choice(values)
+    if op in ("$in", "$nin"):
+        return {op: rng.sample(values, rng.randint(1, 3))}
+    return {op: rng.choice(values)}
+
+
+def random_filter(rng, depth=0):
+    flt = {field: random_condition(field, rng) for field in rng.sample(list(VALUES), rng.randint(1, 2))}
+    if depth < 2 and rng.random() < 0.4:
+        flt[rng.choice(["$and", "$or"])] = [random_filter(rng, depth + 1) for _ in range(rng.randint(1, 3))]
+    return flt
+
+
+def matches(meta, flt):
+    """Brute-force evaluation of a Pinecone-style filter on one record"""
+    for field, condition in flt.items():
+        if field == "$and":
+            ok = all(matches(meta, sub) for sub in condition)
+        elif field == "$or":
+            ok = any(matches(meta, sub) for sub in condition)
+        else:
+            value = meta.get(field)
+            if not isinstance(condition, dict):
+                condition = {"$eq": condition}
+            ok = all({"$eq": value == target, "$ne": value != target,
+                      "$in": value in target if op == "$in" else False,
+                      "$nin": value not in target if op == "$nin" else False}[op]
+                     for op, target in condition.items())
+        if not ok:
+            return False
+    return True
+
+
+@pytest.fixture(scope="module")
+def metadata():
+    return make_metadata(1001, random.Random(0))  # not a multiple of 8, so packed bitmaps have padding
+
+
+def test_bitmaps_agree_with_brute_force_filtering(metadata):
+    index = MetadataIndex(metadata)
+    rng = random.Random(1)
+    for _ in range(300):
+        flt = random_filter(rng)
+        expected = np.array([matches(meta, flt) for meta in metadata])
+        assert np.array_equal(index.mask(flt), expected), flt
+        assert index.count(flt) == expected.sum(), flt
+        assert index.estimate(flt) >= expected.sum(), flt
+
+
+def test_no_filter_and_unknown_values(metadata):
+    index = MetadataIndex(metadata)
+    assert index.mask(None) is None and index.mask({}) is None
+    assert index.count(None) == len(metadata)
+    assert index.estimate({"brand": "Tata Nexon"}) == 0
+    assert index.count({"brand": {"$ne": "Tata Nexon"}}) == len(metadata)
+    with pytest.raises(ValueError):
+        index.mask({"brand": {"$gt": "Tata"}})
@@ -0,0 +1,92 @@
+import json
+
+import pytest
+
+from near_duplicates import NearDuplicateIndex, collapse, document_id
+from vector_store import LocalIndex, iter_canonical_records
+
+REVIEW = ("The Harrier has a punchy diesel engine and the ride quality on broken roads is excellent, "
+          "but the infotainment screen lags and the service center in Pune took two weeks for a simple fix")
+EDITED = REVIEW + " true"
+OTHER = ("Safari waiting period in Mumbai is almost three months now and the dealer keeps changing "
+         "the delivery date, I am thinking of cancelling the booking and going for the XUV700 instead")
+
+
+def records():
+    # "b" is a near-duplicate of "a" and appears twice; "c" is unrelated
+    return [
+        {"source_id": "a", "content": REVIEW, "embedding": [1.0, 0.0]},
+        {"source_id": "b", "content": EDITED, "embedding": [0.9, 0.1]},
+        {"source_id": "c", "content": OTHER, "embedding": [0.0, 1.0]},
+        {"source_id": "b", "content": EDITED, "embedding": [0.9, 0.1]},
+        {"source_id": "a", "content": REVIEW, "embedding": [1.0, 0.0]},
+    ]
+
+
+def write_jsonl(path, rows):
+    with open(path, "w", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(row) + "\n")
+    return str(path)
+
+
+def test_near_duplicate_joins_the_first_record():
+    index = NearDuplicateIndex()
+    assert index.add("a", REVIEW) is None
+    assert index.add("b", EDITED) == "a"
+    assert index.add("c", OTHER) is None
+    assert index.clusters() == [("a", 1)]
+    assert len(index) == 2
+
+
+def test_repeated_ids_count_once():
+    collapsed = list(collapse(records))
+    assert [doc["source_id"] for doc in collapsed] == ["a", "c"]
+    assert [doc["duplicate_count"] for doc in collapsed] == [1, 0]
+
+
+def test_collapse_matches_canonical_records(tmp_path):
+    path = write_jsonl(tmp_path / "embedded.jsonl", records())
+    duplicates = NearDuplicateIndex()
+    canonical = [post["source_id"] for post in iter_canonical_records(path, duplicates)]
+    counts = {doc["source_id"]: doc["duplicate_count"] for doc in collapse(records)}
+    assert canonical == list(counts)
+    assert counts == {post_id: duplicates.duplicate_count(post_id) for post_id in canonical}
+
+
+def test_local_index_can_keep_duplicates(tmp_path):
+    path = write_jsonl(tmp_path / "embedded.jsonl", records())
+    assert sorted(LocalIndex.from_jsonl(path).ids) == ["a", "c"]
+    assert sorted(LocalIndex.from_jsonl(path, collapse_duplicates=False).ids) == ["a", "b", "c"]
+
+
+def test_document_id_falls_back_to_a_content_hash():
+    assert document_id({"post_id": "p1", "content": REVIEW}) == "p1"
+    assert document_id({"content": REVIEW}) == document_id({"content": REVIEW})
+    assert document_id({"content": REVIEW}) != document_id({"content": OTHER})
+
+
+def test_empty_posts_are_not_duplicates_of_each_other():
+    index = NearDuplicateIndex()
+    assert index.add("e1", "") is None
+    assert index.add("e2", "👍👍") is None
+    assert index.add("a", REVIEW) is None
+    assert index.is_canonical("e1") and index.is_canonical("e2")
+    assert index.duplicates == 0
+    rows = [{"source_id": "e1", "content": ""}, {"source_id": "e2", "content": ""}]
+    assert [doc["source_id"] for doc in collapse(lambda: rows)] == ["e1", "e2"]
+
+
+def test_open_keeps_the_saved_index_and_rejects_another_threshold(tmp_path):
+    prefix = str(tmp_path / "duplicates")
+    index = NearDuplicateIndex(0.9)
+    index.add("a", REVIEW)
+    index.add("b", EDITED)
+    index.add("e", "")
+    index.save(prefix)
+
+    reopened = NearDuplicateIndex.open(prefix, 0.9)
+    assert reopened.clusters() == [("a", 1)]
+    assert reopened.add("e", "") is None and reopened.is_canonical("e")
+    with pytest.raises(ValueError, match="threshold"):
+        NearDuplicateIndex.open(prefix, 0.8)
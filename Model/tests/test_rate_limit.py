@@ -0,0 +1,18 @@
+import time
+
+from rate_limit import TokenBucket
+
+
+def test_cost_above_capacity_is_paid_in_installments():
+    bucket = TokenBucket(rate=200, capacity=2, name="test")
+    started = time.monotonic()
+    bucket.acquire(12)  # e.g. a 1200-post Reddit search: 12 listing pages with capacity 2
+    elapsed = time.monotonic() - started
+    # The first 2 tokens are already there; the other 10 refill at 200/s
+    assert 10 / 200 * 0.9 <= elapsed < 1.0
+    assert bucket.tokens < 1
+
+
+def test_cost_within_capacity_does_not_wait():
+    bucket = TokenBucket(rate=1, capacity=10, name="test")
+    assert bucket.acquire(10) == 0.0
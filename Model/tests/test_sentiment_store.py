@@ -0,0 +1,49 @@
+import json
+
+from corpus_store import CorpusStore, convert
+from sentiment_cube import SentimentCube
+from sentiment_trends import SentimentTrends
+
+
+def documents():
+    # Dyadic scores, so sums do not depend on the order they are added in
+    return [
+        {"source_id": "1", "target_vehicle": "Tata Harrier", "vehicle_model": "Harrier", "intent": "complaint",
+         "timestamp": "2025-03-02T10:00:00Z", "location": {"city": "Pune"},
+         "sentiment": {"label": "Negative", "score": -0.5},
+         "aspects": [{"aspect": "service", "sentiment": "negative", "score": -0.75}]},
+        {"source_id": "2", "vehicle_model": "Tata Safari", "timestamp": "2025-03-20T08:00:00Z",
+         "location": {"final_location": "Mumbai, Maharashtra"}, "sentiment": {"label": "positive", "score": 0.25}},
+        {"source_id": "3", "target_vehicle": "Tata Harrier", "intent": "praise", "timestamp": "2025-04-01T00:00:00Z",
+         "location": {"city": "Pune"}, "sentiment": {"label": "positive", "score": 0.5},
+         "aspects": [{"aspect": "engine", "sentiment": "positive", "score": 0.5},
+                     {"aspect": "service", "sentiment": "neutral"}]},
+        {"source_id": "4", "sentiment": {"label": "mixed"}},
+    ]
+
+
+def store(tmp_path):
+    path = str(tmp_path / "docs.jsonl")
+    with open(path, "w", encoding="utf-8") as f:
+        f.writelines(json.dumps(doc) + "\n" for doc in documents())
+    convert([path], str(tmp_path / "store"))
+    return CorpusStore(str(tmp_path / "store"))
+
+
+def test_cube_from_store_matches_documents(tmp_path):
+    expected = SentimentCube()
+    expected.add_many(documents())
+    cube = SentimentCube()
+    assert cube.add_store(store(tmp_path)) == 4
+    assert cube.cells == expected.cells
+    assert cube.values == expected.values
+    assert cube.documents == expected.documents
+
+
+def test_trends_from_store_matches_documents(tmp_path):
+    expected = SentimentTrends()
+    expected.add_many(documents())
+    trends = SentimentTrends()
+    trends.add_store(store(tmp_path))
+    assert trends.buckets == expected.buckets
+    assert (trends.documents, trends.skipped) == (expected.documents, expected.skipped) == (3, 1)
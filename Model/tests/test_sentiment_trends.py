@@ -0,0 +1,71 @@
+from datetime import date
+
+import pytest
+
+from sentiment_trends import SentimentTrends
+
+
+def post(day, label, score):
+    return {"target_vehicle": "Tata Safari", "timestamp": f"{day}T12:00:00Z",
+            "sentiment": {"label": label, "score": score}}
+
+
+@pytest.fixture
+def trends():
+    trends = SentimentTrends()
+    # Thursday and Sunday of one ISO week, the Monday after it, and a day in March
+    trends.add_many([post("2025-01-30", "positive", 1.0), post("2025-02-02", "negative", -1.0),
+                     post("2025-02-03", "positive", 0.5), post("2025-03-05", "neutral", 0.0)])
+    trends.add({"target_vehicle": "Tata Safari", "timestamp": "", "sentiment": {"label": "positive"}})
+    return trends
+
+
+def points(trends, granularity, **kwargs):
+    return {point["period"]: point for point in trends.series("Tata Safari", granularity, **kwargs)}
+
+
+def test_weeks_start_on_monday(trends):
+    weeks = points(trends, "week")
+    assert list(weeks)[:2] == ["2025-01-27", "2025-02-03"]
+    assert (weeks["2025-01-27"]["total"], weeks["2025-01-27"]["positive"], weeks["2025-01-27"]["negative"]) == (2, 1, 1)
+    assert weeks["2025-01-27"]["mean_score"] == 0.0
+    assert weeks["2025-02-03"]["total"] == 1
+    assert weeks["2025-02-10"]["total"] == 0 and weeks["2025-02-10"]["mean_score"] is None
+    assert sum(point["total"] for point in weeks.values()) == 4
+    assert trends.skipped == 1
+
+
+def test_months_split_on_the_first(trends):
+    months = points(trends, "month")
+    assert list(months) == ["2025-01", "2025-02", "2025-03"]
+    assert [point["total"] for point in months.values()] == [1, 2, 1]
+    assert months["2025-02"]["mean_score"] == -0.25
+    assert months["2025-02"]["positive_pct"] == 50.0
+
+
+def test_rolling_windows_end_on_the_last_day_of_the_period(trends):
+    months = points(trends, "month")
+    # Feb 22-28 is empty; Jan 30 - Feb 28 holds the first three posts
+    assert months["2025-02"]["rolling_7d"] is None
+    assert months["2025-02"]["rolling_30d"] == round(0.5 / 3, 4)
+    # Mar 5 ends the series: its 30-day window starts on Feb 4, just after the Feb 3 post
+    assert months["2025-03"]["rolling_30d"] == 0.0
+
+    weeks = points(trends, "week")
+    assert weeks["2025-02-03"]["rolling_7d"] == 0.5
+    assert weeks["2025-02-03"]["rolling_30d"] == round(0.5 / 3, 4)
+
+    days = points(trends, "day")
+    assert days["2025-02-05"]["total"] == 0
+    assert days["2025-02-05"]["rolling_7d"] == round(0.5 / 3, 4)
+
+
+def test_series_range_is_clipped_to_start_and_end(trends):
+    months = points(trends, "month", start=date(2025, 2, 3), end=date(2025, 2, 28))
+    assert list(months) == ["2025-02"]
+    assert months["2025-02"]["total"] == 1
+    # Rolling windows still look back before the start of the range
+    assert months["2025-02"]["rolling_30d"] == round(0.5 / 3, 4)
+    assert trends.series("Tata Safari", "day", start=date(2025, 4, 1), end=date(2025, 3, 1)) == []
+    with pytest.raises(ValueError):
+        trends.series("Tata Safari", "year")
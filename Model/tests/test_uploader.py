@@ -0,0 +1,71 @@
+import json
+
+import pytest
+
+from uploader import upload
+
+
+class FakeIndex:
+    """The part of a Pinecone index the uploader calls"""
+
+    def __init__(self, ids=()):
+        self.vectors = {post_id: None for post_id in ids}
+        self.upserted = []
+        self.deleted = []
+
+    def upsert(self, vectors):
+        for post_id, values, metadata in vectors:
+            self.vectors[post_id] = values
+            self.upserted.append(post_id)
+
+    def delete(self, ids=None, delete_all=False):
+        removed = list(self.vectors) if delete_all else ids
+        for post_id in removed:
+            self.vectors.pop(post_id, None)
+        self.deleted.extend(removed)
+
+
+def write_records(path, records):
+    with open(path, "w", encoding="utf-8") as f:
+        for post_id, content, embedding in records:
+            f.write(json.dumps({"source_id": post_id, "content": content, "embedding": embedding}) + "\n")
+
+
+@pytest.fixture
+def data(tmp_path):
+    path = str(tmp_path / "data.jsonl")
+    write_records(path, [("a", "safari ride", [1.0, 0.0]), ("b", "harrier service", [0.0, 1.0]),
+                         ("c", "nexon range", [0.6, 0.8])])
+    return path
+
+
+def sync(index, path, **kwargs):
+    index.upserted, index.deleted = [], []
+    return upload(index, path, "test-index", batch_size=2, workers=1, collapse_duplicates=False, **kwargs)
+
+
+def test_delta_sync_upserts_changed_and_deletes_removed_ids(data):
+    index = FakeIndex()
+    assert sync(index, data)["upserted"] == 3
+
+    write_records(data, [("a", "safari ride", [1.0, 0.0]), ("b", "harrier service was quick", [0.0, 1.0]),
+                         ("d", "punch mileage", [0.8, 0.6])])
+    result = sync(index, data)
+    assert sorted(index.upserted) == ["b", "d"]
+    assert index.deleted == ["c"]
+    assert (result["upserted"], result["deleted"], result["unchanged"]) == (2, 1, 1)
+    assert sorted(index.vectors) == ["a", "b", "d"]
+
+    result = sync(index, data)
+    assert (result["upserted"], result["deleted"], result["unchanged"]) == (0, 0, 3)
+
+
+def test_first_sync_keeps_legacy_ids_unless_reset(data):
+    index = FakeIndex(ids=["3f2b-uuid", "9c1d-uuid"])
+    sync(index, data)
+    assert sorted(index.vectors) == ["3f2b-uuid", "9c1d-uuid", "a", "b", "c"]
+
+    index = FakeIndex(ids=["3f2b-uuid", "9c1d-uuid"])
+    result = sync(index, data, manifest_path=data + ".reset.json", reset=True)
+    assert sorted(index.vectors) == ["a", "b", "c"]
+    assert result["upserted"] == 3
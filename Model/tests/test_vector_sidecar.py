@@ -0,0 +1,72 @@
+import json
+
+import numpy as np
+import pytest
+
+from embedding_backend import embedding_text, text_hash
+from uploader import iter_records
+from vector_store import LocalIndex, Sidecar, sidecar_paths, sidecar_prefix
+
+SETTINGS = {"model": "test-model", "backend": "torch", "dtype": "float32"}
+
+
+def write_jsonl(path, rows):
+    with open(path, "w", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(row) + "\n")
+    return str(path)
+
+
+def write_sidecar(prefix, posts, vectors):
+    """What embed.py writes for these posts, without running an encoder"""
+    npy_path, ids_path, meta_path = sidecar_paths(prefix)
+    np.save(npy_path, np.asarray(vectors, dtype=np.float32))
+    with open(ids_path, "w", encoding="utf-8") as f:
+        for post in posts:
+            digest = text_hash(embedding_text(post), SETTINGS["model"], SETTINGS["backend"], SETTINGS["dtype"])
+            f.write(json.dumps({"id": post["source_id"], "hash": digest}) + "\n")
+    with open(meta_path, "w", encoding="utf-8") as f:
+        json.dump(SETTINGS, f)
+
+
+@pytest.fixture
+def embedded(tmp_path):
+    """Records embedded into a sidecar, then one edited and one added with inline embeddings"""
+    path = str(tmp_path / "data.jsonl")
+    original = [{"source_id": "a", "content": "safari ride quality"},
+                {"source_id": "b", "content": "harrier service delay"}]
+    write_sidecar(sidecar_prefix(path), original, [[1.0, 0.0], [0.0, 1.0]])
+    write_jsonl(path, [
+        original[0],
+        {"source_id": "b", "content": "harrier service was quick this time", "embedding": [0.6, 0.8]},
+        {"source_id": "c", "content": "nexon ev range", "embedding": [0.8, 0.6]},
+    ])
+    return path
+
+
+def test_fresh_rows_come_from_the_sidecar(embedded):
+    sidecar = Sidecar.open(sidecar_prefix(embedded))
+    assert sidecar.row({"source_id": "a", "content": "safari ride quality"}) == 0
+    assert sidecar.row({"source_id": "b", "content": "harrier service was quick this time"}) is None
+    assert sidecar.row({"source_id": "c", "content": "nexon ev range"}) is None
+
+
+def test_local_index_uses_inline_embeddings_for_stale_and_new_records(embedded):
+    index = LocalIndex.from_jsonl(embedded, collapse_duplicates=False)
+    vectors = dict(zip(index.ids, index.vectors.tolist()))
+    assert vectors["a"] == pytest.approx([1.0, 0.0])
+    assert vectors["b"] == pytest.approx([0.6, 0.8])
+    assert vectors["c"] == pytest.approx([0.8, 0.6])
+
+
+def test_uploader_uses_inline_embeddings_for_stale_and_new_records(embedded):
+    vectors = {post_id: list(np.asarray(vector[1], dtype=float)) for post_id, _, vector in
+               iter_records(embedded, collapse_duplicates=False)}
+    assert vectors == {"a": [1.0, 0.0], "b": [0.6, 0.8], "c": [0.8, 0.6]}
+
+
+def test_record_without_any_current_vector_is_an_error(embedded):
+    with open(embedded, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"source_id": "d", "content": "punch mileage"}) + "\n")
+    with pytest.raises(ValueError, match="re-run embed.py"):
+        LocalIndex.from_jsonl(embedded, collapse_duplicates=False)
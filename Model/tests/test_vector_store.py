@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+
+from vector_store import LocalIndex
+
+BRANDS = ("Tata Safari", "Mahindra XUV700", "Hyundai Alcazar")
+
+
+def clustered(n=3000, dim=16, clusters=24, seed=0):
+    """Unit vectors around random centres, with a brand and sentiment per row"""
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(size=(clusters, dim))
+    vectors = centres[rng.integers(clusters, size=n)] + 0.3 * rng.normal(size=(n, dim))
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    metadata = [{"brand": BRANDS[i % 3], "sentiment_label": ("positive", "negative")[i % 7 == 0]}
+                for i in range(n)]
+    return [f"doc{i}" for i in range(n)], vectors.astype(np.float32), metadata
+
+
+def brute_force(vectors, query, top_k, rows=None):
+    rows = np.arange(len(vectors)) if rows is None else np.asarray(rows)
+    scores = vectors[rows] @ (query / np.linalg.norm(query))
+    return [f"doc{rows[i]}" for i in np.argsort(-scores)[:top_k]]
+
+
+@pytest.fixture(scope="module")
+def data():
+    return clustered()
+
+
+def ids(response):
+    return [match["id"] for match in response["matches"]]
+
+
+def test_exact_search_matches_brute_force(data):
+    doc_ids, vectors, metadata = data
+    index = LocalIndex(doc_ids, vectors, metadata, index_type="exact")
+    query = np.random.default_rng(1).normal(size=vectors.shape[1])
+    response = index.query(query.tolist(), top_k=10)
+    assert ids(response) == brute_force(vectors, query, 10)
+    scores = [match["score"] for match in response["matches"]]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_ivf_probing_every_list_is_exact(data):
+    doc_ids, vectors, metadata = data
+    index = LocalIndex(doc_ids, vectors, metadata, index_type="ivf", nlist=32, nprobe=32)
+    query = vectors[5] + 0.1
+    assert ids(index.query(query.tolist(), top_k=10)) == brute_force(vectors, query, 10)
+
+
+def test_ivf_recall_against_exact(data):
+    doc_ids, vectors, metadata = data
+    exact = LocalIndex(doc_ids, vectors, metadata, index_type="exact")
+    ivf = LocalIndex(doc_ids, vectors, metadata, index_type="ivf", nlist=32, nprobe=8)
+    assert ivf.describe_index_stats()["index_type"] == "ivf"
+    assert sum(len(rows) for rows in ivf.lists) == len(doc_ids)
+
+    rng = np.random.default_rng(2)
+    found = total = 0
+    for row in rng.choice(len(doc_ids), 20, replace=False):
+        query = (vectors[row] + 0.05 * rng.normal(size=vectors.shape[1])).tolist()
+        expected = set(ids(exact.query(query, top_k=10)))
+        found += len(expected & set(ids(ivf.query(query, top_k=10))))
+        total += len(expected)
+    assert found / total >= 0.9
+
+
+def test_narrow_filter_on_ivf_is_searched_exactly(data):
+    doc_ids, vectors, metadata = data
+    # One probed list holds ~375 rows, more than the ~143 the filter selects
+    ivf = LocalIndex(doc_ids, vectors, metadata, index_type="ivf", nlist=8, nprobe=1)
+    query = np.random.default_rng(3).normal(size=vectors.shape[1])
+    flt = {"brand": "Tata Safari", "sentiment_label": "negative"}
+    rows = [i for i, meta in enumerate(metadata) if all(meta[k] == v for k, v in flt.items())]
+    assert len(rows) <= ivf._probe_size()
+    assert ids(ivf.query(query.tolist(), top_k=5, filter=flt)) == brute_force(vectors, query, 5, rows)
+    assert ivf.count(flt) == len(rows)
+    assert ivf.query(query.tolist(), top_k=5, filter={"brand": "Tata Nexon"})["matches"] == []
+
+
+def test_grouped_search_matches_one_filtered_search_per_brand(data):
+    doc_ids, vectors, metadata = data
+    index = LocalIndex(doc_ids, vectors, metadata, index_type="exact")
+    query = np.random.default_rng(4).normal(size=vectors.shape[1]).tolist()
+    grouped = index.query_grouped(query, list(BRANDS[1:]), top_k=5, filter={"sentiment_label": "positive"})
+    for brand in BRANDS[1:]:
+        single = index.query(query, top_k=5, filter={"brand": brand, "sentiment_label": "positive"})
+        assert [match["id"] for match in grouped[brand]] == ids(single)
@@ -0,0 +1,356 @@
+"""
+Streaming, parallel, incremental upload of embedded JSONL files to Pinecone.
+
+Vector ids are derived from each record's source_id (or a content hash), and a
+manifest next to the source file remembers the id -> content hash of every
+vector already in the index. A sync therefore upserts only new or changed
+records and deletes the ones that disappeared from the file; rerunning after a
+crash resumes where the previous run stopped.
+
+Records are read one line at a time and upserted in batches by a bounded pool
+of workers, so memory stays flat whatever the file size. Failed batches are
+retried with backoff.
+
+Usage (from Model/):
+    python uploader.py tata
+    python uploader.py competitor --workers 8 --batch-size 200
+    python uploader.py --file my_data.jsonl --index my-index
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import ALL_COMPLETED, FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+
+from lexical_index import BM25Index
+from near_duplicates import collapse
+from vector_store import Sidecar, build_metadata, iter_embedded_records, sidecar_prefix, vector_id
+
+logger = logging.getLogger(__name__)
+
+# Embedded file and index for each dataset
+TARGETS = {
+    "tata": ("tata_data_embedded.jsonl", "tata-motors-sentiment"),
+    "competitor": ("competitor_data_embedding.jsonl", "competitors-sentiment"),
+}
+
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_WORKERS = 4
+DEFAULT_MAX_RETRIES = 5
+DELETE_BATCH_SIZE = 1000  # Pinecone's limit on ids per delete call
+REPORT_INTERVAL_SECONDS = 5.0
+MANIFEST_SAVE_INTERVAL_SECONDS = 5.0
+
+
+class UploadError(Exception):
+    """Raised when a batch still fails after all retries"""
+
+
+# ========== Reading ==========
+
+def content_hash(embedding, metadata: Dict) -> str:
+    """Hash of everything stored for a vector, used to detect changed records
+
+    `embedding` is the vector itself, or the sidecar's hash of the embedded
+    text when the vectors come from a sidecar.
+    """
+    payload = json.dumps([embedding, metadata], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+def iter_records(path: str, collapse_duplicates: bool = True,
+                 sidecar: Optional[str] = None) -> Iterator[Tuple[str, str, Tuple]]:
+    """Yield (id, content hash, vector) for each embedded record, one line at a time
+
+    Vectors are read from the memory-mapped sidecar (``sidecar``, default
+    <path without extension>_vectors, see embed.py) when it has a row for the
+    record's current text, else from the record's embedding array; sidecar
+    vectors are NumPy rows until they are batched for upload. With
+    collapse_duplicates, near-duplicate records are skipped and the first
+    record of each cluster carries their number (a second pass over the file).
+    """
+    sidecar = Sidecar.open(sidecar or sidecar_prefix(path))
+
+    def read():
+        return iter_embedded_records(path, sidecar)
+
+    posts = collapse(read, vector_id) if collapse_duplicates else read()
+    for post in posts:
+        post_id = vector_id(post)
+        metadata = build_metadata(post)
+        row = sidecar.row(post) if sidecar is not None else None
+        if row is not None:
+            text_digest = sidecar.rows[post_id][1]
+            yield post_id, content_hash(text_digest, metadata), (post_id, sidecar.vectors[row], metadata)
+        else:
+            yield post_id, content_hash(post["embedding"], metadata), (post_id, post["embedding"], metadata)
+
+
+def iter_changed_batches(path: str, manifest: "Manifest", batch_size: int, seen: set,
+                         collapse_duplicates: bool = True, sidecar: Optional[str] = None,
+                         full: bool = False) -> Iterator[List[Tuple[str, str, Tuple]]]:
+    """Batches of records that are new or changed since the manifest was written (every record with `full`)
+
+    Every id in the file is added to `seen`; repeated ids keep their first record.
+    """
+    batch = []
+    for post_id, digest, vector in iter_records(path, collapse_duplicates, sidecar):
+        if post_id in seen:
+            continue
+        seen.add(post_id)
+        if not full and manifest.get(post_id) == digest:
+            continue
+        values = vector[1]
+        if isinstance(values, np.ndarray):
+            vector = (post_id, values.astype(np.float32).tolist(), vector[2])
+        batch.append((post_id, digest, vector))
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# ========== Manifest ==========
+
+class Manifest:
+    """
+    Id -> content hash of the vectors known to be in one index, persisted as JSON.
+
+    Entries are recorded only after their batch has been upserted, so an
+    interrupted sync simply picks up the remaining records next time.
+    """
+
+    def __init__(self, path: str, index_name: str):
+        self.path = path
+        self.index_name = index_name
+        self.ids: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._saved_at = time.perf_counter()
+
+    def load(self) -> bool:
+        """Restore the manifest; returns False if there is none for this index"""
+        if not os.path.exists(self.path):
+            return False
+        with open(self.path, 'r', encoding='utf-8') as f:
+            saved = json.load(f)
+        if saved.get("index") != self.index_name:
+            logger.warning(f"Ignoring manifest {self.path}: written for index {saved.get('index')}")
+            return False
+        self.ids = saved.get("ids", {})
+        return True
+
+    def get(self, post_id: str) -> Optional[str]:
+        return self.ids.get(post_id)
+
+    def record(self, entries: List[Tuple[str, str]]):
+        with self._lock:
+            self.ids.update(entries)
+            self._changed()
+
+    def remove(self, post_ids: List[str]):
+        with self._lock:
+            for post_id in post_ids:
+                self.ids.pop(post_id, None)
+            self._changed()
+
+    def _changed(self):
+        self._dirty = True
+        if time.perf_counter() - self._saved_at >= MANIFEST_SAVE_INTERVAL_SECONDS:
+            self._save()
+
+    def save(self):
+        with self._lock:
+            if self._dirty:
+                self._save()
+
+    def _save(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"index": self.index_name, "ids": self.ids}, f)
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+        self._saved_at = time.perf_counter()
+
+
+# ========== Upload ==========
+
+def with_retry(func, *args, max_retries: int = DEFAULT_MAX_RETRIES,
+               backoff_base: float = 0.5, backoff_max: float = 30.0, **kwargs):
+    """Call an index operation, retrying with jittered exponential backoff"""
+    for attempt in range(max_retries + 1):
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            if attempt == max_retries:
+                raise UploadError(f"Index call failed after {max_retries} retries: {e}") from e
+            delay = random.uniform(0, min(backoff_max, backoff_base * 2 ** attempt))
+            logger.warning(f"Index call failed ({e}); retrying in {delay:.2f}s ({attempt + 1}/{max_retries})")
+            time.sleep(delay)
+
+
+def upload(index, path: str, index_name: str, batch_size: int = DEFAULT_BATCH_SIZE,
+           workers: int = DEFAULT_WORKERS, max_retries: int = DEFAULT_MAX_RETRIES,
+           manifest_path: Optional[str] = None, full: bool = False, delete: bool = True,
+           collapse_duplicates: bool = True, sidecar: Optional[str] = None, reset: bool = False) -> Dict:
+    """
+    Sync an embedded JSONL file to `index` (anything with Pinecone's `upsert`/`delete`).
+
+    Only records that are new or changed since the last sync are upserted and,
+    with `delete`, ids missing from the file are deleted. `full` upserts every
+    record whatever the manifest says; ids of the previous manifest that are
+    missing from the file are still deleted. Near-duplicate records are collapsed into
+    one vector unless `collapse_duplicates` is off. Vectors come from the
+    file's sidecar (`sidecar`, see embed.py) when it has one. At most 2 x workers
+    batches are held in memory at once.
+
+    Without a manifest there is no record of what the index already holds
+    (e.g. vectors from before source_id-based ids), so nothing is deleted;
+    `reset` empties the index first and re-uploads everything. Returns
+    counts, elapsed time and throughput.
+    """
+    manifest = Manifest(manifest_path or path + ".manifest.json", index_name)
+    has_manifest = manifest.load()
+    if reset:
+        print(f"🧹 Deleting every vector in '{index_name}' before uploading")
+        with_retry(index.delete, delete_all=True, max_retries=max_retries)
+        manifest.remove(list(manifest.ids))
+        has_manifest = False
+    elif not has_manifest:
+        logger.warning(f"No manifest for '{index_name}' at {manifest.path}: vectors already in the index that are "
+                       f"not in {path} (such as uuid ids from older uploads) will not be deleted; "
+                       f"rerun with --reset to empty the index first")
+    elif not full:
+        print(f"📋 Manifest has {len(manifest.ids)} vectors; uploading new and changed records only")
+
+    started = time.perf_counter()
+    counts = {"upserted": 0, "deleted": 0, "unchanged": 0}
+    seen = set()
+    in_flight = {}
+    last_report = [started]
+
+    def report():
+        if time.perf_counter() - last_report[0] < REPORT_INTERVAL_SECONDS:
+            return
+        last_report[0] = time.perf_counter()
+        elapsed = time.perf_counter() - started
+        print(f"📤 {counts['upserted']} vectors upserted ({counts['upserted'] / elapsed:.0f} vectors/s)")
+
+    def drain(return_when):
+        done, _ = wait(in_flight, return_when=return_when)
+        for future in done:
+            entries = in_flight.pop(future)
+            future.result()
+            manifest.record(entries)
+            counts["upserted"] += len(entries)
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="upload") as executor:
+            try:
+                for batch in iter_changed_batches(path, manifest, batch_size, seen, collapse_duplicates, sidecar,
+                                                  full=full):
+                    if len(in_flight) >= workers * 2:
+                        drain(FIRST_COMPLETED)
+                        report()
+                    vectors = [vector for _, _, vector in batch]
+                    future = executor.submit(with_retry, index.upsert, vectors=vectors,
+                                             max_retries=max_retries)
+                    in_flight[future] = [(post_id, digest) for post_id, digest, _ in batch]
+                drain(ALL_COMPLETED)
+            except BaseException:
+                for future in in_flight:
+                    future.cancel()
+                raise
+
+        # Vectors whose records are gone from the file
+        removed = [post_id for post_id in manifest.ids if post_id not in seen] if has_manifest else []
+        if delete:
+            for i in range(0, len(removed), DELETE_BATCH_SIZE):
+                chunk = removed[i:i + DELETE_BATCH_SIZE]
+                with_retry(index.delete, ids=chunk, max_retries=max_retries)
+                manifest.remove(chunk)
+                counts["deleted"] += len(chunk)
+        elif removed:
+            print(f"⚠️ {len(removed)} vectors are no longer in {path}; rerun without --keep-removed to delete them")
+    finally:
+        manifest.save()
+
+    elapsed = time.perf_counter() - started
+    counts["unchanged"] = len(seen) - counts["upserted"]
+    return {**counts, "total": len(seen), "seconds": round(elapsed, 2),
+            "vectors_per_second": round(counts["upserted"] / max(elapsed, 1e-9), 1)}
+
+
+def connect(index_name: str):
+    """Open a Pinecone index using PINECONE_API_KEY from the environment / .env"""
+    from pinecone import Pinecone
+
+    load_dotenv()
+    api_key = os.getenv("PINECONE_API_KEY")
+    if not api_key:
+        raise ValueError("PINECONE_API_KEY not found in .env file")
+    return Pinecone(api_key=api_key).Index(index_name)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("target", nargs="?", choices=sorted(TARGETS), help="Preset file/index pair")
+    parser.add_argument("--file", help="Embedded JSONL file (overrides the preset)")
+    parser.add_argument("--index", help="Pinecone index name (overrides the preset)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--max-retries", type=int, default=DEFAULT_MAX_RETRIES)
+    parser.add_argument("--manifest", help="Manifest path (default: <file>.manifest.json)")
+    parser.add_argument("--full", action="store_true",
+                        help="Upsert every record, not only new and changed ones (removed records are still deleted)")
+    parser.add_argument("--reset", action="store_true",
+                        help="Delete every vector in the index first, e.g. on the first sync of an index that still "
+                             "holds uuid ids from older uploads (implies a full upload)")
+    parser.add_argument("--keep-removed", action="store_true",
+                        help="Do not delete vectors whose records are no longer in the file")
+    parser.add_argument("--keep-duplicates", action="store_true",
+                        help="Upload near-duplicate records too instead of collapsing them into one vector")
+    parser.add_argument("--vectors", help="Vector sidecar prefix written by embed.py (default: <file>_vectors if present)")
+    parser.add_argument("--no-lexical", action="store_true",
+                        help="Skip rebuilding the BM25 index (<file>.bm25) used for hybrid search")
+    args = parser.parse_args(argv)
+
+    path, index_name = TARGETS.get(args.target, (None, None))
+    path, index_name = args.file or path, args.index or index_name
+    if not path or not index_name:
+        parser.error("give a target or both --file and --index")
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    print(f"Initializing Pinecone client for '{index_name}'...")
+    index = connect(index_name)
+
+    print(f"Syncing '{path}'...")
+    result = upload(index, path, index_name, batch_size=args.batch_size, workers=args.workers,
+                    max_retries=args.max_retries, manifest_path=args.manifest,
+                    full=args.full, delete=not args.keep_removed,
+                    collapse_duplicates=not args.keep_duplicates, sidecar=args.vectors, reset=args.reset)
+    print(f"\n--- Upload Complete! {result['upserted']} upserted, {result['deleted']} deleted, "
+          f"{result['unchanged']} unchanged in {result['seconds']}s "
+          f"({result['vectors_per_second']} vectors/s) ---")
+
+    stats = index.describe_index_stats()
+    print(f"Verification: Vector count in Pinecone is now {stats.get('total_vector_count', 'N/A')}.")
+
+    if not args.no_lexical:
+        lexical = BM25Index.from_jsonl(path, sidecar=args.vectors, collapse_duplicates=not args.keep_duplicates)
+        lexical.save(path + ".bm25")
+        print(f"Lexical index: {len(lexical.ids)} documents, {len(lexical.terms)} terms in {path}.bm25.*")
+
+
+if __name__ == "__main__":
+    main()
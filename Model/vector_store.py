@@ -0,0 +1,545 @@
+import hashlib
+import json
+import logging
+import os
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from embedding_backend import embedding_text, text_hash
+from near_duplicates import NearDuplicateIndex, record_text
+
+logger = logging.getLogger(__name__)
+
+# Corpora smaller than this are searched exactly; larger ones get an IVF index
+IVF_THRESHOLD = 50_000
+DEFAULT_NPROBE = 8
+
+# Metadata fields with a per-value bitmap ("location" is the "City, India" string)
+BITMAP_FIELDS = ("brand", "location", "sentiment_label", "platform", "intent")
+
+
+# ========== Record Helpers ==========
+
+def build_metadata(post: Dict) -> Dict:
+    """Build the metadata stored next to each vector (same fields as the Pinecone upload)"""
+    metadata = {
+        "content": post.get("clean_content") or post.get("content"),
+        "sentiment_label": (post.get("sentiment") or {}).get("label"),
+        "location": (post.get("location") or {}).get("final_location"),
+        "brand": post.get("target_vehicle") or post.get("vehicle_model"),
+        "platform": post.get("platform"),
+        "intent": post.get("intent"),
+        "duplicate_count": post.get("duplicate_count"),
+    }
+    return {k: v for k, v in metadata.items() if v is not None}
+
+
+def vector_id(post: Dict) -> str:
+    """Stable vector id: the record's source_id, else a hash of its content"""
+    if post.get("source_id"):
+        return post["source_id"]
+    content = post.get("clean_content") or post.get("content") or ""
+    return "sha256:" + hashlib.sha256(content.encode("utf-8")).hexdigest()[:32]
+
+
+def iter_embedded_records(path: str, sidecar: Optional["Sidecar"] = None) -> Iterator[Dict]:
+    """Stream records that carry an embedding from a JSONL file
+
+    With a sidecar (see embed.py), a record's vector is its sidecar row when
+    that row was embedded from the record's current text, else its inline
+    embedding array. A record with neither raises ValueError, since its
+    sidecar is out of date.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            post = json.loads(line)
+            if post.get("embedding") or (sidecar is not None and sidecar.row(post) is not None):
+                yield post
+            elif sidecar is not None:
+                raise ValueError(f"{vector_id(post)} in {path} has no embedding and no up-to-date vector in "
+                                 f"{sidecar.prefix}.npy; re-run embed.py on {path}")
+
+
+def iter_canonical_records(path: str, duplicates: Optional[NearDuplicateIndex],
+                           sidecar: Optional["Sidecar"] = None) -> Iterator[Dict]:
+    """Embedded records, first record per id, skipping near-duplicates of an earlier record
+
+    A record's canonical status is final when it is yielded; the duplicate
+    counts in `duplicates` are complete once the iterator is exhausted.
+    Without `duplicates`, every distinct id is yielded.
+    """
+    seen = set()
+    for post in iter_embedded_records(path, sidecar):
+        post_id = vector_id(post)
+        if post_id in seen:
+            continue
+        seen.add(post_id)
+        if duplicates is None or duplicates.add(post_id, record_text(post)) is None:
+            yield post
+
+
+# ========== Vector Sidecar ==========
+
+def sidecar_paths(prefix: str) -> Tuple[str, str, str]:
+    """Vectors, row ids/hashes and embedding settings of a sidecar"""
+    return prefix + ".npy", prefix + ".ids.jsonl", prefix + ".meta.json"
+
+
+def sidecar_prefix(path: str) -> str:
+    """Default sidecar of a records file, as written by embed.py"""
+    return os.path.splitext(path)[0] + "_vectors"
+
+
+class Sidecar:
+    """Memory-mapped vectors written by embed.py, with the id and text hash of each row"""
+
+    def __init__(self, prefix: str, vectors: np.ndarray, rows: Dict[str, Tuple[int, str]],
+                 settings: Optional[Dict]):
+        self.prefix = prefix
+        self.vectors = vectors
+        self.rows = rows  # id -> (row, text hash)
+        self.settings = settings  # model, backend and dtype the hashes were taken with
+
+    @classmethod
+    def open(cls, prefix: str) -> Optional["Sidecar"]:
+        """Memory-map the sidecar at prefix, or None if there is none"""
+        npy_path, ids_path, meta_path = sidecar_paths(prefix)
+        if not (os.path.exists(npy_path) and os.path.exists(ids_path)):
+            return None
+        settings = None
+        if os.path.exists(meta_path):
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                settings = json.load(f)
+        rows = {}
+        with open(ids_path, 'r', encoding='utf-8') as f:
+            for row, line in enumerate(f):
+                entry = json.loads(line)
+                rows[entry["id"]] = (row, entry["hash"])
+        return cls(prefix, np.load(npy_path, mmap_mode="r"), rows, settings)
+
+    def row(self, post: Dict) -> Optional[int]:
+        """Row holding the embedding of the post's current text; None if it has no row or a stale one"""
+        entry = self.rows.get(vector_id(post))
+        if entry is None:
+            return None
+        if self.settings is None:
+            raise ValueError(f"{sidecar_paths(self.prefix)[2]} is missing, so the vectors in {self.prefix}.npy "
+                             f"cannot be checked against their records; re-run embed.py")
+        digest = text_hash(embedding_text(post), self.settings["model"], self.settings["backend"],
+                           self.settings["dtype"])
+        return entry[0] if entry[1] == digest else None
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+# ========== Filters ==========
+
+def _any_equal(column: np.ndarray, values) -> np.ndarray:
+    # Not np.isin: it coerces a mixed list like [1, "a"] to strings, so 1 would never match
+    mask = np.zeros(len(column), dtype=bool)
+    for value in values:
+        mask |= column == value
+    return mask
+
+
+def _condition_mask(column: np.ndarray, condition) -> np.ndarray:
+    """Evaluate a single Pinecone-style field condition against a metadata column"""
+    if not isinstance(condition, dict):
+        return column == condition
+
+    mask = np.ones(len(column), dtype=bool)
+    for op, value in condition.items():
+        if op == "$eq":
+            mask &= column == value
+        elif op == "$ne":
+            mask &= column != value
+        elif op == "$in":
+            mask &= _any_equal(column, value)
+        elif op == "$nin":
+            mask &= ~_any_equal(column, value)
+        else:
+            raise ValueError(f"Unsupported filter operator: {op}")
+    return mask
+
+
+def metadata_columns(metadata: List[Dict]) -> Dict[str, np.ndarray]:
+    """Column view of record metadata (everything but content) for vectorised filters"""
+    fields = sorted({key for meta in metadata for key in meta if key != "content"})
+    return {field: np.array([meta.get(field) for meta in metadata], dtype=object) for field in fields}
+
+
+def metadata_mask(columns: Dict[str, np.ndarray], size: int, filter: Optional[Dict]) -> Optional[np.ndarray]:
+    """Boolean mask of rows matching a Pinecone-style metadata filter (None = no filter)"""
+    if not filter:
+        return None
+
+    mask = np.ones(size, dtype=bool)
+    for field, condition in filter.items():
+        if field == "$and":
+            for sub in condition:
+                mask &= metadata_mask(columns, size, sub)
+        elif field == "$or":
+            any_mask = np.zeros(size, dtype=bool)
+            for sub in condition:
+                any_mask |= metadata_mask(columns, size, sub)
+            mask &= any_mask
+        elif field in columns:
+            mask &= _condition_mask(columns[field], condition)
+        else:
+            mask[:] = False
+    return mask
+
+
+# ========== Metadata Bitmaps ==========
+
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+class MetadataIndex:
+    """
+    Per-value bitmaps over row ids for the low-cardinality filter fields.
+
+    Each (field, value) pair has a packed bitmap (1 bit per row) and a row
+    count, so a Pinecone-style filter on BITMAP_FIELDS is answered by AND/OR
+    of bitmaps, and ``estimate`` bounds how many rows it can match from the
+    counts alone. Fields without bitmaps are evaluated on the metadata columns.
+    """
+
+    def __init__(self, metadata: List[Dict], fields: tuple = BITMAP_FIELDS):
+        self.size = len(metadata)
+        self.columns = metadata_columns(metadata)
+        self._all = np.packbits(np.ones(self.size, dtype=bool))
+        self.bitmaps: Dict[str, Dict[str, np.ndarray]] = {}
+        self.counts: Dict[str, Dict[str, int]] = {}
+
+        for field in fields:
+            rows_by_value: Dict[str, List[int]] = {}
+            for row, value in enumerate(self.columns.get(field, ())):
+                if value is not None:
+                    rows_by_value.setdefault(value, []).append(row)
+            self.bitmaps[field], self.counts[field] = {}, {}
+            for value, rows in rows_by_value.items():
+                bits = np.zeros(self.size, dtype=bool)
+                bits[rows] = True
+                self.bitmaps[field][value] = np.packbits(bits)
+                self.counts[field][value] = len(rows)
+
+    def _empty(self) -> np.ndarray:
+        return np.zeros_like(self._all)
+
+    def _values_bitmap(self, field: str, values) -> np.ndarray:
+        bitmap = self._empty()
+        for value in values:
+            if value in self.bitmaps[field]:
+                bitmap |= self.bitmaps[field][value]
+        return bitmap
+
+    def _condition_bitmap(self, field: str, condition) -> np.ndarray:
+        if field not in self.bitmaps:
+            return np.packbits(metadata_mask(self.columns, self.size, {field: condition}))
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+
+        bitmap = self._all.copy()
+        for op, value in condition.items():
+            if op == "$eq":
+                bitmap &= self._values_bitmap(field, [value])
+            elif op == "$in":
+                bitmap &= self._values_bitmap(field, value)
+            elif op == "$ne":
+                bitmap &= ~self._values_bitmap(field, [value])
+            elif op == "$nin":
+                bitmap &= ~self._values_bitmap(field, value)
+            else:
+                raise ValueError(f"Unsupported filter operator: {op}")
+        return bitmap & self._all  # clear the padding bits set by ~
+
+    def bitmap(self, filter: Optional[Dict]) -> Optional[np.ndarray]:
+        """Packed bitmap of rows matching the filter (None = no filter)"""
+        if not filter:
+            return None
+
+        bitmap = self._all.copy()
+        for field, condition in filter.items():
+            if field == "$and":
+                for sub in condition:
+                    bitmap &= self.bitmap(sub)
+            elif field == "$or":
+                any_bitmap = self._empty()
+                for sub in condition:
+                    any_bitmap |= self.bitmap(sub)
+                bitmap &= any_bitmap
+            elif field in self.columns:
+                bitmap &= self._condition_bitmap(field, condition)
+            else:
+                return self._empty()
+        return bitmap
+
+    def mask(self, filter: Optional[Dict]) -> Optional[np.ndarray]:
+        """Boolean row mask of the filter (None = no filter)"""
+        bitmap = self.bitmap(filter)
+        return None if bitmap is None else np.unpackbits(bitmap, count=self.size).astype(bool)
+
+    def count(self, filter: Optional[Dict]) -> int:
+        """Exact number of rows matching the filter"""
+        if self.estimate(filter) == 0:
+            return 0
+        bitmap = self.bitmap(filter)
+        return self.size if bitmap is None else int(_POPCOUNT[bitmap].sum(dtype=np.int64))
+
+    def estimate(self, filter: Optional[Dict]) -> int:
+        """Upper bound on the rows matching the filter, from the per-value counts only"""
+        if not filter:
+            return self.size
+
+        bound = self.size
+        for field, condition in filter.items():
+            if field == "$and":
+                bound = min([bound, *(self.estimate(sub) for sub in condition)])
+            elif field == "$or":
+                bound = min(bound, sum(self.estimate(sub) for sub in condition))
+            elif field not in self.columns:
+                return 0
+            elif field in self.counts:
+                counts = self.counts[field]
+                if not isinstance(condition, dict):
+                    condition = {"$eq": condition}
+                for op, value in condition.items():
+                    if op == "$eq":
+                        bound = min(bound, counts.get(value, 0))
+                    elif op == "$in":
+                        bound = min(bound, sum(counts.get(v, 0) for v in set(value)))
+        return bound
+
+
+# ========== Local Index ==========
+
+class LocalIndex:
+    """
+    In-process, NumPy-backed vector index.
+
+    Mirrors the subset of the Pinecone ``Index`` interface used by app.py
+    (``query`` and ``describe_index_stats``) so it can be swapped in behind
+    ``query_index`` without touching the callers. ``query_grouped`` adds a
+    brand-partitioned multi-brand search. Scores are cosine similarity.
+    """
+
+    def __init__(self, ids: List[str], vectors: np.ndarray, metadata: List[Dict],
+                 index_type: str = "auto", nlist: Optional[int] = None,
+                 nprobe: int = DEFAULT_NPROBE):
+        if len(ids) != len(vectors) or len(ids) != len(metadata):
+            raise ValueError("ids, vectors and metadata must have the same length")
+
+        self.ids = np.asarray(ids, dtype=object)
+        self.vectors = _normalize(np.asarray(vectors, dtype=np.float32))
+        self.metadata = metadata
+        self.nprobe = nprobe
+
+        # Filters are answered from per-value bitmaps over the rows
+        self.metadata_index = MetadataIndex(metadata)
+        self._columns = self.metadata_index.columns
+
+        if index_type == "auto":
+            index_type = "ivf" if len(ids) >= IVF_THRESHOLD else "exact"
+        if index_type not in ("exact", "ivf"):
+            raise ValueError(f"Unknown local index type: {index_type}")
+        self.index_type = index_type
+
+        self.centroids = None
+        self.lists = []
+        self._partitions = {}
+        if index_type == "ivf" and len(ids) > 0:
+            self._build_ivf(nlist or max(1, int(np.sqrt(len(ids)))))
+
+        logger.info(f"Local index ready: {len(ids)} vectors ({self.index_type})")
+
+    @classmethod
+    def from_jsonl(cls, path: str, sidecar: Optional[str] = None, collapse_duplicates: bool = True,
+                   **kwargs) -> "LocalIndex":
+        """Load an embedded JSONL file (tata_data_embedded.jsonl / competitor_data_embedding.jsonl)
+
+        If the file has a vector sidecar (``sidecar``, default <path
+        without extension>_vectors, see embed.py), the vectors are read from
+        the memory-mapped .npy instead of the JSON embedding arrays, except
+        for records added or edited since embed.py last ran.
+        With collapse_duplicates, near-duplicate records are collapsed into the
+        first one, whose metadata carries their number as duplicate_count.
+        """
+        sidecar = Sidecar.open(sidecar or sidecar_prefix(path))
+        ids, metadata = [], []
+        rows, inline = [], []  # (position, sidecar row) and (position, embedding array)
+        duplicates = NearDuplicateIndex() if collapse_duplicates else None
+        for post in iter_canonical_records(path, duplicates, sidecar):
+            row = sidecar.row(post) if sidecar is not None else None
+            if row is not None:
+                rows.append((len(ids), row))
+            else:
+                inline.append((len(ids), post["embedding"]))
+            ids.append(vector_id(post))
+            metadata.append(build_metadata(post))
+        if duplicates is not None:
+            for post_id, meta in zip(ids, metadata):
+                meta["duplicate_count"] = duplicates.duplicate_count(post_id)
+
+        dim = sidecar.vectors.shape[1] if rows else len(inline[0][1]) if inline else 0
+        vectors = np.empty((len(ids), dim), dtype=np.float32)
+        if rows:
+            positions, sidecar_rows = map(np.asarray, zip(*rows))
+            vectors[positions] = sidecar.vectors[sidecar_rows]
+        if inline:
+            positions, embeddings = zip(*inline)
+            vectors[list(positions)] = np.asarray(embeddings, dtype=np.float32)
+
+        if rows and inline:
+            logger.warning(f"{len(inline)} records in {path} were added or edited after {sidecar.prefix}.npy "
+                           f"was written and use their inline embeddings; re-run embed.py")
+        source = f"{path} + {sidecar.prefix}.npy" if rows else path
+        collapsed = duplicates.duplicates if duplicates is not None else 0
+        logger.info(f"Loaded {len(ids)} vectors from {source} ({collapsed} near-duplicates collapsed)")
+        return cls(ids, vectors, metadata, **kwargs)
+
+    def _build_ivf(self, nlist: int, iterations: int = 10, seed: int = 0):
+        """Cluster the vectors with spherical k-means and build inverted lists"""
+        rng = np.random.default_rng(seed)
+        nlist = min(nlist, len(self.vectors))
+        centroids = self.vectors[rng.choice(len(self.vectors), nlist, replace=False)]
+
+        for _ in range(iterations):
+            assignment = np.argmax(self.vectors @ centroids.T, axis=1)
+            for c in range(nlist):
+                members = self.vectors[assignment == c]
+                if len(members):
+                    centroids[c] = members.mean(axis=0)
+            centroids = _normalize(centroids)
+
+        assignment = np.argmax(self.vectors @ centroids.T, axis=1)
+        self.centroids = centroids
+        self.lists = [np.flatnonzero(assignment == c) for c in range(nlist)]
+
+    def filter_mask(self, filter: Optional[Dict]) -> Optional[np.ndarray]:
+        """Boolean mask of rows matching a Pinecone-style metadata filter"""
+        return self.metadata_index.mask(filter)
+
+    def count(self, filter: Optional[Dict] = None) -> int:
+        """Number of vectors matching the filter, without scoring any of them"""
+        return self.metadata_index.count(filter)
+
+    def _probe_size(self) -> float:
+        """Expected number of rows an IVF query scores"""
+        return min(self.nprobe, len(self.centroids)) * len(self.ids) / len(self.centroids)
+
+    def _candidates(self, query: np.ndarray, mask: Optional[np.ndarray], top_k: int) -> Optional[np.ndarray]:
+        """Row ids to score: None (every row) for exact search, the probed lists for IVF
+        
+        A filter selecting no more rows than the probe would score is searched
+        exactly over the filtered rows.
+        """
+        if mask is not None:
+            selected = np.flatnonzero(mask)
+            if self.index_type == "exact" or self.centroids is None or len(selected) <= self._probe_size():
+                return selected
+
+        if self.index_type == "exact" or self.centroids is None:
+            return None
+
+        nprobe = min(self.nprobe, len(self.centroids))
+        probe = np.argsort(-(self.centroids @ query))[:nprobe]
+        rows = np.concatenate([self.lists[c] for c in probe])
+        if mask is not None:
+            rows = rows[mask[rows]]
+            # Probed lists too sparse for this filter: fall back to exact over the filter
+            if len(rows) < top_k:
+                rows = selected
+        return rows
+
+    def query(self, vector: List[float], top_k: int = 10, include_metadata: bool = False,
+              filter: Optional[Dict] = None, **kwargs) -> Dict:
+        """Return the top_k most similar vectors, Pinecone response shape"""
+        # Filters that cannot match anything are answered from the bitmap counts
+        if len(self.ids) == 0 or self.metadata_index.estimate(filter) == 0:
+            return {"matches": [], "namespace": ""}
+
+        query = _normalize(np.asarray(vector, dtype=np.float32))
+        rows = self._candidates(query, self.filter_mask(filter), top_k)
+        if rows is None:
+            # Unfiltered exact search: score the matrix in place instead of gathering every row
+            scores = self.vectors @ query
+            rows = np.arange(len(self.ids))
+        elif len(rows) == 0:
+            return {"matches": [], "namespace": ""}
+        else:
+            scores = self.vectors[rows] @ query
+        return {"matches": self._top_matches(rows, scores, top_k, include_metadata), "namespace": ""}
+
+    def _top_matches(self, rows: np.ndarray, scores: np.ndarray, top_k: int,
+                     include_metadata: bool) -> List[Dict]:
+        """Best top_k (row, score) pairs as Pinecone-style matches, highest score first"""
+        if len(rows) > top_k:
+            best = np.argpartition(-scores, top_k)[:top_k]
+        else:
+            best = np.arange(len(rows))
+        best = best[np.argsort(-scores[best])]
+
+        matches = []
+        for i in best:
+            row = rows[i]
+            match = {"id": self.ids[row], "score": float(scores[i])}
+            if include_metadata:
+                match["metadata"] = self.metadata[row]
+            matches.append(match)
+        return matches
+
+    def _partition(self, field: str) -> Dict[str, np.ndarray]:
+        """Row ids grouped by the value of a metadata field (built on first use)"""
+        if field not in self._partitions:
+            column = self._columns.get(field, np.array([None] * len(self.ids), dtype=object))
+            values, inverse = np.unique(column.astype(str), return_inverse=True)
+            order = np.argsort(inverse, kind="stable")
+            bounds = np.searchsorted(inverse[order], np.arange(len(values) + 1))
+            self._partitions[field] = {
+                value: order[bounds[i]:bounds[i + 1]] for i, value in enumerate(values)
+            }
+        return self._partitions[field]
+
+    def query_grouped(self, vector: List[float], groups: List[str], top_k: int = 10,
+                      group_field: str = "brand", include_metadata: bool = False,
+                      filter: Optional[Dict] = None) -> Dict[str, List[Dict]]:
+        """Top_k matches for each group (e.g. brand) in a single pass
+        
+        Uses the field partition instead of one filtered search per group: the
+        candidate rows of every group are scored with one matrix product.
+        """
+        query = _normalize(np.asarray(vector, dtype=np.float32))
+        mask = self.filter_mask(filter)
+        partition = self._partition(group_field)
+
+        group_rows = []
+        for group in groups:
+            rows = partition.get(group, np.empty(0, dtype=np.int64))
+            group_rows.append(rows[mask[rows]] if mask is not None else rows)
+
+        all_rows = np.concatenate(group_rows) if group_rows else np.empty(0, dtype=np.int64)
+        scores = self.vectors[all_rows] @ query if len(all_rows) else np.empty(0, dtype=np.float32)
+
+        results, offset = {}, 0
+        for group, rows in zip(groups, group_rows):
+            group_scores = scores[offset:offset + len(rows)]
+            offset += len(rows)
+            results[group] = self._top_matches(rows, group_scores, top_k, include_metadata)
+        return results
+
+    def describe_index_stats(self) -> Dict:
+        """Index statistics, Pinecone response shape"""
+        return {
+            "dimension": int(self.vectors.shape[1]) if self.vectors.ndim == 2 else 0,
+            "total_vector_count": len(self.ids),
+            "index_type": self.index_type,
+        }
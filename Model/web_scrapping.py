@@ -4,27 +4,240 @@
 # ====================================================================
 
 import praw
+import prawcore
+import itertools
 import json
+import math
+import queue
+import re
+import os
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta
+from multiprocessing import get_context
 from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
 from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
-import time
+from crawl_state import CrawlState
+from intent_parser import CITY_ALIASES
+from near_duplicates import DEFAULT_THRESHOLD, NearDuplicateIndex, mark_duplicates
+from rate_limit import QuotaExhausted, RateLimited, TokenBucket, call_limited
+from sentiment_cube import SentimentCube
+from sentiment_trends import SentimentTrends
+
+# YouTube Data API quota cost of each call (units)
+YOUTUBE_SEARCH_COST = 100
+YOUTUBE_COMMENTS_COST = 1
+YOUTUBE_PAGE_SIZE = 100  # commentThreads.list maximum
+
+SENTENCE_SPLIT = re.compile(r'(?<=[.!?])\s+|\n+')
+
+# State and tier of the cities recognised in post text (same location shape as the datasets)
+CITY_INFO = {
+    'Delhi': ('Delhi', 'Tier-1'), 'Mumbai': ('Maharashtra', 'Tier-1'), 'Pune': ('Maharashtra', 'Tier-1'),
+    'Bangalore': ('Karnataka', 'Tier-1'), 'Chennai': ('Tamil Nadu', 'Tier-1'),
+    'Hyderabad': ('Telangana', 'Tier-1'), 'Kolkata': ('West Bengal', 'Tier-1'),
+    'Ahmedabad': ('Gujarat', 'Tier-1'), 'Lucknow': ('Uttar Pradesh', 'Tier-2'),
+    'Kanpur': ('Uttar Pradesh', 'Tier-2'), 'Varanasi': ('Uttar Pradesh', 'Tier-2'),
+    'Bhopal': ('Madhya Pradesh', 'Tier-2'), 'Rajkot': ('Gujarat', 'Tier-2'), 'Kochi': ('Kerala', 'Tier-2'),
+    'Patna': ('Bihar', 'Tier-2'), 'Jaipur': ('Rajasthan', 'Tier-2'), 'Nagpur': ('Maharashtra', 'Tier-2'),
+    'Indore': ('Madhya Pradesh', 'Tier-2'), 'Chandigarh': ('Chandigarh', 'Tier-2'), 'Surat': ('Gujarat', 'Tier-2'),
+}
+
+# Intent rules, checked in this order (the rest is praise if positive, else general)
+COMPARISON_PATTERN = re.compile(r'\b(?:vs|versus|compared?|comparison|better than)\b', re.IGNORECASE)
+COMPLAINT_PATTERN = re.compile(
+    r'\b(?:issues?|problems?|complaints?|worst|pathetic|disappoint(?:ed|ing)|defects?|broken?|faulty|poor'
+    r'|refund|terrible|horrible|not working)\b', re.IGNORECASE)
+QUERY_PATTERN = re.compile(
+    r'\?|^\s*(?:what|which|how|why|should|is|are|can|does|do|any)\b'
+    r'|\b(?:suggest(?:ions?)?|advice|help|recommend|planning to buy|confused)\b', re.IGNORECASE)
+
+
+def sentiment_label(compound):
+    """VADER's standard thresholds on the compound score"""
+    if compound >= 0.05:
+        return 'positive'
+    elif compound <= -0.05:
+        return 'negative'
+    return 'neutral'
+
+
+def compile_aspect_pattern(aspects):
+    """One regex over every aspect keyword, matched at the start of a word
+    
+    Longest keywords come first so "after-sales" wins over shorter overlaps.
+    Returns the pattern and a keyword -> aspect lookup.
+    """
+    keyword_aspect = {}
+    for aspect, keywords in aspects.items():
+        for keyword in keywords:
+            keyword_aspect.setdefault(keyword.lower(), aspect)
+    
+    alternatives = sorted(keyword_aspect, key=len, reverse=True)
+    pattern = re.compile(r'\b(?:' + '|'.join(map(re.escape, alternatives)) + ')', re.IGNORECASE)
+    return pattern, keyword_aspect
+
+
+def detect_intent(text, label):
+    """comparison, complaint, query, praise or general, from keywords and the sentiment label"""
+    if COMPARISON_PATTERN.search(text):
+        return 'comparison'
+    if label == 'negative' or COMPLAINT_PATTERN.search(text):
+        return 'complaint'
+    if QUERY_PATTERN.search(text):
+        return 'query'
+    return 'praise' if label == 'positive' else 'general'
+
+
+def iter_chunks(iterable, size):
+    """Lists of up to `size` items from any iterable"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def merge_concurrently(sources, max_pending=1000):
+    """Items of several iterables, each consumed on its own thread, in arrival order
+    
+    Sources hand items over through a bounded queue, so a fast source cannot
+    run more than max_pending items ahead of the consumer. An exception in a
+    source is re-raised once the other sources have finished; closing the
+    merged iterator stops every source.
+    """
+    items = queue.Queue(maxsize=max_pending)
+    stop = threading.Event()
+    done = object()
+    errors = []
+    
+    def put(item):
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+    
+    def consume(source):
+        try:
+            for item in source:
+                put(item)
+                if stop.is_set():
+                    break
+        except Exception as e:
+            errors.append(e)
+        finally:
+            close = getattr(source, 'close', None)
+            if close:
+                close()
+            put(done)
+    
+    threads = [threading.Thread(target=consume, args=(source,), name=f"source-{i}", daemon=True)
+               for i, source in enumerate(sources)]
+    for thread in threads:
+        thread.start()
+    try:
+        remaining = len(threads)
+        while remaining:
+            item = items.get()
+            if item is done:
+                remaining -= 1
+                continue
+            yield item
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+    if errors:
+        raise errors[0]
+
+
+def reddit_timestamp(post):
+    """ISO-8601 UTC creation time of a Reddit post"""
+    return datetime.utcfromtimestamp(post.created_utc).isoformat() + 'Z'
+
+
+def classify_reddit_error(error):
+    """Map Reddit API errors to RateLimited; anything else is not retried"""
+    if isinstance(error, prawcore.exceptions.TooManyRequests):
+        retry_after = error.response.headers.get('retry-after') if error.response is not None else None
+        return RateLimited(str(error), float(retry_after) if retry_after else None)
+    if isinstance(error, prawcore.exceptions.ServerError):
+        return RateLimited(str(error))
+    return None
+
+
+def classify_youtube_error(error):
+    """Map YouTube Data API errors to RateLimited / QuotaExhausted"""
+    if not isinstance(error, HttpError):
+        return None
+    status = error.resp.status
+    reasons = {detail.get('reason') for detail in (error.error_details or []) if isinstance(detail, dict)}
+    if status == 403 and reasons & {'quotaExceeded', 'dailyLimitExceeded'}:
+        return QuotaExhausted(str(error))
+    if status == 429 or status >= 500 or (status == 403 and reasons & {'rateLimitExceeded', 'userRateLimitExceeded'}):
+        retry_after = error.resp.get('retry-after')
+        return RateLimited(str(error), float(retry_after) if retry_after else None)
+    return None
+
+
+# Transform workers: each process builds its own pipeline (and VADER analyzer) once
+_worker_pipeline = None
+
+
+def _init_transform_worker(aspects):
+    global _worker_pipeline
+    _worker_pipeline = TataDataPipeline('', '', '')
+    _worker_pipeline.aspects = aspects
+    _worker_pipeline.aspect_pattern, _worker_pipeline.keyword_aspect = compile_aspect_pattern(aspects)
+
+
+def _transform_chunk(raw_posts):
+    return [_worker_pipeline.transform_to_format(raw_post) for raw_post in raw_posts]
+
 
 class TataDataPipeline:
     """
     Complete pipeline: Collect → Transform → Save as JSONL
+    
+    Collection runs on a thread pool; every API call first takes tokens from
+    that API's bucket (Reddit: requests/minute, YouTube: requests/second and
+    daily quota units), and 429s slow the bucket down.
+    
+    With a CrawlState, runs are incremental: each source is only fetched back
+    to the newest item of the previous run, already-seen ids are dropped and
+    new items are appended to the output file.
     """
     
-    def __init__(self, reddit_client_id, reddit_client_secret, youtube_api_key):
-        # Reddit setup
-        self.reddit = praw.Reddit(
+    def __init__(self, reddit_client_id, reddit_client_secret, youtube_api_key,
+                 max_workers=8, reddit_requests_per_minute=100, youtube_requests_per_second=10,
+                 youtube_daily_quota=10000, reddit_options=None, youtube_options=None, state=None):
+        # API clients are not thread-safe, so each worker thread builds its own
+        self.reddit_credentials = dict(
             client_id=reddit_client_id,
             client_secret=reddit_client_secret,
-            user_agent="TataCrisisMonitor/2.0"
+            user_agent="TataCrisisMonitor/2.0",
+            **(reddit_options or {})
         )
-        
-        # YouTube setup
-        self.youtube = build('youtube', 'v3', developerKey=youtube_api_key)
+        self.youtube_credentials = dict(developerKey=youtube_api_key, **(youtube_options or {}))
+        self._local = threading.local()
+        self.max_workers = max_workers
+        
+        # Per-API rate limits, set from the API quotas
+        self.reddit_limit = TokenBucket(reddit_requests_per_minute / 60, capacity=10, name="reddit")
+        self.youtube_limit = TokenBucket(youtube_requests_per_second, name="youtube")
+        self.youtube_quota = TokenBucket(youtube_daily_quota / 86400, capacity=youtube_daily_quota,
+                                         name="youtube-quota", adaptive=False)
+        self.youtube_quota_exhausted = threading.Event()
+        
+        # Incremental crawl state; watermarks are committed only once the data is saved
+        self.state = state
+        self.pending_watermarks = {}
+        self._watermark_lock = threading.Lock()
         
         # Sentiment analyzer
         self.vader = SentimentIntensityAnalyzer()
@@ -40,6 +253,8 @@ class TataDataPipeline:
             'price': ['price', 'cost', 'value', 'expensive', 'worth', 'pricing'],
             'design': ['design', 'look', 'style', 'exterior', 'interior', 'appearance']
         }
+        self.aspect_pattern, self.keyword_aspect = compile_aspect_pattern(self.aspects)
+        self.city_pattern, self.keyword_city = compile_aspect_pattern(CITY_ALIASES)
     
     def analyze_sentiment(self, text):
         """Get sentiment score"""
@@ -49,47 +264,109 @@ class TataDataPipeline:
         scores = self.vader.polarity_scores(text)
         compound = scores['compound']
         
-        if compound >= 0.05:
-            label = 'positive'
-        elif compound <= -0.05:
-            label = 'negative'
-        else:
-            label = 'neutral'
-        
-        return {'label': label, 'score': round(compound, 4)}
+        return {'label': sentiment_label(compound), 'score': round(compound, 4)}
     
     def extract_aspects(self, text):
-        """Extract aspects mentioned"""
+        """Extract aspects mentioned, each with the sentiment of the sentences it appears in
+        
+        Each sentence is scanned once with the compiled keyword pattern and
+        scored once with VADER; an aspect found in several sentences gets the
+        mean of their scores.
+        """
         if not text:
             return []
         
-        text_lower = text.lower()
-        found_aspects = []
+        scores = {}
+        for sentence in SENTENCE_SPLIT.split(text):
+            matched = {self.keyword_aspect[m.group(0).lower()] for m in self.aspect_pattern.finditer(sentence)}
+            if not matched:
+                continue
+            
+            score = self.analyze_sentiment(sentence)['score']
+            for aspect in matched:
+                scores.setdefault(aspect, []).append(score)
         
-        for aspect, keywords in self.aspects.items():
-            if any(kw in text_lower for kw in keywords):
-                aspect_sentiment = self.analyze_sentiment(text)
+        found_aspects = []
+        for aspect in self.aspects:
+            if aspect in scores:
+                score = round(sum(scores[aspect]) / len(scores[aspect]), 4)
                 found_aspects.append({
                     'aspect': aspect,
-                    'sentiment': aspect_sentiment['label']
+                    'sentiment': sentiment_label(score),
+                    'score': score
                 })
         
         return found_aspects
     
+    @property
+    def reddit(self):
+        if not hasattr(self._local, 'reddit'):
+            self._local.reddit = praw.Reddit(**self.reddit_credentials)
+        return self._local.reddit
+    
+    @property
+    def youtube(self):
+        if not hasattr(self._local, 'youtube'):
+            self._local.youtube = build('youtube', 'v3', **self.youtube_credentials)
+        return self._local.youtube
+    
+    def call_reddit(self, func, requests=1):
+        return call_limited(func, ((self.reddit_limit, requests),), classify_reddit_error)
+    
+    def call_youtube(self, func, cost):
+        if self.youtube_quota_exhausted.is_set():
+            raise QuotaExhausted("YouTube quota exhausted")
+        try:
+            return call_limited(func, ((self.youtube_limit, 1), (self.youtube_quota, cost)),
+                                classify_youtube_error)
+        except QuotaExhausted:
+            self.youtube_quota_exhausted.set()
+            raise
+    
+    def watermark(self, source):
+        return self.state.watermark(source) if self.state else None
+    
+    def advance_watermark(self, source, timestamp):
+        with self._watermark_lock:
+            if timestamp > self.pending_watermarks.get(source, ''):
+                self.pending_watermarks[source] = timestamp
+    
+    def rate_limit_stats(self):
+        return {bucket.name: bucket.stats()
+                for bucket in (self.reddit_limit, self.youtube_limit, self.youtube_quota)}
+    
     def detect_vehicle_model(self, text):
-        """Detect which vehicle is mentioned"""
-        text_lower = text.lower()
+        """Detect which vehicle is mentioned (None if neither)"""
+        text_lower = (text or '').lower()
         
         if 'harrier' in text_lower:
             return 'Tata Harrier'
         elif 'safari' in text_lower:
             return 'Tata Safari'
         else:
-            return 'Tata'
+            return None
+    
+    def detect_location(self, text):
+        """Location of the first known city mentioned, in the datasets' location shape"""
+        match = self.city_pattern.search(text or '')
+        city = self.keyword_city[match.group(0).lower()] if match else None
+        state, tier = CITY_INFO.get(city, (None, None))
+        final_location = f"{city}, India" if city else None
+        return {
+            'profile_location': None,
+            'geo_location': None,
+            'nlp_location': final_location,
+            'final_location': final_location,
+            'tier': tier,
+            'country': 'India',
+            'state': state,
+            'city': city
+        }
     
     def transform_to_format(self, raw_post):
         """Transform raw post to standardized format"""
         content = raw_post.get('content', '')
+        sentiment = self.analyze_sentiment(content)
         
         transformed = {
             'platform': raw_post.get('platform'),
@@ -99,9 +376,13 @@ class TataDataPipeline:
             'content': content,
             'timestamp': raw_post.get('timestamp'),
             'score': raw_post.get('score', 0),
-            'sentiment': self.analyze_sentiment(content),
+            'sentiment': sentiment,
             'aspects': self.extract_aspects(content),
-            'vehicle_model': self.detect_vehicle_model(content)
+            'vehicle_model': self.detect_vehicle_model(content),
+            # The vehicle the post was collected for (its search), like the competitor datasets
+            'target_vehicle': self.detect_vehicle_model(raw_post.get('search_query')),
+            'location': self.detect_location(content),
+            'intent': detect_intent(content, sentiment['label'])
         }
         
         # Add platform-specific fields
@@ -113,210 +394,405 @@ class TataDataPipeline:
         
         return transformed
     
-    def collect_reddit_posts(self, subreddits, keywords, days_back=7, limit=100):
-        """Collect Reddit posts"""
+    def iter_transformed(self, raw_posts, workers=1, chunk_size=200):
+        """transform_to_format over a stream of raw posts, in input order
+        
+        With workers > 1 (0 = one per CPU) chunks of posts are transformed in
+        a process pool; at most 2 chunks per worker are in flight, so the
+        stream is never read far ahead of what has been yielded.
+        """
+        workers = workers or os.cpu_count() or 1
+        if workers == 1:
+            for raw_post in raw_posts:
+                yield self.transform_to_format(raw_post)
+            return
+        
+        with ProcessPoolExecutor(workers, mp_context=get_context('spawn'),
+                                 initializer=_init_transform_worker, initargs=(self.aspects,)) as pool:
+            pending = deque()
+            for chunk in iter_chunks(raw_posts, chunk_size):
+                pending.append(pool.submit(_transform_chunk, chunk))
+                if len(pending) >= 2 * workers:
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
+    
+    def search_subreddit(self, sub_name, keyword, cutoff_date, limit):
+        """One subreddit search (limit/100 listing requests)"""
+        source = f"reddit:r/{sub_name}:{keyword}"
+        since = self.watermark(source)
+        
+        def search():
+            subreddit = self.reddit.subreddit(sub_name)
+            if since is None:
+                return list(subreddit.search(keyword, limit=limit, time_filter='month'))
+            
+            # Newest first, so listing pages stop once we reach the previous run's newest post
+            posts = []
+            for post in subreddit.search(keyword, limit=limit, sort='new', time_filter='month'):
+                if reddit_timestamp(post) < since:
+                    break
+                posts.append(post)
+            return posts
+        
+        posts = self.call_reddit(search, requests=max(1, math.ceil(limit / 100)))
+        
+        results = []
+        for post in posts:
+            post_date = datetime.utcfromtimestamp(post.created_utc)
+            
+            if post_date < cutoff_date:
+                continue
+            
+            self.advance_watermark(source, reddit_timestamp(post))
+            results.append({
+                'platform': 'reddit',
+                'source': f'r/{sub_name}',
+                'post_id': post.id,
+                'username': str(post.author),
+                'content': f"{post.title} {post.selftext}",
+                'timestamp': reddit_timestamp(post),
+                'score': post.score,
+                'search_query': keyword,
+                'num_comments': post.num_comments,
+                'url': f"https://reddit.com{post.permalink}"
+            })
+        return results
+    
+    def iter_reddit_posts(self, subreddits, keywords, days_back=7, limit=100):
+        """Yield Reddit posts (subreddit x keyword searches run concurrently)"""
         print(f"📱 Collecting from {len(subreddits)} subreddits...")
         
-        all_posts = []
         cutoff_date = datetime.utcnow() - timedelta(days=days_back)
+        tasks = [(sub_name, keyword) for sub_name in subreddits for keyword in keywords]
+        
+        # Dropping duplicates across searches and earlier runs
+        seen_ids = set()
+        sub_counts = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="reddit") as executor:
+            futures = [executor.submit(self.search_subreddit, sub_name, keyword, cutoff_date, limit)
+                       for sub_name, keyword in tasks]
+            
+            for (sub_name, keyword), future in zip(tasks, futures):
+                try:
+                    posts = future.result()
+                except Exception as e:
+                    print(f"  ⚠ Error with r/{sub_name} '{keyword}': {e}")
+                    continue
+                
+                if self.state:
+                    posts = self.state.filter_new(posts)
+                
+                for post in posts:
+                    if post['post_id'] not in seen_ids:
+                        seen_ids.add(post['post_id'])
+                        sub_counts[sub_name] = sub_counts.get(sub_name, 0) + 1
+                        yield post
         
         for sub_name in subreddits:
-            sub_count = 0
+            if sub_counts.get(sub_name):
+                print(f"  ✓ r/{sub_name}: {sub_counts[sub_name]} posts")
+        
+        print(f"✅ Reddit: {len(seen_ids)} posts\n")
+    
+    def collect_reddit_posts(self, subreddits, keywords, days_back=7, limit=100):
+        """Collect Reddit posts into a list"""
+        return list(self.iter_reddit_posts(subreddits, keywords, days_back, limit))
+    
+    def search_videos(self, search_query, max_videos):
+        """Video ids and titles for a search query"""
+        search_response = self.call_youtube(lambda: self.youtube.search().list(
+            q=search_query,
+            part='id,snippet',
+            maxResults=max_videos,
+            type='video',
+            order='relevance'
+        ).execute(), cost=YOUTUBE_SEARCH_COST)
+        
+        return [(item['id']['videoId'], item['snippet']['title'])
+                for item in search_response.get('items', [])]
+    
+    def iter_comment_pages(self, video_id, video_title, max_comments):
+        """Pages of top-level comments of one video, newest first
+        
+        Follows nextPageToken until max_comments, the end of the thread list,
+        or (incremental runs) the newest comment of the previous run. The
+        video's watermark only advances once that point is reached: a video
+        that fails part-way is fetched from the old watermark again next run.
+        """
+        source = f"youtube:video:{video_id}"
+        since = self.watermark(source)
+        page_token = None
+        fetched = 0
+        newest = None
+        
+        while fetched < max_comments:
+            page_size = min(YOUTUBE_PAGE_SIZE, max_comments - fetched)
+            comments_response = self.call_youtube(lambda: self.youtube.commentThreads().list(
+                part='snippet',
+                videoId=video_id,
+                maxResults=page_size,
+                order='time',
+                textFormat='plainText',
+                pageToken=page_token
+            ).execute(), cost=YOUTUBE_COMMENTS_COST)
             
-            try:
-                subreddit = self.reddit.subreddit(sub_name)
+            comments = []
+            reached_previous_run = False
+            for comment_item in comments_response.get('items', []):
+                comment = comment_item['snippet']['topLevelComment']['snippet']
                 
-                for keyword in keywords:
-                    try:
-                        posts = subreddit.search(keyword, limit=limit, time_filter='month')
-                        
-                        for post in posts:
-                            post_date = datetime.utcfromtimestamp(post.created_utc)
-                            
-                            if post_date < cutoff_date:
-                                continue
-                            
-                            # Check for duplicates
-                            if any(p['post_id'] == post.id for p in all_posts):
-                                continue
-                            
-                            all_posts.append({
-                                'platform': 'reddit',
-                                'source': f'r/{sub_name}',
-                                'post_id': post.id,
-                                'username': str(post.author),
-                                'content': f"{post.title} {post.selftext}",
-                                'timestamp': post_date.isoformat() + 'Z',
-                                'score': post.score,
-                                'num_comments': post.num_comments,
-                                'url': f"https://reddit.com{post.permalink}"
-                            })
-                            sub_count += 1
-                        
-                        time.sleep(0.5)
-                        
-                    except Exception as e:
-                        print(f"  ⚠ Error with '{keyword}': {e}")
-                        continue
+                if since is not None and comment['publishedAt'] < since:
+                    reached_previous_run = True
+                    break
                 
-                if sub_count > 0:
-                    print(f"  ✓ r/{sub_name}: {sub_count} posts")
-                
-            except Exception as e:
-                print(f"  ✗ r/{sub_name}: {e}")
+                newest = max(newest or '', comment['publishedAt'])
+                comments.append({
+                    'platform': 'youtube',
+                    'source': video_title,
+                    'post_id': comment_item['id'],
+                    'username': comment['authorDisplayName'],
+                    'content': comment['textDisplay'],
+                    'timestamp': comment['publishedAt'],
+                    'score': comment['likeCount'],
+                    'video_id': video_id
+                })
+            
+            if comments:
+                yield comments
+            
+            fetched += len(comments_response.get('items', []))
+            page_token = comments_response.get('nextPageToken')
+            if not page_token or reached_previous_run:
+                break
         
-        print(f"✅ Reddit: {len(all_posts)} posts\n")
-        return all_posts
+        if newest:
+            self.advance_watermark(source, newest)
     
-    def collect_youtube_comments(self, video_searches, max_videos=10, max_comments=100):
-        """Collect YouTube comments"""
+    def fetch_video_comments(self, video_id, video_title, max_comments):
+        """All (capped) comments of one video as a list"""
+        return [comment for page in self.iter_comment_pages(video_id, video_title, max_comments)
+                for comment in page]
+    
+    def iter_youtube_comments(self, video_searches, max_videos=10, max_comments=100, max_pending_pages=32):
+        """Yield YouTube comments as pages arrive
+        
+        Searches run first, then every distinct video is paged on the worker
+        pool. Workers hand pages over through a bounded queue, so at most
+        max_pending_pages pages are buffered however many comments a video has.
+        """
         print(f"🎥 Collecting from {len(video_searches)} search queries...")
         
-        all_comments = []
+        pages = queue.Queue(maxsize=max_pending_pages)
+        stop = threading.Event()
+        done = object()
         
-        for search_query in video_searches:
-            query_count = 0
-            
+        def put(item):
+            while not stop.is_set():
+                try:
+                    pages.put(item, timeout=0.5)
+                    return
+                except queue.Full:
+                    continue
+        
+        def fetch_video(search_query, video_id, video_title):
             try:
-                # Search videos
-                search_response = self.youtube.search().list(
-                    q=search_query,
-                    part='id,snippet',
-                    maxResults=max_videos,
-                    type='video',
-                    order='relevance'
-                ).execute()
-                
-                for item in search_response.get('items', []):
-                    video_id = item['id']['videoId']
-                    video_title = item['snippet']['title']
-                    
-                    try:
-                        # Get comments
-                        comments_response = self.youtube.commentThreads().list(
-                            part='snippet',
-                            videoId=video_id,
-                            maxResults=max_comments,
-                            textFormat='plainText'
-                        ).execute()
-                        
-                        for comment_item in comments_response.get('items', []):
-                            comment = comment_item['snippet']['topLevelComment']['snippet']
-                            
-                            all_comments.append({
-                                'platform': 'youtube',
-                                'source': video_title,
-                                'post_id': comment_item['id'],
-                                'username': comment['authorDisplayName'],
-                                'content': comment['textDisplay'],
-                                'timestamp': comment['publishedAt'],
-                                'score': comment['likeCount'],
-                                'video_id': video_id
-                            })
-                            query_count += 1
-                        
-                        time.sleep(0.3)
-                        
-                    except Exception:
-                        continue
+                for page in self.iter_comment_pages(video_id, video_title, max_comments):
+                    put((search_query, page))
+                    if stop.is_set():
+                        break
+            except Exception as e:
+                print(f"  ⚠ Error with video {video_id}: {e}")
+            finally:
+                put(done)
+        
+        seen_ids = set()
+        query_counts = {search_query: 0 for search_query in video_searches}
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="youtube")
+        try:
+            search_futures = [executor.submit(self.search_videos, search_query, max_videos)
+                              for search_query in video_searches]
+            
+            # The same video can come up for several searches; fetch it once
+            videos = {}
+            for search_query, future in zip(video_searches, search_futures):
+                try:
+                    for video_id, video_title in future.result():
+                        videos.setdefault(video_id, (search_query, video_title))
+                except Exception as e:
+                    print(f"  ✗ '{search_query}': {e}")
+            
+            for video_id, (search_query, video_title) in videos.items():
+                executor.submit(fetch_video, search_query, video_id, video_title)
+            
+            remaining = len(videos)
+            while remaining:
+                item = pages.get()
+                if item is done:
+                    remaining -= 1
+                    continue
                 
-                print(f"  ✓ '{search_query}': {query_count} comments")
+                search_query, comments = item
+                if self.state:
+                    comments = self.state.filter_new(comments)
                 
-            except Exception as e:
-                print(f"  ✗ '{search_query}': {e}")
-        
-        print(f"✅ YouTube: {len(all_comments)} comments\n")
-        return all_comments
+                for comment in comments:
+                    if comment['post_id'] not in seen_ids:
+                        seen_ids.add(comment['post_id'])
+                        query_counts[search_query] += 1
+                        comment['search_query'] = search_query
+                        yield comment
+        finally:
+            stop.set()
+            executor.shutdown(wait=True)
+        
+        for search_query, count in query_counts.items():
+            print(f"  ✓ '{search_query}': {count} comments")
+        
+        if self.youtube_quota_exhausted.is_set():
+            print("  ⚠ YouTube quota exhausted; results are partial")
+        
+        print(f"✅ YouTube: {len(seen_ids)} comments\n")
+    
+    def collect_youtube_comments(self, video_searches, max_videos=10, max_comments=100):
+        """Collect YouTube comments into a list"""
+        return list(self.iter_youtube_comments(video_searches, max_videos, max_comments))
     
-    def save_as_jsonl(self, data, filename):
-        """Save data as JSONL format (one JSON per line)"""
+    def save_as_jsonl(self, data, filename, append=False, chunk_size=500, on_chunk=None):
+        """Stream records to JSONL (one JSON per line), flushing every chunk_size records
+        
+        on_chunk(chunk) is called after each chunk is flushed. Returns the number of records written.
+        """
         print(f"💾 Saving to JSONL format...")
         
-        with open(filename, 'w', encoding='utf-8') as f:
-            for item in data:
+        written = 0
+        with open(filename, 'a' if append else 'w', encoding='utf-8') as f:
+            for chunk in iter_chunks(data, chunk_size):
                 # Write each item as a single line
-                json_line = json.dumps(item, ensure_ascii=False)
-                f.write(json_line + '\n')
+                f.writelines(json.dumps(item, ensure_ascii=False) + '\n' for item in chunk)
+                f.flush()
+                written += len(chunk)
+                if on_chunk:
+                    on_chunk(chunk)
         
-        print(f"✅ Saved {len(data)} items to {filename}")
+        print(f"✅ {'Appended' if append else 'Saved'} {written} items to {filename}")
         
         # Verify file
-        line_count = sum(1 for line in open(filename, 'r', encoding='utf-8'))
+        with open(filename, 'r', encoding='utf-8') as f:
+            line_count = sum(1 for _ in f)
         print(f"✓ Verified: {line_count} lines in file\n")
+        return written
     
     def run_pipeline(self, config):
-        """Complete pipeline: Collect → Transform → Save"""
+        """Complete pipeline: Collect → Transform → Save, streamed record by record"""
         print("="*80)
         print("🚀 TATA DATA COLLECTION & TRANSFORMATION PIPELINE")
         print("="*80)
         print(f"⏰ Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
         
-        # Step 1: Collect raw data
-        print("STEP 1: DATA COLLECTION")
+        print("COLLECT → TRANSFORM → SAVE")
         print("-"*80)
         
-        reddit_data = self.collect_reddit_posts(
-            subreddits=config['REDDIT_SUBREDDITS'],
-            keywords=config['REDDIT_KEYWORDS'],
-            days_back=config.get('DAYS_BACK', 7),
-            limit=config.get('REDDIT_LIMIT', 100)
+        # Step 1: Collect raw data (lazily), crawling Reddit and YouTube at the same time;
+        # each API keeps to its own token buckets, which are shared safely across threads
+        raw_posts = merge_concurrently([
+            self.iter_reddit_posts(
+                subreddits=config['REDDIT_SUBREDDITS'],
+                keywords=config['REDDIT_KEYWORDS'],
+                days_back=config.get('DAYS_BACK', 7),
+                limit=config.get('REDDIT_LIMIT', 100)
+            ),
+            self.iter_youtube_comments(
+                video_searches=config['YOUTUBE_SEARCHES'],
+                max_videos=config.get('YOUTUBE_MAX_VIDEOS', 10),
+                max_comments=config.get('YOUTUBE_MAX_COMMENTS', 100)
+            )
+        ])
+        
+        # Step 2: Transform records as they arrive (across processes with TRANSFORM_WORKERS != 1)
+        sentiment_counts = {}
+        transformed_posts = self.iter_transformed(
+            raw_posts,
+            workers=config.get('TRANSFORM_WORKERS', 1),
+            chunk_size=config.get('TRANSFORM_CHUNK_SIZE', 200)
         )
         
-        youtube_data = self.collect_youtube_comments(
-            video_searches=config['YOUTUBE_SEARCHES'],
-            max_videos=config.get('YOUTUBE_MAX_VIDEOS', 10),
-            max_comments=config.get('YOUTUBE_MAX_COMMENTS', 100)
+        # Near-duplicates (copy-pasted comments, cross-posts) are kept in the output but tagged
+        # duplicate_of; the index of canonical records persists across incremental runs
+        duplicates = None
+        if config.get('NEAR_DUPLICATES'):
+            threshold = config.get('NEAR_DUPLICATE_THRESHOLD', DEFAULT_THRESHOLD)
+            duplicates = (NearDuplicateIndex.open(config['NEAR_DUPLICATES'], threshold) if self.state
+                          else NearDuplicateIndex(threshold))
+            transformed_posts = mark_duplicates(transformed_posts, duplicates)
+        
+        def transform_all():
+            for i, transformed in enumerate(transformed_posts, 1):
+                if i % 500 == 0:
+                    print(f"  Processing: {i}")
+                
+                label = transformed['sentiment']['label']
+                sentiment_counts[label] = sentiment_counts.get(label, 0) + 1
+                yield transformed
+        
+        # Step 3: Append to JSONL in flushed chunks; once a chunk is on disk its records are
+        # counted into the sentiment aggregates and, after those and the near-duplicate index
+        # are saved, its ids recorded as seen
+        filename = config.get('OUTPUT_FILE', 'tata_data.jsonl')
+        
+        # Like the output file, the aggregates are extended by incremental runs and rebuilt otherwise
+        aggregates = []
+        for key, kind in (('SENTIMENT_CUBE', SentimentCube), ('SENTIMENT_TRENDS', SentimentTrends)):
+            if config.get(key):
+                aggregates.append((config[key], kind.open(config[key]) if self.state else kind()))
+        
+        def on_chunk(chunk):
+            canonical = [post for post in chunk if not post.get('duplicate_of')]
+            for path, aggregate in aggregates:
+                aggregate.add_many(canonical)
+                if self.state:
+                    aggregate.save(path)  # a crash must not leave seen posts missing from the aggregates
+            if self.state:
+                if duplicates is not None:
+                    duplicates.save(config['NEAR_DUPLICATES'])
+                self.state.mark_seen(chunk)
+        
+        total = self.save_as_jsonl(
+            transform_all(), filename,
+            append=self.state is not None,
+            chunk_size=config.get('WRITE_CHUNK_SIZE', 500),
+            on_chunk=on_chunk
         )
-        
-        all_raw_data = reddit_data + youtube_data
-        
-        print(f"📊 Total raw posts collected: {len(all_raw_data)}\n")
-        
-        # Step 2: Transform data
-        print("STEP 2: DATA TRANSFORMATION")
-        print("-"*80)
-        print("🔄 Analyzing sentiment and extracting aspects...")
-        
-        transformed_data = []
-        for i, raw_post in enumerate(all_raw_data, 1):
-            if i % 50 == 0:
-                print(f"  Processing: {i}/{len(all_raw_data)}")
-            
-            transformed = self.transform_to_format(raw_post)
-            transformed_data.append(transformed)
-        
-        print(f"✅ Transformed {len(transformed_data)} posts\n")
-        
-        # Step 3: Save as JSONL
-        print("STEP 3: SAVING TO JSONL")
-        print("-"*80)
-        
-        filename = f"tata_data.jsonl"
-        
-        self.save_as_jsonl(transformed_data, filename)
+        for path, aggregate in aggregates:
+            aggregate.save(path)
+            print(f"📦 {type(aggregate).__name__}: {aggregate.documents} documents in {path}")
+        if duplicates is not None:
+            duplicates.save(config['NEAR_DUPLICATES'])
+            print(f"🧬 Near-duplicates: {duplicates.duplicates} records tagged duplicate_of "
+                  f"({len(duplicates)} canonical) in {config['NEAR_DUPLICATES']}.*")
+        
+        # Watermarks only move once every source has been written out completely
+        if self.state:
+            self.state.update_watermarks(self.pending_watermarks)
+            self.pending_watermarks = {}
         
         # Step 4: Summary
         print("STEP 4: SUMMARY")
         print("-"*80)
         
-        sentiment_counts = {}
-        for item in transformed_data:
-            label = item['sentiment']['label']
-            sentiment_counts[label] = sentiment_counts.get(label, 0) + 1
-        
         print(f"📊 Sentiment Distribution:")
         for label, count in sentiment_counts.items():
-            print(f"   {label.title()}: {count} ({count/len(transformed_data)*100:.1f}%)")
+            print(f"   {label.title()}: {count} ({count/total*100:.1f}%)")
         
         print(f"\n📁 Output file: {filename}")
-        print(f"📏 File size: {len(transformed_data)} lines\n")
+        print(f"📏 New records: {total} lines\n")
         
         print("="*80)
         print("✅ PIPELINE COMPLETED SUCCESSFULLY")
         print("="*80)
         print(f"⏰ Finished: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
         
-        return filename, transformed_data
+        return filename, total
 
 
 # ====================================================================
@@ -355,7 +831,27 @@ CONFIG = {
     'DAYS_BACK': 30,  # Last 30 days
     'REDDIT_LIMIT': 100,  # Posts per subreddit
     'YOUTUBE_MAX_VIDEOS': 10,
-    'YOUTUBE_MAX_COMMENTS': 100,
+    'YOUTUBE_MAX_COMMENTS': 100,  # per video, paged 100 at a time
+    
+    # Concurrency and API rate limits
+    'MAX_WORKERS': 8,
+    'REDDIT_REQUESTS_PER_MINUTE': 100,  # Reddit OAuth limit per client id
+    'YOUTUBE_REQUESTS_PER_SECOND': 10,
+    'YOUTUBE_DAILY_QUOTA': 10000,  # units/day; search = 100, commentThreads = 1
+    
+    # Sentiment/aspect transform
+    'TRANSFORM_WORKERS': 0,  # processes; 0 = one per CPU, 1 = in the main process
+    'TRANSFORM_CHUNK_SIZE': 200,  # posts per worker task
+    
+    # Output and incremental crawl state
+    'OUTPUT_FILE': 'tata_data.jsonl',
+    'WRITE_CHUNK_SIZE': 500,  # records per flushed write
+    'INCREMENTAL': True,  # fetch only items newer than the last run and append them
+    'STATE_DB': 'crawl_state.db',
+    'SENTIMENT_CUBE': 'sentiment_cube.json',  # aggregates updated with every run (None to skip)
+    'SENTIMENT_TRENDS': 'sentiment_trends.json',
+    'NEAR_DUPLICATES': 'near_duplicates',  # MinHash index prefix (None to skip near-duplicate tagging)
+    'NEAR_DUPLICATE_THRESHOLD': 0.8,  # estimated Jaccard similarity of word 3-shingles
 }
 
 
@@ -378,22 +874,27 @@ def run_pipeline():
     pipeline = TataDataPipeline(
         reddit_client_id=CONFIG['REDDIT_CLIENT_ID'],
         reddit_client_secret=CONFIG['REDDIT_CLIENT_SECRET'],
-        youtube_api_key=CONFIG['YOUTUBE_API_KEY']
+        youtube_api_key=CONFIG['YOUTUBE_API_KEY'],
+        max_workers=CONFIG['MAX_WORKERS'],
+        reddit_requests_per_minute=CONFIG['REDDIT_REQUESTS_PER_MINUTE'],
+        youtube_requests_per_second=CONFIG['YOUTUBE_REQUESTS_PER_SECOND'],
+        youtube_daily_quota=CONFIG['YOUTUBE_DAILY_QUOTA'],
+        state=CrawlState(CONFIG['STATE_DB']) if CONFIG['INCREMENTAL'] else None
     )
     
     # Run complete pipeline
-    filename, data = pipeline.run_pipeline(CONFIG)
+    filename, total = pipeline.run_pipeline(CONFIG)
     
     print(f"\n🎉 SUCCESS!")
     print(f"📁 Data saved to: {filename}")
-    print(f"📊 Total records: {len(data)}")
+    print(f"📊 Total records: {total}")
     
-    return filename, data
+    return filename, total
 
 
 # ====================================================================
 # EXECUTE
 # ====================================================================
 
-# Uncomment the line below to run
-filename, data = run_pipeline()
\ No newline at end of file
+if __name__ == "__main__":
+    filename, total = run_pipeline()
\ No newline at end of file